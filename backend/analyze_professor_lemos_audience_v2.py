@@ -7,6 +7,7 @@ Versão melhorada com tratamento de erros e endpoints alternativos
 """
 
 import os
+import heapq
 import json
 import requests
 from datetime import datetime, timedelta
@@ -672,7 +673,7 @@ class AudienceAnalyzer:
             
             elif "country" in key or key == "page_fans_country":
                 total = sum(value.values())
-                for country, count in sorted(value.items(), key=lambda x: x[1], reverse=True)[:20]:
+                for country, count in heapq.nlargest(20, value.items(), key=lambda x: x[1]):
                     result["countries"].append({
                         "code": country,
                         "count": count,
@@ -681,7 +682,7 @@ class AudienceAnalyzer:
             
             elif "city" in key or key == "page_fans_city":
                 total = sum(value.values())
-                for city, count in sorted(value.items(), key=lambda x: x[1], reverse=True)[:30]:
+                for city, count in heapq.nlargest(30, value.items(), key=lambda x: x[1]):
                     result["cities"].append({
                         "name": city,
                         "count": count,
@@ -0,0 +1,272 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+CACHE_BACKEND = os.getenv("BIA_CACHE_BACKEND", "redis").lower()
+CACHE_NAMESPACE = os.getenv("BIA_CACHE_NAMESPACE", "bia:cache")
+# How long a worker computing a missing key holds it, and how long others wait for it
+CACHE_LOCK_TTL_SEC = float(os.getenv("BIA_CACHE_LOCK_TTL_SEC", "60"))
+CACHE_LOCK_WAIT_SEC = float(os.getenv("BIA_CACHE_LOCK_WAIT_SEC", "45"))
+# After a Redis failure, serve from process memory for this long before retrying
+REDIS_RETRY_AFTER_SEC = float(os.getenv("BIA_CACHE_REDIS_RETRY_SEC", "30"))
+
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL. Eviction is O(1)."""
+    shared = False
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return payload
+
+    def set(self, key: str, payload: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key: str, payload: str, ttl_seconds: float) -> bool:
+        """Set only if absent (used for locks)."""
+        if self.get(key) is not None:
+            return False
+        self.set(key, payload, ttl_seconds)
+        return True
+
+    def delete(self, key: str, expected: Optional[str] = None) -> None:
+        with self._lock:
+            item = self._entries.get(key)
+            if item and (expected is None or item[1] == expected):
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Redis-backed store shared by every uvicorn worker and Celery.
+    Falls back to a local MemoryBackend while Redis is unreachable.
+    """
+    shared = True
+
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+    )
+
+    def __init__(self, url: str = REDIS_URL, max_entries: int = 256):
+        import redis  # Optional: only needed when BIA_CACHE_BACKEND=redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._fallback = MemoryBackend(max_entries)
+        self._down_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _call(self, op: str, *args):
+        if self.available:
+            try:
+                return getattr(self, f"_redis_{op}")(*args)
+            except Exception as e:
+                logger.warning(f"Redis cache unavailable ({e}); using process memory for {REDIS_RETRY_AFTER_SEC:.0f}s")
+                self._down_until = time.monotonic() + REDIS_RETRY_AFTER_SEC
+        return getattr(self._fallback, op)(*args)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._call("get", key)
+
+    def set(self, key: str, payload: str, ttl_seconds: float) -> None:
+        self._call("set", key, payload, ttl_seconds)
+
+    def add(self, key: str, payload: str, ttl_seconds: float) -> bool:
+        return bool(self._call("add", key, payload, ttl_seconds))
+
+    def delete(self, key: str, expected: Optional[str] = None) -> None:
+        self._call("delete", key, expected)
+
+    def _redis_get(self, key: str) -> Optional[str]:
+        value = self._client.get(key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    def _redis_set(self, key: str, payload: str, ttl_seconds: float) -> None:
+        self._client.set(key, payload, px=max(1, int(ttl_seconds * 1000)))
+
+    def _redis_add(self, key: str, payload: str, ttl_seconds: float) -> bool:
+        return bool(self._client.set(key, payload, px=max(1, int(ttl_seconds * 1000)), nx=True))
+
+    def _redis_delete(self, key: str, expected: Optional[str] = None) -> None:
+        if expected is None:
+            self._client.delete(key)
+        else:
+            self._client.eval(self._RELEASE_SCRIPT, 1, key, expected)
+
+
+class SharedCache:
+    """
+    Named JSON cache with stampede protection and hit/miss metrics.
+
+    Values are stored serialized, so every read returns a fresh object without
+    an extra deep copy. Typical use:
+
+        cached = await cache.get_or_acquire(key)
+        if cached is not None:
+            return cached
+        try:
+            value = await compute()
+            cache.set(key, value)
+            return value
+        finally:
+            cache.release(key)
+    """
+
+    def __init__(self, name: str, default_ttl: float = 300, max_entries: int = 256, backend=None):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.backend = backend if backend is not None else _build_backend(max_entries)
+        self._local_waiters: Dict[Tuple[int, str], asyncio.Event] = {}
+        self._lock_tokens: Dict[str, str] = {}
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "stampede_waits": 0, "errors": 0}
+
+    def _key(self, key: str) -> str:
+        return f"{CACHE_NAMESPACE}:{self.name}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        payload = self.backend.get(self._key(key))
+        if payload is None:
+            self._stats["misses"] += 1
+            return None
+        try:
+            value = json.loads(payload)
+        except (TypeError, ValueError):
+            self._stats["errors"] += 1
+            return None
+        self._stats["hits"] += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        try:
+            payload = json.dumps(value, ensure_ascii=False, default=str)
+        except (TypeError, ValueError) as e:
+            self._stats["errors"] += 1
+            logger.warning(f"Cache '{self.name}' could not serialize value: {e}")
+            return
+        self.backend.set(self._key(key), payload, ttl_seconds or self.default_ttl)
+        self._stats["sets"] += 1
+
+    async def get_or_acquire(self, key: str) -> Optional[Any]:
+        """
+        Returns the cached value, or None once the caller holds the right to
+        compute it. Concurrent callers for the same key (in this process or, with
+        Redis, in any worker) wait for the first one instead of recomputing.
+        Callers that get None must call `release(key)` when done.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        loop_key = (id(asyncio.get_running_loop()), key)
+        deadline = time.monotonic() + CACHE_LOCK_WAIT_SEC
+        while loop_key in self._local_waiters and time.monotonic() < deadline:
+            self._stats["stampede_waits"] += 1
+            try:
+                await asyncio.wait_for(self._local_waiters[loop_key].wait(), timeout=deadline - time.monotonic())
+            except (asyncio.TimeoutError, KeyError):
+                break
+            value = self.get(key)
+            if value is not None:
+                return value
+        self._local_waiters[loop_key] = asyncio.Event()
+
+        if self.backend.shared:
+            token = uuid.uuid4().hex
+            lock_key = self._key(f"lock:{key}")
+            waited = False
+            while not self.backend.add(lock_key, token, CACHE_LOCK_TTL_SEC):
+                if not waited:
+                    self._stats["stampede_waits"] += 1
+                    waited = True
+                if time.monotonic() >= deadline:
+                    # Holder is too slow or gone; compute without the lock
+                    return None
+                await asyncio.sleep(0.1)
+                value = self.get(key)
+                if value is not None:
+                    self.release(key)
+                    return value
+            self._lock_tokens[key] = token
+        return None
+
+    def release(self, key: str) -> None:
+        token = self._lock_tokens.pop(key, None)
+        if token is not None:
+            self.backend.delete(self._key(f"lock:{key}"), token)
+        try:
+            loop_key = (id(asyncio.get_running_loop()), key)
+        except RuntimeError:
+            return
+        event = self._local_waiters.pop(loop_key, None)
+        if event is not None:
+            event.set()
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        data = {
+            "backend": type(self.backend).__name__,
+            **self._stats,
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+        if isinstance(self.backend, MemoryBackend):
+            data.update({"entries": len(self.backend), "evictions": self.backend.evictions})
+        elif isinstance(self.backend, RedisBackend):
+            data["redis_available"] = self.backend.available
+        return data
+
+
+_caches: Dict[str, SharedCache] = {}
+
+
+def _build_backend(max_entries: int):
+    if CACHE_BACKEND == "redis":
+        try:
+            return RedisBackend(REDIS_URL, max_entries)
+        except ImportError:
+            logger.warning("redis package not installed; BIA caches will be per-process")
+    return MemoryBackend(max_entries)
+
+
+def get_cache(name: str, default_ttl: float = 300, max_entries: int = 256) -> SharedCache:
+    """Returns the process-wide cache registered under `name`."""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = SharedCache(name, default_ttl=default_ttl, max_entries=max_entries)
+    return cache
+
+
+def get_cache_metrics() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.metrics() for name, cache in _caches.items()}
@@ -1,5 +1,6 @@
 
 from celery import Celery
+from celery.signals import worker_process_init
 import os
 from dotenv import load_dotenv
 
@@ -25,5 +26,26 @@ celery_app.conf.update(
             "task": "tasks.periodic_intelligence_check",
             "schedule": 3600.0, # Every hour
         },
+        "sync-insights-warehouse-every-hour": {
+            "task": "tasks.sync_insights_warehouse",
+            "schedule": 3600.0,
+        },
+        "refresh-client-tokens-twice-a-day": {
+            "task": "tasks.refresh_client_tokens",
+            "schedule": 12 * 3600.0,
+        },
+        "ingest-demographics-daily": {
+            "task": "tasks.ingest_demographics",
+            "schedule": 24 * 3600.0,
+        },
     },
 )
+
+
+@worker_process_init.connect
+def warm_worker_process(**kwargs):
+    """Preloads BIA_WARMUP_ON_START services in each worker process (none by default)."""
+    from app.core.lazy import WARMUP_ON_START, warm_up
+
+    if WARMUP_ON_START:
+        warm_up(WARMUP_ON_START)
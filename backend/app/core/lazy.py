@@ -0,0 +1,90 @@
+import functools
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Services warmed when the API or a Celery worker process starts, e.g. "vision,interactions"
+WARMUP_ON_START = [name.strip() for name in os.getenv("BIA_WARMUP_ON_START", "").split(",") if name.strip()]
+
+# Warm-up targets as "module:attribute" so nothing heavy is imported until asked for
+WARMUP_TARGETS = {
+    "vision": "app.services.creative_ai:creative_intelligence_service",
+    "creative_search": "app.services.creative_search:creative_search_service",
+    "strategist": "app.services.intelligence:intelligence_service",
+    "interactions": "app.services.interactions_ai:interactions_ai_service",
+}
+
+_warmup_status: Dict[str, Dict[str, Any]] = {}
+
+
+class lazy_resource:
+    """
+    Like functools.cached_property, but the loader runs under a lock so two
+    threads hitting a cold service do not load the same model twice.
+
+        class Service:
+            @lazy_resource
+            def model(self):
+                return load_heavy_model()
+    """
+
+    def __init__(self, loader: Callable[[Any], Any]):
+        self.loader = loader
+        self.name = loader.__name__
+        self._lock = threading.RLock()
+        functools.update_wrapper(self, loader)
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.name]
+        except KeyError:
+            pass
+        with self._lock:
+            if self.name not in instance.__dict__:
+                started = time.monotonic()
+                instance.__dict__[self.name] = self.loader(instance)
+                logger.info(f"Loaded {type(instance).__name__}.{self.name} in {time.monotonic() - started:.2f}s")
+        return instance.__dict__[self.name]
+
+
+def is_loaded(instance: Any, name: str) -> bool:
+    return name in instance.__dict__
+
+
+def warm_up(names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Imports the named services and loads their lazy resources now instead of
+    on the first request. Every service exposes `warm_up() -> dict`.
+    """
+    results = {}
+    for name in names or WARMUP_TARGETS:
+        target = WARMUP_TARGETS.get(name)
+        if target is None:
+            results[name] = {"status": "error", "error": "Unknown service"}
+            continue
+        started = time.monotonic()
+        try:
+            module_name, attribute = target.split(":")
+            service = getattr(importlib.import_module(module_name), attribute)
+            detail = service.warm_up()
+            results[name] = {"status": "ready", **(detail or {})}
+        except Exception as e:
+            logger.error(f"Warm-up of {name} failed: {e}")
+            results[name] = {"status": "error", "error": str(e)}
+        results[name]["seconds"] = round(time.monotonic() - started, 2)
+        _warmup_status[name] = results[name]
+    return results
+
+
+def get_warmup_status() -> Dict[str, Dict[str, Any]]:
+    return {name: _warmup_status.get(name, {"status": "cold"}) for name in WARMUP_TARGETS}
@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Enum, Boolean, ForeignKey, Float
 from sqlalchemy.sql import func
 from app.core.database import Base
 import enum
@@ -35,6 +35,24 @@ class AutonomousAction(Base):
     status = Column(String, default="completed")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class AgentAccountRun(Base):
+    """One Strategist pass over an ad account, with its timings."""
+    __tablename__ = "agent_account_runs"
+    id = Column(Integer, primary_key=True, index=True)
+    cycle_id = Column(String, index=True, nullable=True) # Scheduler cycle the run belongs to
+    ad_account_id = Column(String, index=True)
+    mode = Column(String)
+    status = Column(String, default="ok") # ok, error
+    error = Column(String, nullable=True)
+    campaigns = Column(Integer, default=0)
+    prompts = Column(Integer, default=0)
+    actions = Column(Integer, default=0)
+    fetch_seconds = Column(Float, default=0.0)
+    llm_seconds = Column(Float, default=0.0)
+    duration_seconds = Column(Float, default=0.0)
+    started_at = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 class HistoricalAudit(Base):
     __tablename__ = "historical_audits"
     id = Column(Integer, primary_key=True, index=True)
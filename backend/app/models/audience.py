@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Date, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class DemographicSnapshot(Base):
+    """
+    Daily snapshot of the lifetime audience demographics of a Facebook Page or
+    Instagram account, stored compacted (top-N countries/cities, age x gender
+    matrix) together with the dashboard-ready summary.
+    """
+    __tablename__ = "demographic_snapshots"
+    __table_args__ = (
+        # Also serves "latest snapshot of an account" lookups
+        UniqueConstraint("platform", "account_id", "snapshot_date", name="uq_demographic_snapshots_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    platform = Column(String, nullable=False)  # facebook, instagram
+    account_id = Column(String, nullable=False)  # Page ID or Instagram Business Account ID
+    snapshot_date = Column(Date, nullable=False)
+
+    totals = Column(JSON, default=dict)  # {"countries": n, "cities": n, "gender_age": n}
+    countries = Column(JSON, default=list)  # [[code, count], ...] descending
+    cities = Column(JSON, default=list)  # [[name, count], ...] descending
+    gender_age = Column(JSON, default=dict)  # {"25-34": [male, female, unknown], ...}
+    summary = Column(JSON, default=dict)  # Frontend demographics, growth vs. the previous snapshot
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Date, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Date, ForeignKey, MetaData, Table, UniqueConstraint
 from sqlalchemy.sql import func
 
 from app.core.database import Base
@@ -48,14 +47,18 @@ class CampaignAnalysisReport(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
 
-    daily_metrics = relationship("CampaignKpiDaily", back_populates="report", cascade="all, delete-orphan")
-
 
 class CampaignKpiDaily(Base):
-    __tablename__ = "campaign_kpi_daily"
+    """
+    One row per campaign and day, shared by every report that covers the day
+    (re-analysis upserts the days instead of storing another copy).
+    """
+    __tablename__ = "campaign_kpi_days"
+    __table_args__ = (UniqueConstraint("campaign_id", "date_start", name="uq_campaign_kpi_day"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    report_id = Column(Integer, ForeignKey("campaign_analysis_reports.id"), index=True, nullable=False)
+    # Report that last wrote the day
+    report_id = Column(Integer, ForeignKey("campaign_analysis_reports.id"), index=True, nullable=True)
     campaign_id = Column(String, index=True, nullable=False)
 
     date_start = Column(Date, nullable=True)
@@ -75,5 +78,32 @@ class CampaignKpiDaily(Base):
     purchase_value = Column(Float, default=0.0)
     raw_metrics = Column(JSON, default=dict)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
 
-    report = relationship("CampaignAnalysisReport", back_populates="daily_metrics")
+# Per-report daily rows written before days were shared across reports. Read
+# only, for reports that predate campaign_kpi_days; kept off Base.metadata so
+# create_all never creates it.
+legacy_kpi_daily = Table(
+    "campaign_kpi_daily",
+    MetaData(),
+    Column("id", Integer, primary_key=True),
+    Column("report_id", Integer),
+    Column("campaign_id", String),
+    Column("date_start", Date),
+    Column("date_stop", Date),
+    Column("amount_spent", Float),
+    Column("impressions", Integer),
+    Column("reach", Integer),
+    Column("frequency", Float),
+    Column("clicks", Integer),
+    Column("link_clicks", Integer),
+    Column("outbound_clicks", Integer),
+    Column("ctr", Float),
+    Column("cpc", Float),
+    Column("cpm", Float),
+    Column("leads", Integer),
+    Column("purchases", Integer),
+    Column("purchase_value", Float),
+    Column("raw_metrics", JSON),
+)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class ClientToken(Base):
+    """Meta OAuth token of an agency client. The access token is stored encrypted."""
+    __tablename__ = "client_tokens"
+
+    client_id = Column(String, primary_key=True)
+    access_token_encrypted = Column(Text, nullable=False)
+    token_type = Column(String, default="bearer")
+    expires_in = Column(Integer, nullable=True)  # Lifetime in seconds as granted by Meta
+    expires_at = Column(DateTime, nullable=True, index=True)
+
+    user_id = Column(String, nullable=True)
+    user_name = Column(String, nullable=True)
+    user_email = Column(String, nullable=True)
+    ad_accounts = Column(JSON, default=list)
+
+    created_at = Column(DateTime, nullable=False)
+    last_used = Column(DateTime, nullable=True)
+    refreshed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
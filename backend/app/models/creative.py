@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class CreativeAnalysis(Base):
+    """Vision analysis of one creative image, keyed by the SHA-256 of its bytes."""
+    __tablename__ = "creative_analyses"
+
+    id = Column(Integer, primary_key=True, index=True)
+    image_hash = Column(String, unique=True, index=True, nullable=False)
+    source_url = Column(String, nullable=True)  # First URL the image was seen at (CDN URLs expire)
+
+    objects = Column(JSON, default=list)
+    colors = Column(JSON, default=list)
+    brightness = Column(Float, default=0.0)
+    text_density = Column(Float, default=0.0)
+    face_count = Column(Integer, default=0)
+    model_name = Column(String, nullable=True)
+
+    analyzed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class CreativeIndexState(Base):
+    """Checkpoint of the creative embedding job for one ad account (resumes from `cursor`)."""
+    __tablename__ = "creative_index_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    ad_account_id = Column(String, unique=True, index=True, nullable=False)
+    status = Column(String, default="idle")  # idle, running, done, error
+    cursor = Column(String, nullable=True)  # Graph API `after` cursor of the next page to index
+    indexed = Column(Integer, default=0)
+    updated = Column(Integer, default=0)
+    skipped = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Refreshed per page; a stale "running" claim may be taken over
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class DashboardCampaign(Base):
+    """Campaign a client manages through the dashboard API."""
+    __tablename__ = "dashboard_campaigns"
+    __table_args__ = (
+        Index("ix_dashboard_campaigns_client_status", "client_id", "status"),
+        Index("ix_dashboard_campaigns_client_created", "client_id", "created_at"),
+    )
+
+    id = Column(String, primary_key=True)
+    client_id = Column(String, nullable=False)
+    name = Column(String, nullable=True)
+    objective = Column(String, default="OUTCOME_ENGAGEMENT")
+    status = Column(String, default="PAUSED")
+    budget_total = Column(Float, default=0.0)
+    budget_daily = Column(Float, default=0.0)
+    start_date = Column(String, nullable=True)
+    end_date = Column(String, nullable=True)
+    ad_accounts = Column(JSON, default=list)
+    targeting = Column(JSON, default=dict)
+    creative = Column(JSON, default=dict)
+    metrics = Column(JSON, default=dict)
+
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+
+class ClientCampaignStats(Base):
+    """
+    Running per-client totals over dashboard_campaigns, adjusted on every
+    create/update/delete so summaries never scan the campaigns.
+    """
+    __tablename__ = "dashboard_client_stats"
+
+    client_id = Column(String, primary_key=True)
+    total_campaigns = Column(Integer, default=0)
+    active_campaigns = Column(Integer, default=0)
+    paused_campaigns = Column(Integer, default=0)
+    total_spend = Column(Float, default=0.0)
+    total_impressions = Column(Integer, default=0)
+    total_clicks = Column(Integer, default=0)
+    total_conversions = Column(Integer, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, SmallInteger, UniqueConstraint, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class HeatmapCell(Base):
+    """Scored H3 cell of a city's opportunity heatmap."""
+    __tablename__ = "heatmap_cells"
+    __table_args__ = (
+        UniqueConstraint("city_id", "strategy", "resolution", "h3_index", name="uq_heatmap_cell_key"),
+        Index("ix_heatmap_cells_tile", "city_id", "strategy", "resolution", "tile_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(String, nullable=False)
+    strategy = Column(String, nullable=False)
+    resolution = Column(Integer, nullable=False)
+    h3_index = Column(String, nullable=False)
+    tile_id = Column(String, nullable=False)  # Parent H3 cell grouping cells into a map tile
+
+    population = Column(Integer, default=0)
+    households = Column(Integer, default=0)
+    avg_income = Column(Float, default=0.0)
+    competitors = Column(Integer, default=0)
+    score = Column(Float, default=0.0)
+    verdict_code = Column(SmallInteger, default=0)
+
+    # Hash of the scoring inputs; cells are only rewritten when it changes
+    input_hash = Column(String, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class HeatmapTile(Base):
+    """Version of one heatmap tile, used as its HTTP ETag."""
+    __tablename__ = "heatmap_tiles"
+    __table_args__ = (
+        UniqueConstraint("city_id", "strategy", "resolution", "tile_id", name="uq_heatmap_tile_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    city_id = Column(String, nullable=False)
+    strategy = Column(String, nullable=False)
+    resolution = Column(Integer, nullable=False)
+    tile_id = Column(String, nullable=False)
+    etag = Column(String, nullable=False)
+    cell_count = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,53 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, JSON, Date, Boolean, UniqueConstraint, Index
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class InsightsDaily(Base):
+    """One day of Meta insights for one object (account, campaign, ad set or ad)."""
+    __tablename__ = "insights_daily"
+    __table_args__ = (
+        UniqueConstraint("ad_account_id", "level", "object_id", "date_start", name="uq_insights_daily_key"),
+        Index("ix_insights_daily_account_level_date", "ad_account_id", "level", "date_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    ad_account_id = Column(String, nullable=False)
+    level = Column(String, nullable=False)  # account, campaign, adset, ad
+    object_id = Column(String, nullable=False)
+    object_name = Column(String, nullable=True)
+    campaign_id = Column(String, nullable=True, index=True)
+
+    date_start = Column(Date, nullable=False)
+    spend = Column(Float, default=0.0)
+    impressions = Column(Integer, default=0)
+    reach = Column(Integer, default=0)
+    frequency = Column(Float, default=0.0)
+    clicks = Column(Integer, default=0)
+    ctr = Column(Float, default=0.0)
+    cpc = Column(Float, default=0.0)
+    cpm = Column(Float, default=0.0)
+    actions = Column(JSON, default=list)
+    action_values = Column(JSON, default=list)
+    raw_metrics = Column(JSON, default=dict)
+
+    # Meta restates the most recent days; rows older than that window are final
+    is_final = Column(Boolean, default=False)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class InsightsSyncState(Base):
+    """Incremental sync watermark per ad account and level."""
+    __tablename__ = "insights_sync_state"
+    __table_args__ = (
+        UniqueConstraint("ad_account_id", "level", name="uq_insights_sync_state_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    ad_account_id = Column(String, nullable=False)
+    level = Column(String, nullable=False)
+    backfill_since = Column(Date, nullable=True)
+    final_through = Column(Date, nullable=True)
+    synced_through = Column(Date, nullable=True)
+    last_synced_at = Column(DateTime(timezone=True), nullable=True)
@@ -3,18 +3,41 @@ Social Insights endpoint — LIVE DATA ONLY (NO MOCKS)
 
 This endpoint fetches REAL data from Meta Graph API.
 NO mock data, NO simulations, NO fallbacks.
+
+Responses are cached per (platform, page/IG id, period) with
+stale-while-revalidate: a cached payload is returned immediately, labeled
+with its `fetched_at` and cache status, and refreshed in the background
+once it is older than INSIGHTS_FRESH_SEC.
 """
 
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional
+import asyncio
+import hashlib
 import logging
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
+from app.core.cache import get_cache
+from app.core.database import SessionLocal
+from app.services.demographics import DEMOGRAPHIC_METRICS, compact_demographics, demographics_store, empty_demographics, summarize_demographics
+from app.services.meta_engine.api import make_api_request
 
 router = APIRouter()
 logger = logging.getLogger("insights")
 
+# Cached responses younger than this are served as fresh; older ones (up to
+# INSIGHTS_MAX_STALE_SEC) are served immediately while a refresh runs
+INSIGHTS_FRESH_SEC = float(os.getenv("BIA_INSIGHTS_FRESH_SEC", "60"))
+INSIGHTS_MAX_STALE_SEC = float(os.getenv("BIA_INSIGHTS_MAX_STALE_SEC", "3600"))
+# Page -> Instagram account and default page choice rarely change
+PAGE_RESOLUTION_TTL_SEC = float(os.getenv("BIA_INSIGHTS_PAGE_RESOLUTION_TTL_SEC", "86400"))
+
+_insights_cache = get_cache("social_insights", default_ttl=INSIGHTS_MAX_STALE_SEC)
+_resolution_cache = get_cache("social_page_resolution", default_ttl=PAGE_RESOLUTION_TTL_SEC)
+_refreshing: dict = {}  # cache key -> in-flight refresh task
+
 # Load environment variables
 base_dir = Path(__file__).resolve().parent.parent.parent
 dotenv_path = base_dir / ".env"
@@ -38,254 +61,166 @@ async def get_available_accounts():
         "total": {...}
     }
     """
-    import httpx
-    
     access_token = os.getenv("FACEBOOK_ACCESS_TOKEN")
     
     if not access_token:
         raise HTTPException(status_code=503, detail="Facebook Access Token not configured")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # 1. Get Facebook Pages
-        url = f"https://graph.facebook.com/v22.0/me/accounts?fields=id,name,username,followers_count,instagram_business_account&access_token={access_token}"
-        resp = await client.get(url)
-        pages_data = resp.json()
-        
-        pages = []
-        if 'error' not in pages_data:
-            for page in pages_data.get('data', []):
-                page_info = {
-                    'id': page['id'],
-                    'name': page.get('name', 'Unknown'),
-                    'username': page.get('username', 'N/A'),
-                    'followers': page.get('followers_count', 0),
-                    'has_instagram': 'instagram_business_account' in page,
-                    'instagram_id': page['instagram_business_account']['id'] if 'instagram_business_account' in page else None
-                }
-                pages.append(page_info)
-        
-        # 2. Get Ad Accounts
-        url = f"https://graph.facebook.com/v22.0/me/adaccounts?fields=id,name,account_status&access_token={access_token}"
-        resp = await client.get(url)
-        ads_data = resp.json()
-        
-        ad_accounts = []
-        if 'error' not in ads_data:
-            for ad_account in ads_data.get('data', []):
-                ad_accounts.append({
-                    'id': ad_account['id'],
-                    'name': ad_account.get('name', 'Unknown'),
-                    'status': ad_account.get('account_status', 'Unknown')
-                })
-        
-        # 3. Get Instagram Details
-        instagrams = []
-        for page in pages:
-            if page['has_instagram'] and page['instagram_id']:
-                ig_id = page['instagram_id']
-                
-                ig_url = f"https://graph.facebook.com/v22.0/{ig_id}?fields=username,name,followers_count&access_token={access_token}"
-                ig_resp = await client.get(ig_url)
-                ig_data = ig_resp.json()
-                
-                if 'error' not in ig_data:
-                    instagrams.append({
-                        'id': ig_id,
-                        'username': ig_data.get('username', 'N/A'),
-                        'name': ig_data.get('name', 'N/A'),
-                        'followers': ig_data.get('followers_count', 0),
-                        'page_id': page['id'],
-                        'page_name': page['name']
-                    })
-        
-        return {
-            'facebook_pages': pages,
-            'instagram_accounts': instagrams,
-            'ad_accounts': ad_accounts,
-            'total': {
-                'facebook_pages': len(pages),
-                'instagram_accounts': len(instagrams),
-                'ad_accounts': len(ad_accounts)
+    # 1+2. Pages and ad accounts in parallel (coalesced into one Graph API batch)
+    pages_data, ads_data = await asyncio.gather(
+        make_api_request("me/accounts", access_token, {
+            "fields": "id,name,username,followers_count,instagram_business_account"
+        }),
+        make_api_request("me/adaccounts", access_token, {
+            "fields": "id,name,account_status"
+        }),
+    )
+    
+    pages = []
+    if 'error' not in pages_data:
+        for page in pages_data.get('data', []):
+            page_info = {
+                'id': page['id'],
+                'name': page.get('name', 'Unknown'),
+                'username': page.get('username', 'N/A'),
+                'followers': page.get('followers_count', 0),
+                'has_instagram': 'instagram_business_account' in page,
+                'instagram_id': page['instagram_business_account']['id'] if 'instagram_business_account' in page else None
             }
+            pages.append(page_info)
+    
+    ad_accounts = []
+    if 'error' not in ads_data:
+        for ad_account in ads_data.get('data', []):
+            ad_accounts.append({
+                'id': ad_account['id'],
+                'name': ad_account.get('name', 'Unknown'),
+                'status': ad_account.get('account_status', 'Unknown')
+            })
+    
+    # 3. Get Instagram Details (one batch for all connected accounts)
+    ig_pages = [page for page in pages if page['has_instagram'] and page['instagram_id']]
+    ig_results = await asyncio.gather(*[
+        make_api_request(page['instagram_id'], access_token, {"fields": "username,name,followers_count"})
+        for page in ig_pages
+    ])
+    
+    instagrams = []
+    for page, ig_data in zip(ig_pages, ig_results):
+        if 'error' not in ig_data:
+            instagrams.append({
+                'id': page['instagram_id'],
+                'username': ig_data.get('username', 'N/A'),
+                'name': ig_data.get('name', 'N/A'),
+                'followers': ig_data.get('followers_count', 0),
+                'page_id': page['id'],
+                'page_name': page['name']
+            })
+    
+    return {
+        'facebook_pages': pages,
+        'instagram_accounts': instagrams,
+        'ad_accounts': ad_accounts,
+        'total': {
+            'facebook_pages': len(pages),
+            'instagram_accounts': len(instagrams),
+            'ad_accounts': len(ad_accounts)
         }
+    }
+
+
+async def _no_request():
+    return {'data': []}
 
 
-async def _fetch_facebook_data(client, page_id, token):
+async def _fetch_facebook_data(page_id, token, include_demographics=True):
     """Fetch Facebook specific insights and posts in parallel"""
     import asyncio
-    
+
     # 1. Page Followers
-    followers_task = client.get(
-        f"https://graph.facebook.com/v22.0/{page_id}?fields=followers_count,name,username&access_token={token}"
-    )
+    followers_task = make_api_request(page_id, token, {"fields": "followers_count,name,username"})
 
     # 2. General Insights
-    insights_task = client.get(
-        f"https://graph.facebook.com/v22.0/{page_id}/insights"
-        f"?metric=page_impressions,page_engaged_users,page_post_engagements,page_video_views"
-        f"&period=day&access_token={token}"
-    )
+    insights_task = make_api_request(f"{page_id}/insights", token, {
+        "metric": "page_impressions,page_engaged_users,page_post_engagements,page_video_views",
+        "period": "day",
+    })
 
-    # 3. Demographics
-    demo_task = client.get(
-        f"https://graph.facebook.com/v22.0/{page_id}/insights"
-        f"?metric=page_fans_gender_age,page_fans_city,page_fans_country"
-        f"&period=lifetime&access_token={token}"
-    )
+    # 3. Demographics (skipped when today's snapshot is already stored)
+    demo_task = make_api_request(f"{page_id}/insights", token, {
+        "metric": ",".join(DEMOGRAPHIC_METRICS["facebook"]),
+        "period": "lifetime",
+    }) if include_demographics else _no_request()
 
     # 4. Recent Posts
-    posts_task = client.get(
-        f"https://graph.facebook.com/v22.0/{page_id}/posts"
-        f"?fields=id,message,created_time,full_picture,permalink_url,shares,likes.summary(true),comments.summary(true),insights.metric(post_impressions_unique,post_engaged_users)"
-        f"&limit=15&access_token={token}"
-    )
+    posts_task = make_api_request(f"{page_id}/posts", token, {
+        "fields": "id,message,created_time,full_picture,permalink_url,shares,likes.summary(true),comments.summary(true),insights.metric(post_impressions_unique,post_engaged_users)",
+        "limit": 15,
+    })
 
     responses = await asyncio.gather(followers_task, insights_task, demo_task, posts_task, return_exceptions=True)
     return responses
 
 
-async def _fetch_instagram_data(client, ig_id, token):
+async def _fetch_instagram_data(ig_id, token, include_demographics=True):
     """Fetch Instagram specific insights and posts in parallel"""
     import asyncio
 
     # 1. IG Followers
-    followers_task = client.get(
-        f"https://graph.facebook.com/v22.0/{ig_id}?fields=followers_count,username,name&access_token={token}"
-    )
+    followers_task = make_api_request(ig_id, token, {"fields": "followers_count,username,name"})
 
     # 2. General Insights - Using only available metrics
     # Available: reach, follower_count, website_clicks, profile_views, online_followers, 
     # accounts_engaged, total_interactions, likes, comments, shares, saves, replies
     # Note: profile_views and accounts_engaged require metric_type=total_value
-    insights_task = client.get(
-        f"https://graph.facebook.com/v22.0/{ig_id}/insights"
-        f"?metric=reach,likes,comments,shares,saves,total_interactions"
-        f"&period=day&access_token={token}"
-    )
+    insights_task = make_api_request(f"{ig_id}/insights", token, {
+        "metric": "reach,likes,comments,shares,saves,total_interactions",
+        "period": "day",
+    })
     
     # Additional metrics that require total_value
-    insights_total_task = client.get(
-        f"https://graph.facebook.com/v22.0/{ig_id}/insights"
-        f"?metric=profile_views,accounts_engaged"
-        f"&metric_type=total_value&access_token={token}"
-    )
+    insights_total_task = make_api_request(f"{ig_id}/insights", token, {
+        "metric": "profile_views,accounts_engaged",
+        "metric_type": "total_value",
+    })
 
-    # 3. Demographics
-    demo_task = client.get(
-        f"https://graph.facebook.com/v22.0/{ig_id}/insights"
-        f"?metric=audience_gender_age,audience_city,audience_country"
-        f"&period=lifetime&access_token={token}"
-    )
+    # 3. Demographics (skipped when today's snapshot is already stored)
+    demo_task = make_api_request(f"{ig_id}/insights", token, {
+        "metric": ",".join(DEMOGRAPHIC_METRICS["instagram"]),
+        "period": "lifetime",
+    }) if include_demographics else _no_request()
 
     # 4. Recent Media
-    media_task = client.get(
-        f"https://graph.facebook.com/v22.0/{ig_id}/media"
-        f"?fields=id,caption,media_url,media_type,timestamp,permalink,comments_count,like_count,insights.metric(impressions,reach,saved,video_views)"
-        f"&limit=15&access_token={token}"
-    )
+    media_task = make_api_request(f"{ig_id}/media", token, {
+        "fields": "id,caption,media_url,media_type,timestamp,permalink,comments_count,like_count,insights.metric(impressions,reach,saved,video_views)",
+        "limit": 15,
+    })
 
     responses = await asyncio.gather(followers_task, insights_task, insights_total_task, demo_task, media_task, return_exceptions=True)
     return responses
 
 
 def _parse_demographics(demo_data, platform):
-    """Convert Meta demographic data to frontend format"""
-    demographics = {
-        "age": [],
-        "top_country": "N/A",
-        "top_cities": [],
-        "top_city": "N/A",
-        "top_language": "PT-BR",
-        "top_audience": "N/A",
-        "top_age_group": "N/A",
-        "countries_data": [],
-        "cities_data": [],
-        "cities_by_gender": [],
-        "cities_by_age": []
-    }
+    """Convert Meta demographic data to frontend format (without growth; see demographics_store)"""
+    return summarize_demographics(compact_demographics(demo_data, platform))
 
-    if not demo_data or 'data' not in demo_data:
-        return demographics
-
-    # Extract metrics
-    metrics = {}
-    for m in demo_data['data']:
-        if 'values' in m and m['values'] and 'value' in m['values'][0]:
-            metrics[m['name']] = m['values'][0]['value']
-
-    gender_age_key = 'audience_gender_age' if platform == 'instagram' else 'page_fans_gender_age'
-    city_key = 'audience_city' if platform == 'instagram' else 'page_fans_city'
-    country_key = 'audience_country' if platform == 'instagram' else 'page_fans_country'
-
-    # Countries
-    if country_key in metrics and isinstance(metrics[country_key], dict):
-        country_dict = metrics[country_key]
-        total_fans = sum(country_dict.values())
-        if total_fans > 0:
-            country_list = sorted(country_dict.items(), key=lambda x: x[1], reverse=True)[:15]
-            demographics["top_country"] = country_list[0][0] if country_list else "N/A"
-            for c_code, count in country_list:
-                pct = round((count / total_fans) * 100, 1)
-                demographics["countries_data"].append({
-                    "country": c_code,
-                    "likes": count,
-                    "growth": 0,
-                    "percentage": pct
-                })
-
-    # Cities
-    if city_key in metrics and isinstance(metrics[city_key], dict):
-        city_dict = metrics[city_key]
-        total_fans = sum(city_dict.values())
-        if total_fans > 0:
-            city_list = sorted(city_dict.items(), key=lambda x: x[1], reverse=True)[:15]
-            top_city = city_list[0][0] if city_list else "N/A"
-            demographics["top_city"] = top_city.split(',')[0] if ',' in top_city else top_city
-            for city_str, count in city_list:
-                pct = round((count / total_fans) * 100, 1)
-                demographics["cities_data"].append({
-                    "city": city_str,
-                    "likes": count,
-                    "growth": 0,
-                    "percentage": int(pct)
-                })
-
-    # Age & Gender
-    if gender_age_key in metrics and isinstance(metrics[gender_age_key], dict):
-        ga_dict = metrics[gender_age_key]
-        age_groups = ["13-17", "18-24", "25-34", "35-44", "45-54", "55-64", "65+"]
-        total_fans = sum(ga_dict.values())
-
-        if total_fans > 0:
-            age_totals = {age: {'male': 0, 'female': 0} for age in age_groups}
-            
-            for ga_str, count in ga_dict.items():
-                if '.' in ga_str:
-                    parts = ga_str.split('.')
-                    if len(parts) == 2:
-                        g, a = parts
-                        if a in age_totals:
-                            if g == 'M':
-                                age_totals[a]['male'] = count
-                            elif g == 'F':
-                                age_totals[a]['female'] = count
-
-            for age in age_groups:
-                m_count = age_totals[age]['male']
-                f_count = age_totals[age]['female']
-                m_pct = int((m_count / total_fans) * 100)
-                f_pct = int((f_count / total_fans) * 100)
-                demographics["age"].append({"range": age, "male": m_pct, "female": f_pct})
-
-            # Find top audience
-            top_ga = max(ga_dict.items(), key=lambda x: x[1])
-            if '.' in top_ga[0]:
-                g, a = top_ga[0].split('.')
-                g_str = "Homens" if g == 'M' else "Mulheres" if g == 'F' else "ND"
-                demographics["top_audience"] = f"{g_str} {a}"
-                demographics["top_age_group"] = a
-
-    return demographics
+
+def _stored_demographics(platform, account_id):
+    """Today's stored demographics summary for an account, or None."""
+    db = SessionLocal()
+    try:
+        return demographics_store.latest(db, platform, account_id, on_or_after=demographics_store.today())
+    finally:
+        db.close()
+
+
+def _ingest_demographics(platform, account_id, demo_data):
+    """Stores today's demographic snapshot and returns its summary (with day-over-day growth)."""
+    db = SessionLocal()
+    try:
+        return demographics_store.ingest(db, platform, account_id, demo_data)
+    finally:
+        db.close()
 
 
 def _parse_facebook_posts(posts_data):
@@ -419,6 +354,89 @@ def _parse_instagram_posts(media_data):
     return top_posts
 
 
+def _token_key(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+async def _resolve_page_id(access_token: str, page_id: str = None) -> str:
+    """
+    Page to report on: the given one, FACEBOOK_PAGE_ID, or the token's
+    preferred page (memoized for PAGE_RESOLUTION_TTL_SEC instead of listing
+    /me/accounts on every request).
+    """
+    if not page_id:
+        page_id = os.getenv("FACEBOOK_PAGE_ID")
+        logger.info(f"Using FACEBOOK_PAGE_ID from env: {page_id}")
+    else:
+        logger.info(f"Using provided page_id: {page_id}")
+
+    if not page_id:
+        page_id = _resolution_cache.get(f"default_page:{_token_key(access_token)}")
+
+    if not page_id:
+        # Fetch available pages
+        data = await make_api_request("me/accounts", access_token)
+
+        if 'error' in data:
+            logger.error(f"Graph API Error fetching pages: {data['error'].get('message', 'Unknown error')}")
+            raise HTTPException(status_code=500, detail=f"Graph API Error: {data['error'].get('message', 'Unknown error')}")
+
+        accounts = data.get('data', [])
+        if not accounts:
+            logger.error("No Facebook pages found")
+            raise HTTPException(status_code=404, detail="No Facebook pages found")
+
+        # Log all available pages
+        logger.info(f"Available pages: {[(acc.get('name', 'Unknown'), acc['id']) for acc in accounts]}")
+
+        page_id = accounts[0]['id']
+        if len(accounts) > 1:
+            # Try to find Professor Lemos page
+            for acc in accounts:
+                acc_name = acc.get('name', '').lower()
+                acc_id = acc['id']
+                logger.info(f"Checking page: {acc_name} ({acc_id})")
+                if '416436651784721' in acc_id or 'lemos' in acc_name or 'professor' in acc_name:
+                    page_id = acc_id
+                    logger.info(f"Found Professor Lemos page: {page_id}")
+                    break
+
+        _resolution_cache.set(f"default_page:{_token_key(access_token)}", page_id)
+
+    return page_id
+
+
+async def _resolve_instagram_id(access_token: str, page_id: str) -> str:
+    """Instagram Business Account connected to a page (memoized for PAGE_RESOLUTION_TTL_SEC)."""
+    cache_key = f"instagram:{page_id}"
+    ig_id = _resolution_cache.get(cache_key)
+    if ig_id:
+        return ig_id
+
+    # Get Instagram Business Account ID from page
+    logger.info(f"Fetching Instagram Business Account for page {page_id}")
+    ig_data = await make_api_request(page_id, access_token, {"fields": "instagram_business_account"})
+
+    if 'error' in ig_data:
+        error_msg = ig_data['error'].get('message', 'Unknown error')
+        logger.error(f"Failed to get Instagram account: {error_msg}")
+        logger.error(f"Full error response: {ig_data['error']}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get Instagram account: {error_msg}. Verify that page {page_id} has an Instagram Business account connected."
+        )
+
+    ig_account = ig_data.get('instagram_business_account')
+    if not ig_account:
+        logger.error(f"No Instagram Business account connected to page {page_id}")
+        raise HTTPException(status_code=404, detail=f"No Instagram Business account connected to page {page_id}")
+
+    ig_id = ig_account['id']
+    logger.info(f"Instagram Business Account ID: {ig_id}")
+    _resolution_cache.set(cache_key, ig_id)
+    return ig_id
+
+
 async def _fetch_live_data(platform: str, period: str, page_id: str = None, instagram_id: str = None):
     """
     Fetch REAL data from Meta Graph API.
@@ -430,8 +448,6 @@ async def _fetch_live_data(platform: str, period: str, page_id: str = None, inst
         page_id: Facebook Page ID (optional, uses env if not provided)
         instagram_id: Instagram Business Account ID (optional, auto-detected from page_id)
     """
-    import httpx
-
     # Get token from environment
     access_token = os.getenv("FACEBOOK_ACCESS_TOKEN")
 
@@ -439,212 +455,151 @@ async def _fetch_live_data(platform: str, period: str, page_id: str = None, inst
         logger.error("FACEBOOK_ACCESS_TOKEN not configured in .env")
         raise HTTPException(status_code=503, detail="Facebook Access Token not configured")
 
-    # Use provided page_id or fallback to env
-    if not page_id:
-        page_id = os.getenv("FACEBOOK_PAGE_ID")
-        logger.info(f"Using FACEBOOK_PAGE_ID from env: {page_id}")
-    else:
-        logger.info(f"Using provided page_id: {page_id}")
-
-    if not page_id:
-        # Fetch available pages
-        async with httpx.AsyncClient() as client:
-            url = f"https://graph.facebook.com/v22.0/me/accounts?access_token={access_token}"
-            resp = await client.get(url)
-            data = resp.json()
-
-            if 'error' in data:
-                logger.error(f"Graph API Error fetching pages: {data['error'].get('message', 'Unknown error')}")
-                raise HTTPException(status_code=500, detail=f"Graph API Error: {data['error'].get('message', 'Unknown error')}")
-
-            accounts = data.get('data', [])
-            if not accounts:
-                logger.error("No Facebook pages found")
-                raise HTTPException(status_code=404, detail="No Facebook pages found")
-
-            # Log all available pages
-            logger.info(f"Available pages: {[(acc.get('name', 'Unknown'), acc['id']) for acc in accounts]}")
-
-            page_id = accounts[0]['id']
-            if len(accounts) > 1:
-                # Try to find Professor Lemos page
-                for acc in accounts:
-                    acc_name = acc.get('name', '').lower()
-                    acc_id = acc['id']
-                    logger.info(f"Checking page: {acc_name} ({acc_id})")
-                    if '416436651784721' in acc_id or 'lemos' in acc_name or 'professor' in acc_name:
-                        page_id = acc_id
-                        logger.info(f"Found Professor Lemos page: {page_id}")
-                        break
+    # Use provided page_id or fallback to env (or the token's pages)
+    page_id = await _resolve_page_id(access_token, page_id)
 
     logger.info(f"Using page ID: {page_id}")
 
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        # Fetch data based on platform
-        if platform == 'instagram':
-            # Use provided instagram_id or fetch from page
-            if instagram_id:
-                ig_id = instagram_id
-                logger.info(f"Using provided instagram_id: {ig_id}")
-            else:
-                # Get Instagram Business Account ID from page
-                logger.info(f"Fetching Instagram Business Account for page {page_id}")
-                ig_url = f"https://graph.facebook.com/v22.0/{page_id}?fields=instagram_business_account&access_token={access_token}"
-                ig_resp = await client.get(ig_url)
-                ig_data = ig_resp.json()
-
-                if 'error' in ig_data:
-                    error_msg = ig_data['error'].get('message', 'Unknown error')
-                    logger.error(f"Failed to get Instagram account: {error_msg}")
-                    logger.error(f"Full error response: {ig_data['error']}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Failed to get Instagram account: {error_msg}. Verify that page {page_id} has an Instagram Business account connected."
-                    )
-
-                ig_account = ig_data.get('instagram_business_account')
-                if not ig_account:
-                    logger.error(f"No Instagram Business account connected to page {page_id}")
-                    raise HTTPException(status_code=404, detail=f"No Instagram Business account connected to page {page_id}")
-
-                ig_id = ig_account['id']
-                logger.info(f"Instagram Business Account ID: {ig_id}")
-
-            responses = await _fetch_instagram_data(client, ig_id, access_token)
-        else:
-            responses = await _fetch_facebook_data(client, page_id, access_token)
-
-        # Process responses
-        results = []
-        for i, resp in enumerate(responses):
-            if isinstance(resp, Exception):
-                logger.error(f"Request {i} failed: {str(resp)}")
-                results.append({'error': str(resp)})
-            elif resp.status_code == 200:
-                results.append(resp.json())
-            else:
-                logger.error(f"API Error {resp.status_code}: {resp.text}")
-                results.append({'error': f"HTTP {resp.status_code}"})
-
-        # Instagram returns 5 responses (with total_value metrics), Facebook returns 4
-        if platform == 'instagram':
-            followers_data, insights_data, insights_total_data, demo_data, posts_data = results
-        else:
-            followers_data, insights_data, demo_data, posts_data = results
-            insights_total_data = {'data': []}
-
-        # Build response with REAL data only
-        response_data = {
-            "platform": platform,
-            "page_id": page_id,
-            "data_source": "live_meta_api",
-            "fetched_at": datetime.now().isoformat()
-        }
+    # Fetch data based on platform
+    if platform == 'instagram':
+        # Use provided instagram_id or fetch from page
+        account_id = instagram_id or await _resolve_instagram_id(access_token, page_id)
+    else:
+        account_id = page_id
 
-        # 1. Followers
-        if 'error' not in followers_data:
-            response_data["page_followers"] = {
-                "value": followers_data.get('followers_count', 0),
-                "change": 0  # Would need historical data to calculate
-            }
-        else:
-            response_data["page_followers"] = {"value": 0, "change": 0}
+    # Lifetime demographics change daily: once today's snapshot is stored it is read instead of fetched
+    stored_demo = await asyncio.to_thread(_stored_demographics, platform, account_id)
 
-        # 2. Top Posts
-        if platform == 'instagram':
-            live_posts = _parse_instagram_posts(posts_data)
+    if platform == 'instagram':
+        responses = await _fetch_instagram_data(account_id, access_token, include_demographics=stored_demo is None)
+    else:
+        responses = await _fetch_facebook_data(account_id, access_token, include_demographics=stored_demo is None)
+
+    # Process responses
+    results = []
+    for i, resp in enumerate(responses):
+        if isinstance(resp, Exception):
+            logger.error(f"Request {i} failed: {str(resp)}")
+            results.append({'error': str(resp)})
+        elif 'error' in resp:
+            logger.error(f"API Error: {resp['error']}")
+            results.append({'error': resp['error'].get('message', 'Unknown error') if isinstance(resp['error'], dict) else str(resp['error'])})
         else:
-            live_posts = _parse_facebook_posts(posts_data)
-
-        response_data["top_posts"] = live_posts
-        response_data["number_of_posts"] = {"value": len(live_posts), "change": 0}
-
-        # Calculate engagements from posts
-        total_reactions = sum(p["reactions"] for p in live_posts)
-        total_comments = sum(p["comments"] for p in live_posts)
-        total_shares = sum(p["shares"] for p in live_posts)
-        total_engagements = total_reactions + total_comments + total_shares
-
-        response_data["total_reactions"] = {"value": total_reactions, "change": 0}
-        response_data["engagements"] = {"value": total_engagements, "change": 0}
-        response_data["actions_split"] = {
-            "reactions": total_reactions,
-            "comments": total_comments,
-            "shares": total_shares
+            results.append(resp)
+
+    # Instagram returns 5 responses (with total_value metrics), Facebook returns 4
+    if platform == 'instagram':
+        followers_data, insights_data, insights_total_data, demo_data, posts_data = results
+    else:
+        followers_data, insights_data, demo_data, posts_data = results
+        insights_total_data = {'data': []}
+
+    # Build response with REAL data only
+    response_data = {
+        "platform": platform,
+        "page_id": page_id,
+        "data_source": "live_meta_api",
+        "fetched_at": datetime.now().isoformat()
+    }
+
+    # 1. Followers
+    if 'error' not in followers_data:
+        response_data["page_followers"] = {
+            "value": followers_data.get('followers_count', 0),
+            "change": 0  # Would need historical data to calculate
         }
+    else:
+        response_data["page_followers"] = {"value": 0, "change": 0}
 
-        # 3. Insights metrics
-        if 'error' not in insights_data and 'data' in insights_data:
-            metrics = {}
-            for m in insights_data['data']:
+    # 2. Top Posts
+    if platform == 'instagram':
+        live_posts = _parse_instagram_posts(posts_data)
+    else:
+        live_posts = _parse_facebook_posts(posts_data)
+
+    response_data["top_posts"] = live_posts
+    response_data["number_of_posts"] = {"value": len(live_posts), "change": 0}
+
+    # Calculate engagements from posts
+    total_reactions = sum(p["reactions"] for p in live_posts)
+    total_comments = sum(p["comments"] for p in live_posts)
+    total_shares = sum(p["shares"] for p in live_posts)
+    total_engagements = total_reactions + total_comments + total_shares
+
+    response_data["total_reactions"] = {"value": total_reactions, "change": 0}
+    response_data["engagements"] = {"value": total_engagements, "change": 0}
+    response_data["actions_split"] = {
+        "reactions": total_reactions,
+        "comments": total_comments,
+        "shares": total_shares
+    }
+
+    # 3. Insights metrics
+    if 'error' not in insights_data and 'data' in insights_data:
+        metrics = {}
+        for m in insights_data['data']:
+            if 'values' in m and m['values']:
+                metrics[m['name']] = m['values'][0].get('value', 0)
+        
+        # Merge total_value metrics (profile_views, accounts_engaged)
+        if 'error' not in insights_total_data and 'data' in insights_total_data:
+            for m in insights_total_data['data']:
                 if 'values' in m and m['values']:
                     metrics[m['name']] = m['values'][0].get('value', 0)
-            
-            # Merge total_value metrics (profile_views, accounts_engaged)
-            if 'error' not in insights_total_data and 'data' in insights_total_data:
-                for m in insights_total_data['data']:
-                    if 'values' in m and m['values']:
-                        metrics[m['name']] = m['values'][0].get('value', 0)
-
-            if platform == 'facebook':
-                response_data["organic_impressions"] = {
-                    "value": metrics.get('page_impressions', 0),
-                    "change": 0
-                }
-                response_data["organic_video_views"] = {
-                    "value": metrics.get('page_video_views', 0),
-                    "change": 0
-                }
-            else:
-                # Instagram: use 'reach' instead of 'impressions'
-                # Instagram API doesn't provide 'impressions' metric directly
-                response_data["organic_impressions"] = {
-                    "value": metrics.get('reach', 0),
-                    "change": 0
-                }
-                response_data["organic_video_views"] = {
-                    "value": 0,  # Instagram video views come from posts
-                    "change": 0
-                }
-                # Additional Instagram metrics from total_value endpoint
-                response_data["profile_views"] = {
-                    "value": metrics.get('profile_views', 0),
-                    "change": 0
-                }
-                response_data["accounts_engaged"] = {
-                    "value": metrics.get('accounts_engaged', 0),
-                    "change": 0
-                }
-
-        # 4. Demographics
-        if 'error' not in demo_data:
-            live_demo = _parse_demographics(demo_data, platform)
-            response_data["demographics"] = live_demo
+
+        if platform == 'facebook':
+            response_data["organic_impressions"] = {
+                "value": metrics.get('page_impressions', 0),
+                "change": 0
+            }
+            response_data["organic_video_views"] = {
+                "value": metrics.get('page_video_views', 0),
+                "change": 0
+            }
         else:
-            response_data["demographics"] = {
-                "age": [],
-                "top_country": "N/A",
-                "top_cities": [],
-                "top_city": "N/A",
-                "top_language": "PT-BR",
-                "top_audience": "N/A",
-                "top_age_group": "N/A",
-                "countries_data": [],
-                "cities_data": [],
-                "cities_by_gender": [],
-                "cities_by_age": []
+            # Instagram: use 'reach' instead of 'impressions'
+            # Instagram API doesn't provide 'impressions' metric directly
+            response_data["organic_impressions"] = {
+                "value": metrics.get('reach', 0),
+                "change": 0
+            }
+            response_data["organic_video_views"] = {
+                "value": 0,  # Instagram video views come from posts
+                "change": 0
+            }
+            # Additional Instagram metrics from total_value endpoint
+            response_data["profile_views"] = {
+                "value": metrics.get('profile_views', 0),
+                "change": 0
+            }
+            response_data["accounts_engaged"] = {
+                "value": metrics.get('accounts_engaged', 0),
+                "change": 0
             }
 
-        # 5. Reactions by type (from posts)
-        response_data["reactions_by_type"] = {
-            "photo": int(total_reactions * 0.4),
-            "album": int(total_reactions * 0.3),
-            "video_inline": int(total_reactions * 0.25),
-            "video": int(total_reactions * 0.05)
-        }
+    # 4. Demographics
+    if stored_demo is not None:
+        response_data["demographics"] = stored_demo
+    elif 'error' not in demo_data:
+        try:
+            live_demo = await asyncio.to_thread(_ingest_demographics, platform, account_id, demo_data)
+        except Exception as e:
+            logger.error(f"Failed to store demographics snapshot: {e}")
+            live_demo = _parse_demographics(demo_data, platform)
+        response_data["demographics"] = live_demo
+    else:
+        response_data["demographics"] = empty_demographics()
+
+    # 5. Reactions by type (from posts)
+    response_data["reactions_by_type"] = {
+        "photo": int(total_reactions * 0.4),
+        "album": int(total_reactions * 0.3),
+        "video_inline": int(total_reactions * 0.25),
+        "video": int(total_reactions * 0.05)
+    }
 
-        logger.info(f"Successfully fetched live {platform} data: {len(live_posts)} posts, {response_data['page_followers']['value']} followers")
-        return response_data
+    logger.info(f"Successfully fetched live {platform} data: {len(live_posts)} posts, {response_data['page_followers']['value']} followers")
+    return response_data
 
 
 from datetime import datetime
@@ -653,12 +608,43 @@ from datetime import datetime
 # Main endpoint
 # ---------------------------------------------------------------------------
 
+def _refresh_insights(cache_key: str, platform: str, period: str, page_id: str, instagram_id: str = None) -> asyncio.Task:
+    """
+    Fetches live data for a cache key and stores it. Concurrent callers for
+    the same key share one in-flight fetch.
+    """
+    task = _refreshing.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_fetch_and_store(cache_key, platform, period, page_id, instagram_id))
+        _refreshing[cache_key] = task
+        task.add_done_callback(lambda done: _refresh_done(cache_key, done))
+    return task
+
+
+async def _fetch_and_store(cache_key: str, platform: str, period: str, page_id: str, instagram_id: str = None):
+    data = await _fetch_live_data(platform, period, page_id, instagram_id)
+    _insights_cache.set(cache_key, {"cached_at": time.time(), "payload": data})
+    return data
+
+
+def _refresh_done(cache_key: str, task: asyncio.Task) -> None:
+    _refreshing.pop(cache_key, None)
+    if not task.cancelled() and task.exception() is not None:
+        # Background refreshes have no caller; the stale payload stays served
+        logger.warning(f"Insights refresh failed for {cache_key}: {task.exception()}")
+
+
+def _with_cache_status(payload: dict, status: str, age_seconds: float) -> dict:
+    return {**payload, "cache": {"status": status, "age_seconds": round(age_seconds, 1)}}
+
+
 @router.get("/insights")
 async def get_insights(
     platform: str = Query("facebook", description="facebook or instagram"),
     period: str = Query("30d", description="Period filter: 7d, 14d, 30d, 90d"),
     page_id: str = Query(None, description="Facebook Page ID (optional, uses env FACEBOOK_PAGE_ID if not provided)"),
     instagram_id: str = Query(None, description="Instagram Business Account ID (optional, auto-detected from page_id)"),
+    refresh: bool = Query(False, description="Skip the response cache and wait for live data"),
 ):
     """
     Returns REAL insights data from Meta Graph API.
@@ -670,26 +656,42 @@ async def get_insights(
     - period: "7d", "14d", "30d", "90d"
     - page_id: (Optional) Facebook Page ID to fetch insights for
     - instagram_id: (Optional) Instagram Business Account ID
+    - refresh: (Optional) bypass the response cache
     
     If page_id is not provided, uses FACEBOOK_PAGE_ID from .env
     
+    Responses may come from the cache: `fetched_at` is when the data was read
+    from Meta and `cache.status` is "live", "fresh" or "stale" (stale payloads
+    are refreshed in the background).
+    
     If the API fails, returns an error (not fake data).
     """
     platform = platform.lower().strip()
     if platform not in ("facebook", "instagram"):
         platform = "facebook"
 
-    # Use provided page_id or fallback to env
-    if page_id:
-        logger.info(f"Using provided page_id: {page_id}")
-    else:
-        page_id = os.getenv("FACEBOOK_PAGE_ID")
-        logger.info(f"Using FACEBOOK_PAGE_ID from env: {page_id}")
+    access_token = os.getenv("FACEBOOK_ACCESS_TOKEN")
+    if not access_token:
+        logger.error("FACEBOOK_ACCESS_TOKEN not configured in .env")
+        raise HTTPException(status_code=503, detail="Facebook Access Token not configured")
 
     # Fetch LIVE data only - NO FALLBACK
     try:
-        live_data = await _fetch_live_data(platform, period, page_id, instagram_id)
-        return live_data
+        page_id = await _resolve_page_id(access_token, page_id)
+        if platform == "instagram":
+            instagram_id = instagram_id or await _resolve_instagram_id(access_token, page_id)
+        cache_key = f"{platform}:{instagram_id if platform == 'instagram' else page_id}:{period}"
+
+        entry = None if refresh else _insights_cache.get(cache_key)
+        if entry:
+            age = time.time() - entry["cached_at"]
+            if age < INSIGHTS_FRESH_SEC:
+                return _with_cache_status(entry["payload"], "fresh", age)
+            _refresh_insights(cache_key, platform, period, page_id, instagram_id)
+            return _with_cache_status(entry["payload"], "stale", age)
+
+        live_data = await asyncio.shield(_refresh_insights(cache_key, platform, period, page_id, instagram_id))
+        return _with_cache_status(live_data, "live", 0)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,8 +1,13 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.core.database import get_db
-from app.models.agent import AgentSettings, AgentMode, Recommendation, AutonomousAction
+from app.models.agent import AgentSettings, AgentMode, Recommendation, AutonomousAction, AgentAccountRun
+from app.models import heatmap as heatmap_models  # noqa: F401  (registers heatmap tables)
+from app.models import creative as creative_models  # noqa: F401  (registers creative_analyses, creative_index_state)
 from app.services.intelligence import intelligence_service
 from app.services.meta_ads import meta_ads_service
 from pydantic import BaseModel
@@ -124,6 +129,14 @@ def dismiss_recommendation(recommendation_id: int, db: Session = Depends(get_db)
 def get_history(db: Session = Depends(get_db)):
     return db.query(AutonomousAction).order_by(AutonomousAction.created_at.desc()).limit(20).all()
 
+@router.get("/runs")
+def get_runs(ad_account_id: Optional[str] = None, limit: int = 50, db: Session = Depends(get_db)):
+    """Recent Strategist runs per ad account, with their durations."""
+    query = db.query(AgentAccountRun)
+    if ad_account_id:
+        query = query.filter(AgentAccountRun.ad_account_id == ad_account_id)
+    return query.order_by(AgentAccountRun.created_at.desc(), AgentAccountRun.id.desc()).limit(min(limit, 500)).all()
+
 @router.post("/trigger-analysis")
 async def trigger_analysis(db: Session = Depends(get_db)):
     """Manually trigger the agent to analyze right now."""
@@ -206,3 +219,216 @@ async def generate_agentic_audience(req: AudienceAnalysisRequest):
         
     return result
 
+
+def _sse_response(events) -> StreamingResponse:
+    """Wraps an assistant event stream as Server-Sent Events."""
+    from app.services.ai_engine.streaming import format_sse
+
+    async def body():
+        try:
+            async for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"detail": str(e)})
+        yield format_sse("done", {})
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/agent-audience/stream")
+async def stream_agentic_audience(req: AudienceAnalysisRequest):
+    """
+    Streaming version of /agent-audience: emits `tag` events as the model
+    writes them, then a `result` event with the final payload.
+    """
+    from app.services.ai_engine.ai_assistant import BiaAIAssistant
+
+    agent = BiaAIAssistant()
+    return _sse_response(agent.stream_tags(
+        product_description=req.product_description,
+        platform=req.platform,
+        objective=req.objective,
+        tag_type=req.tag_type,
+        limit=req.limit,
+        ticket=req.ticket,
+        investment=req.investment,
+        location=req.location,
+        meta_research_required=True,
+        suggestion_mode="balanced"
+    ))
+
+
+class StrategyRequest(BaseModel):
+    briefing: dict
+    channel: str = "meta"
+
+@router.post("/agent-strategy/stream")
+async def stream_agent_strategy(req: StrategyRequest):
+    """
+    Streams campaign strategy generation: `section` events for each completed
+    top-level field of the strategy, then a `result` event.
+    """
+    from app.services.ai_engine.ai_assistant import BiaAIAssistant
+
+    agent = BiaAIAssistant()
+    return _sse_response(agent.stream_campaign_strategy(req.briefing, req.channel))
+
+
+@router.get("/agent-stream-metrics")
+async def get_agent_stream_metrics():
+    """Time-to-first-token and stream duration (ms) for recent AI streams."""
+    from app.services.ai_engine.streaming import stream_metrics
+    return stream_metrics.snapshot()
+
+
+@router.get("/opportunity-grid")
+async def get_opportunity_grid(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    cell_km: float = 1.0,
+    strategy: str = "blue_ocean",
+    city_id: str = None,
+):
+    """
+    Opportunity scores for a grid over a bounding box (census + heuristics),
+    computed in one vectorized pass instead of one estimate per point.
+    """
+    from app.services.ai_engine.opportunity_grid import score_bbox_grid
+
+    result = score_bbox_grid(min_lat, min_lng, max_lat, max_lng, cell_km=cell_km, strategy=strategy, city_id=city_id)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+class HeatmapBuildRequest(BaseModel):
+    resolution: int = 8
+    strategy: str = "blue_ocean"
+    competitors: Optional[List[Tuple[float, float]]] = None  # (lat, lng) of competitor locations
+
+
+@router.post("/heatmap/{city_id}/build")
+async def build_heatmap(city_id: str, req: HeatmapBuildRequest, db: Session = Depends(get_db)):
+    """
+    Scores the city's H3 cells and stores them as tiles. Incremental: only
+    cells whose inputs changed are rewritten (and only their tiles get a new ETag).
+    """
+    import asyncio
+    from app.services.ai_engine import census_client
+    from app.services.heatmap import heatmap_service
+
+    if await census_client.load_city_index(city_id) is None:
+        raise HTTPException(status_code=404, detail=f"No census data for city {city_id}.")
+    try:
+        result = await asyncio.to_thread(
+            heatmap_service.build_city, db, city_id, req.resolution, req.strategy, req.competitors
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@router.get("/heatmap/{city_id}/tiles")
+def list_heatmap_tiles(city_id: str, strategy: str = "blue_ocean", resolution: int = 8, db: Session = Depends(get_db)):
+    """Tile ids of a city heatmap with their ETags (clients refetch only changed tiles)."""
+    from app.services.heatmap import heatmap_service
+    return {"city_id": city_id, "tiles": heatmap_service.list_tiles(db, city_id, strategy, resolution)}
+
+
+@router.get("/heatmap/{city_id}/tiles/{tile_id}")
+def get_heatmap_tile(
+    city_id: str,
+    tile_id: str,
+    request: Request,
+    response: Response,
+    strategy: str = "blue_ocean",
+    resolution: int = 8,
+    db: Session = Depends(get_db),
+):
+    """Scored cells of one heatmap tile. Honors If-None-Match with 304."""
+    from app.services.heatmap import heatmap_service
+
+    etag = heatmap_service.get_tile_etag(db, city_id, tile_id, strategy, resolution)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Tile not found.")
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "public, max-age=300, must-revalidate"}
+    if request.headers.get("if-none-match", "").strip('"') == etag:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return heatmap_service.get_tile(db, city_id, tile_id, strategy, resolution)
+
+
+class CreativeAnalysisRequest(BaseModel):
+    image_urls: List[str]
+    background: bool = False
+
+
+@router.post("/creative-analysis")
+async def analyze_creatives(req: CreativeAnalysisRequest):
+    """
+    Vision analysis (objects, colors, brightness, text density) for a batch of
+    creatives. With `background`, the batch is queued to the Celery worker.
+    """
+    if req.background:
+        from app.worker import analyze_creatives as analyze_creatives_task
+        task = analyze_creatives_task.delay(req.image_urls)
+        return {"status": "queued", "task_id": task.id}
+
+    from app.services.creative_ai import creative_intelligence_service
+    return await creative_intelligence_service.analyze_creatives(req.image_urls)
+
+
+@router.post("/creative-index")
+def index_account_creatives(ad_account_id: str = None, db: Session = Depends(get_db)):
+    """
+    Queues the (resumable) job that embeds an account's creatives for semantic search.
+    """
+    from app.models.creative import CreativeIndexState
+    from app.worker import index_creatives as index_creatives_task
+
+    task = index_creatives_task.delay(ad_account_id)
+    account = ad_account_id or meta_ads_service.ad_account_id
+    state = None
+    if account:
+        account = account if account.startswith("act_") else f"act_{account}"
+        state = db.query(CreativeIndexState).filter(CreativeIndexState.ad_account_id == account).first()
+    return {
+        "status": "queued",
+        "task_id": task.id,
+        "resuming_from": state.cursor if state and state.status in ("running", "error") else None,
+    }
+
+
+@router.get("/creative-search")
+def search_creatives(
+    q: str,
+    k: int = 5,
+    ad_account_id: str = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    min_ctr: float = None,
+    min_roas: float = None,
+    min_spend: float = None,
+):
+    """Semantic creative search, pre-filtered by account, creation date and performance."""
+    from app.services.creative_search import creative_search_service
+
+    return creative_search_service.search_creatives(
+        q,
+        k=k,
+        ad_account_id=ad_account_id,
+        date_from=date_from,
+        date_to=date_to,
+        min_ctr=min_ctr,
+        min_roas=min_roas,
+        min_spend=min_spend,
+    )
@@ -92,6 +92,58 @@ def get_system_status(db: Session = Depends(get_db)):
     return status
 
 
+@router.get("/meta-rate-limits")
+def get_meta_rate_limits():
+    """
+    Returns current Meta Graph API quota utilization (app, ad account and
+    business use case) as tracked by the request scheduler.
+    """
+    from app.services.meta_engine.rate_limiter import rate_limiter
+    return rate_limiter.get_metrics()
+
+
+@router.get("/meta-cache")
+def get_meta_cache():
+    """
+    Returns hit/miss/coalescing counters of the Graph API response cache.
+    """
+    from app.services.meta_engine.response_cache import response_cache
+    return response_cache.get_metrics()
+
+
+@router.get("/cache-metrics")
+def get_cache_metrics():
+    """
+    Returns hit/miss/stampede counters for the shared AI caches (tags,
+    Meta evidence, strategy).
+    """
+    from app.core.cache import get_cache_metrics as collect_cache_metrics
+    return collect_cache_metrics()
+
+
+@router.get("/warmup")
+def get_warmup_status():
+    """
+    Load state of the lazily initialized AI services (vision, creative_search,
+    strategist, interactions): cold until first use or warm-up.
+    """
+    from app.core.lazy import get_warmup_status as collect_warmup_status
+    return collect_warmup_status()
+
+
+@router.post("/warmup")
+async def warmup_services(services: Optional[str] = None):
+    """
+    Loads AI models now instead of on the first request.
+    `services` is a comma-separated subset; all services when omitted.
+    """
+    import asyncio
+    from app.core.lazy import warm_up
+
+    names = [name.strip() for name in services.split(",") if name.strip()] if services else None
+    return await asyncio.to_thread(warm_up, names)
+
+
 from typing import Optional
 from pydantic import BaseModel
 
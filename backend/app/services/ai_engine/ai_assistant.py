@@ -5,15 +5,19 @@ import asyncio
 import re
 import time
 import hashlib
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Callable, AsyncIterator
 from types import SimpleNamespace
 import aiohttp
 from openai import AsyncOpenAI  # Standard client for OpenRouter/DeepSeek/Ollama
 try:
     from app.services.meta_engine.targeting import search_interests, search_behaviors, search_demographics
+    from app.core.cache import get_cache
+    from app.services.ai_engine.streaming import PartialJSONScanner, StreamTimer, stream_metrics
 except Exception:
     # Compatibility when imported via backend.app.services.ai_assistant in tests
     from backend.app.services.meta_engine.targeting import search_interests, search_behaviors, search_demographics
+    from backend.app.core.cache import get_cache
+    from backend.app.services.ai_engine.streaming import PartialJSONScanner, StreamTimer, stream_metrics
 
 logger = logging.getLogger("BIA_AI")
 
@@ -85,9 +89,11 @@ class BiaAIAssistant:
         self.strategy_timeout_sec = float(os.getenv("BIA_STRATEGY_TIMEOUT_SEC", "40"))
         self.strategy_max_tokens = int(os.getenv("BIA_STRATEGY_MAX_TOKENS", "1400"))
         self.strategy_cache_ttl_sec = int(os.getenv("BIA_STRATEGY_CACHE_TTL_SEC", "300"))
-        self._tags_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-        self._meta_evidence_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
-        self._strategy_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        # Shared across uvicorn workers and Celery when Redis is available
+        self._tags_cache = get_cache("ai_tags", self.tags_cache_ttl_sec)
+        self._meta_evidence_cache = get_cache("ai_meta_evidence", self.meta_cache_ttl_sec)
+        self._strategy_cache = get_cache("ai_strategy", self.strategy_cache_ttl_sec)
+        self._stream_metrics = stream_metrics
 
     async def _generate_content(
         self,
@@ -95,11 +101,14 @@ class BiaAIAssistant:
         system_instruction: str = None,
         timeout_seconds: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> Tuple[Any, str]:
         """
         Generic generator using OpenAI-compatible Chat Completions API.
         Works for DeepSeek, Llama, Ollama, etc.
+        When `on_delta` is given the completion is streamed and every text delta
+        is passed to it; the full response is still returned at the end.
         """
         if self.provider == "qwen-agent" and self.qwen_agent_url:
             response = await self._generate_content_qwen_agent(
@@ -107,7 +116,8 @@ class BiaAIAssistant:
                 system_instruction,
                 timeout_seconds=timeout_seconds,
                 max_tokens=max_tokens,
-                temperature=temperature
+                temperature=temperature,
+                on_delta=on_delta
             )
             return response, self.model
 
@@ -132,6 +142,13 @@ class BiaAIAssistant:
                     "X-Title": "BiaGeo"
                 }
 
+            if on_delta is not None:
+                content = await asyncio.wait_for(
+                    self._stream_chat_completion(messages, temperature, max_tokens, extra_headers, on_delta),
+                    timeout=timeout_seconds
+                )
+                return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))]), self.model
+
             response = await asyncio.wait_for(
                 self.client.chat.completions.create(
                     model=self.model,
@@ -148,19 +165,56 @@ class BiaAIAssistant:
             logger.error(f"AI Model '{self.model}' failed: {exc}")
             raise exc
 
+    async def _stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        extra_headers: Dict[str, str],
+        on_delta: Callable[[str], None]
+    ) -> str:
+        timer = StreamTimer(self._stream_metrics)
+        parts: List[str] = []
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                extra_headers=extra_headers,
+                stream=True
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta:
+                    timer.token()
+                    parts.append(delta)
+                    on_delta(delta)
+        except BaseException:
+            self._stream_metrics.record_failure()
+            raise
+        timer.finish()
+        logger.info(f"AI stream finished: ttft={timer.ttft_ms or 0:.0f}ms, chars={sum(len(p) for p in parts)}")
+        return "".join(parts)
+
     async def _generate_content_qwen_agent(
         self,
         prompt: str,
         system_instruction: str = None,
         timeout_seconds: Optional[float] = None,
         max_tokens: Optional[int] = None,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> Any:
         """
         Qwen-Agent HTTP adapter.
         Supports two modes:
         - openai: sends OpenAI-compatible payload
         - query: sends {query, system, model}
+        With `on_delta`, OpenAI mode requests an SSE stream; servers that answer
+        with a plain JSON body are handled as a single delta.
         """
         if not self.qwen_agent_url:
             # Try auto-discovery on localhost
@@ -192,16 +246,26 @@ class BiaAIAssistant:
                 "temperature": temperature,
                 "max_tokens": max_tokens
             }
+            if on_delta is not None:
+                payload["stream"] = True
 
         headers = {}
         if self.api_key:
             headers["Authorization"] = f"Bearer {self.api_key}"
 
+        timer = StreamTimer(self._stream_metrics) if on_delta is not None else None
         async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout_seconds)) as session:
             async with session.post(self.qwen_agent_url, json=payload, headers=headers) as resp:
-                text = await resp.text()
                 if resp.status >= 400:
+                    text = await resp.text()
+                    if timer:
+                        self._stream_metrics.record_failure()
                     raise ValueError(f"Qwen-Agent error {resp.status}: {text[:200]}")
+                if timer and resp.content_type == "text/event-stream":
+                    content = await self._read_qwen_agent_stream(resp, timer, on_delta)
+                    timer.finish()
+                    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+                text = await resp.text()
                 try:
                     data = json.loads(text)
                 except Exception:
@@ -219,8 +283,40 @@ class BiaAIAssistant:
         if not content:
             content = str(data)
 
+        if timer:
+            timer.token()
+            on_delta(content)
+            timer.finish()
         return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
 
+    @staticmethod
+    async def _read_qwen_agent_stream(resp: Any, timer: StreamTimer, on_delta: Callable[[str], None]) -> str:
+        """Collect an OpenAI-style SSE stream (`data: {...}` lines, `data: [DONE]`)."""
+        parts: List[str] = []
+        async for raw_line in resp.content:
+            line = raw_line.decode("utf-8", errors="ignore").strip()
+            if not line.startswith("data:"):
+                continue
+            body = line[5:].strip()
+            if body == "[DONE]":
+                break
+            try:
+                chunk = json.loads(body)
+            except Exception:
+                continue
+            delta = ""
+            if isinstance(chunk, dict):
+                choices = chunk.get("choices") or []
+                if choices:
+                    delta = (choices[0].get("delta") or {}).get("content") or ""
+                else:
+                    delta = chunk.get("output") or chunk.get("text") or ""
+            if delta:
+                timer.token()
+                parts.append(delta)
+                on_delta(delta)
+        return "".join(parts)
+
     async def _discover_qwen_agent_url(self) -> Optional[str]:
         timeout_seconds = int(os.getenv("BIA_AI_TIMEOUT_SEC", "6"))
         headers = {}
@@ -279,35 +375,6 @@ class BiaAIAssistant:
         serialized = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
         return hashlib.sha1(serialized.encode("utf-8")).hexdigest()
 
-    def _cache_get(self, cache: Dict[str, Tuple[float, Dict[str, Any]]], key: str) -> Optional[Dict[str, Any]]:
-        now = time.time()
-        item = cache.get(key)
-        if not item:
-            return None
-        expires_at, value = item
-        if expires_at < now:
-            cache.pop(key, None)
-            return None
-        try:
-            return json.loads(json.dumps(value, ensure_ascii=False))
-        except Exception:
-            return value
-
-    def _cache_set(
-        self,
-        cache: Dict[str, Tuple[float, Dict[str, Any]]],
-        key: str,
-        value: Dict[str, Any],
-        ttl_seconds: int,
-        max_entries: int = 256
-    ) -> None:
-        if len(cache) >= max_entries:
-            # Drop oldest entries first
-            oldest_keys = sorted(cache.items(), key=lambda item: item[1][0])[: max(1, len(cache) - max_entries + 1)]
-            for stale_key, _ in oldest_keys:
-                cache.pop(stale_key, None)
-        cache[key] = (time.time() + ttl_seconds, value)
-
     def _should_refine_tag_output(self, data: Dict[str, Any], requested_limit: int) -> bool:
         if not isinstance(data, dict):
             return True
@@ -351,7 +418,8 @@ class BiaAIAssistant:
         purchasing_power_primary: Optional[str] = "auto",
         purchasing_power_secondary: Optional[str] = None,
         suggestion_mode: str = "balanced",
-        refinement_filters: Optional[Dict[str, Any]] = None
+        refinement_filters: Optional[Dict[str, Any]] = None,
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> Dict[str, Any]:
         filters = refinement_filters if isinstance(refinement_filters, dict) else {}
         filters = dict(filters)
@@ -405,8 +473,8 @@ class BiaAIAssistant:
             "suggestion_mode": suggestion_mode,
             "refinement_filters": filters
         })
-        cached_tags_response = self._cache_get(self._tags_cache, tags_cache_key)
-        if cached_tags_response:
+        cached_tags_response = await self._tags_cache.get_or_acquire(tags_cache_key)
+        if cached_tags_response is not None:
             return cached_tags_response
 
         try:
@@ -520,7 +588,8 @@ class BiaAIAssistant:
                     system_instruction,
                     timeout_seconds=stage_timeout(self.tags_synthesis_timeout_sec),
                     max_tokens=self.tags_synthesis_max_tokens,
-                    temperature=0.55
+                    temperature=0.55,
+                    on_delta=on_delta
                 )
 
                 # Extract, clean and parse JSON
@@ -652,7 +721,7 @@ class BiaAIAssistant:
                 }
             }
 
-            self._cache_set(self._tags_cache, tags_cache_key, result_payload, self.tags_cache_ttl_sec)
+            self._tags_cache.set(tags_cache_key, result_payload, self.tags_cache_ttl_sec)
             return result_payload
 
         except Exception as e:
@@ -667,6 +736,8 @@ class BiaAIAssistant:
                 suggestion_mode=suggestion_mode,
                 refinement_filters=filters
             )
+        finally:
+            self._tags_cache.release(tags_cache_key)
 
     def _clean_ai_response(self, content: str) -> str:
         """
@@ -904,10 +975,24 @@ class BiaAIAssistant:
             "meta_seed_tags": meta_seed_tags or [],
             "queries": queries[:5]
         })
-        cached_evidence = self._cache_get(self._meta_evidence_cache, evidence_cache_key)
-        if cached_evidence:
+        cached_evidence = await self._meta_evidence_cache.get_or_acquire(evidence_cache_key)
+        if cached_evidence is not None:
             return cached_evidence
 
+        try:
+            evidence_payload = await self._search_meta_mcp_evidence(queries, tag_type, search_limit, request_timeout)
+            self._meta_evidence_cache.set(evidence_cache_key, evidence_payload, self.meta_cache_ttl_sec)
+            return evidence_payload
+        finally:
+            self._meta_evidence_cache.release(evidence_cache_key)
+
+    async def _search_meta_mcp_evidence(
+        self,
+        queries: List[str],
+        tag_type: str,
+        search_limit: int,
+        request_timeout: float
+    ) -> Dict[str, Any]:
         tag_type_lower = (tag_type or "").lower()
         wants_behaviors = "behavior" in tag_type_lower
         wants_demographics = "demograph" in tag_type_lower
@@ -954,15 +1039,13 @@ class BiaAIAssistant:
             by_type.setdefault(source_type, []).append(str(row.get("name")))
 
         top_names = [str(row.get("name")) for row in merged if str(row.get("name") or "").strip()][:60]
-        evidence_payload = {
+        return {
             "records_count": len(merged),
             "queries_used": queries[:5],
             "top_names": top_names,
             "by_type": by_type,
             "errors": errors
         }
-        self._cache_set(self._meta_evidence_cache, evidence_cache_key, evidence_payload, self.meta_cache_ttl_sec)
-        return evidence_payload
 
     def _fallback_from_meta_evidence(self, meta_mcp_evidence: Dict[str, Any], tag_type: str, limit: int) -> List[str]:
         if not isinstance(meta_mcp_evidence, dict):
@@ -1928,7 +2011,12 @@ class BiaAIAssistant:
             "reasoning": "AI Service Unavailable - Using Backup"
         }
 
-    async def generate_campaign_strategy(self, briefing: Dict[str, Any], channel: str) -> Dict[str, Any]:
+    async def generate_campaign_strategy(
+        self,
+        briefing: Dict[str, Any],
+        channel: str,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
         """
         Generates a comprehensive campaign strategy analysis.
         Returns JSON with:
@@ -1965,8 +2053,8 @@ class BiaAIAssistant:
                 "marketContext": briefing.get("market_context"),
             },
         })
-        cached_strategy = self._cache_get(self._strategy_cache, strategy_cache_key)
-        if cached_strategy:
+        cached_strategy = await self._strategy_cache.get_or_acquire(strategy_cache_key)
+        if cached_strategy is not None:
             cached = dict(cached_strategy)
             cached["mode"] = "cache"
             cached["source"] = cached.get("source") or "strategy_cache"
@@ -2102,7 +2190,8 @@ class BiaAIAssistant:
                 prompt,
                 system_instruction,
                 timeout_seconds=self.strategy_timeout_sec,
-                max_tokens=self.strategy_max_tokens
+                max_tokens=self.strategy_max_tokens,
+                on_delta=on_delta
             )
             content = self._clean_ai_response(response.choices[0].message.content)
             data = json.loads(content)
@@ -2121,12 +2210,74 @@ class BiaAIAssistant:
                     "meta_mcp_errors": (strategy_meta_mcp_evidence.get("errors") or [])[:5] if isinstance(strategy_meta_mcp_evidence, dict) else []
                 }
             }
-            self._cache_set(self._strategy_cache, strategy_cache_key, strategy_payload, self.strategy_cache_ttl_sec)
+            self._strategy_cache.set(strategy_cache_key, strategy_payload, self.strategy_cache_ttl_sec)
             return strategy_payload
 
         except Exception as e:
             logger.error(f"Strategy Generation failed: {e}")
             return self._mock_strategy_fallback(briefing, channel)
+        finally:
+            self._strategy_cache.release(strategy_cache_key)
+
+    async def stream_tags(self, **kwargs) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `generate_tags`.
+
+        Yields ("tag", value) for each tag as soon as the synthesis model has
+        written it, then ("result", payload) with the final, post-processed
+        response (which stays authoritative: refinement may reorder or replace tags).
+        """
+        scanner = PartialJSONScanner(list_key="tags")
+        events = self._stream_generation(
+            lambda on_delta: self.generate_tags(**kwargs, on_delta=on_delta),
+            scanner,
+            lambda key, value: ("tag", value) if key == "tags[]" else None
+        )
+        async for event in events:
+            yield event
+
+    async def stream_campaign_strategy(self, briefing: Dict[str, Any], channel: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of `generate_campaign_strategy`.
+
+        Yields ("section", {"key", "value"}) for each top-level field of the
+        strategy JSON as it completes, then ("result", payload).
+        """
+        scanner = PartialJSONScanner()
+        events = self._stream_generation(
+            lambda on_delta: self.generate_campaign_strategy(briefing, channel, on_delta=on_delta),
+            scanner,
+            lambda key, value: ("section", {"key": key, "value": value})
+        )
+        async for event in events:
+            yield event
+
+    async def _stream_generation(
+        self,
+        start: Callable[[Callable[[str], None]], Any],
+        scanner: PartialJSONScanner,
+        to_event: Callable[[str, Any], Optional[Tuple[str, Any]]]
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Runs a generation with a delta sink and turns parsed fragments into events."""
+        queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(start(queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while True:
+                delta = await queue.get()
+                if delta is None:
+                    break
+                for key, value in scanner.feed(delta):
+                    event = to_event(key, value)
+                    if event is not None:
+                        yield event
+            yield ("result", task.result())
+        finally:
+            if not task.done():
+                task.cancel()
+
+    def get_stream_metrics(self) -> Dict[str, Any]:
+        return self._stream_metrics.snapshot()
 
     async def orchestrate_multi_agent_strategy(self, briefing: Dict[str, Any], channel: str) -> Dict[str, Any]:
         """
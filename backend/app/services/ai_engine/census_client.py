@@ -4,12 +4,19 @@ import json
 import logging
 import aiohttp
 import asyncio
+from collections import OrderedDict
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
+from .census_index import CensusIndexStore, CityTractIndex
+from .census_store import CensusStore
+
 logger = logging.getLogger("BiaCensusClient")
 logger.setLevel(logging.INFO)
 
+# Cities kept fully loaded in memory (tract lists with geometry are large)
+HOT_CITIES = int(os.getenv("BIA_CENSUS_HOT_CITIES", "8"))
+
 @dataclass
 class CensusTract:
     """Represents a standardized IBGE Census Tract (Setor Censitário)."""
@@ -38,23 +45,45 @@ class CensusClient:
         )
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
-            
+        # Memory-mapped per-city arrays (centroids, bboxes, outlines, grid) for radius queries
+        self.index_store = CensusIndexStore(os.path.join(self.cache_dir, "index"))
+        # Offline Censo 2022 import (ingest_census.py); preferred over the API + heuristics
+        self.store = CensusStore(os.getenv("BIA_CENSUS_DB", os.path.join(self.cache_dir, "censo2022.sqlite")))
+        self._hot_cities: "OrderedDict[str, List[CensusTract]]" = OrderedDict()
+
     async def get_tracts_for_city(self, city_id: str) -> List[CensusTract]:
         """
         Retrieves all census tracts for a given city with their basic geometry and data.
         Strategy: 
-        1. Check local cache (GeoJSON).
-        2. If missing, fetch from IBGE Malha API (geometry).
-        3. Fetch Aggregate Data (Pop + Income) from SIDRA for these tracts.
-        4. Merge and Cache.
+        1. Hot cities already in memory.
+        2. Offline Censo 2022 store (official aggregates, no network).
+        3. Check local cache (GeoJSON).
+        4. If missing, fetch from IBGE Malha API (geometry).
+        5. Fetch Aggregate Data (Pop + Income) from SIDRA for these tracts.
+        6. Merge and Cache.
         """
+        city_id = str(city_id)
+        tracts = self._hot_cities.get(city_id)
+        if tracts is not None:
+            self._hot_cities.move_to_end(city_id)
+            return tracts
+
+        if self.store.has_city(city_id):
+            rows = await asyncio.to_thread(self.store.load_city, city_id)
+            tracts = [CensusTract(**row) for row in rows]
+            self._ensure_index(city_id, tracts)
+            self._remember(city_id, tracts)
+            return tracts
+
         cache_path = os.path.join(self.cache_dir, f"{city_id}_tracts.json")
         
         if os.path.exists(cache_path):
             try:
                 with open(cache_path, "r") as f:
                     data = json.load(f)
-                    return [CensusTract(**item) for item in data]
+                tracts = [CensusTract(**item) for item in data]
+                self._ensure_index(city_id, tracts)
+                return tracts
             except Exception as e:
                 logger.warning(f"Failed to load cache for {city_id}: {e}")
         
@@ -70,9 +99,43 @@ class CensusClient:
                 json.dump([t.__dict__ for t in tracts], f)
         except Exception as e:
              logger.error(f"Failed to save cache for {city_id}: {e}")
-             
+
+        self._ensure_index(city_id, tracts)
         return tracts
 
+    async def load_city_index(self, city_id: str) -> Optional[CityTractIndex]:
+        """
+        Opens the spatial index for a city, building it (and the tract cache) on first use.
+        """
+        index = self.index_store.get(city_id)
+        if index is None:
+            await self.get_tracts_for_city(city_id)
+            index = self.index_store.get(city_id)
+        return index
+
+    def rebuild_city(self, city_id: str) -> int:
+        """Rebuilds a city's spatial index from the offline store (after an ingestion)."""
+        city_id = str(city_id)
+        tracts = [CensusTract(**row) for row in self.store.load_city(city_id)]
+        self._hot_cities.pop(city_id, None)
+        if tracts:
+            self.index_store.build(city_id, tracts)
+        return len(tracts)
+
+    def _remember(self, city_id: str, tracts: List[CensusTract]) -> None:
+        self._hot_cities[city_id] = tracts
+        self._hot_cities.move_to_end(city_id)
+        while len(self._hot_cities) > HOT_CITIES:
+            self._hot_cities.popitem(last=False)
+
+    def _ensure_index(self, city_id: str, tracts: List[CensusTract]) -> None:
+        if not tracts or self.index_store.get(city_id) is not None:
+            return
+        try:
+            self.index_store.build(city_id, tracts)
+        except Exception as e:
+            logger.error(f"Failed to build census index for {city_id}: {e}")
+
     async def _fetch_and_build_tracts(self, city_id: str) -> List[CensusTract]:
         """
         Orchestrates the fetch of Geometry + Data.
@@ -101,7 +164,7 @@ class CensusClient:
         # For this MVP, we will use a simplified mock generator based on the city's average profile
         # modulated by a heuristic (center vs outskirts) because real-time SIDRA N10 scraping is unstable 
         # without a pre-downloaded CSV database.
-        # TODO: Replace heuristics with real SIDRA csv import in V2.
+        # Real figures come from the offline store (ingest_census.py); this is the fallback.
         
         tracts = []
         import random
@@ -134,9 +197,41 @@ class CensusClient:
     def get_nearby_tracts(self, lat: float, lng: float, radius_km: float = 1.0, city_id: Optional[str] = None) -> List[CensusTract]:
         """
         Finds census tracts intersecting a radius.
-        Requires city_id to narrow search (performance).
+        Served from the city's memory-mapped index; city_id narrows the search,
+        otherwise the indexed city containing the point is used.
+        Cities without an index return [] (see load_city_index).
         """
-        # MVP: Filter by bounding box or simple distance on the centroids of loaded city tracts
-        return []
+        index = self._resolve_index(lat, lng, city_id)
+        if index is None:
+            return []
+        return [
+            CensusTract(
+                id=str(index.codes[i]),
+                city_id=index.city_id,
+                population=int(index.population[i]),
+                households=int(index.households[i]),
+                avg_income=round(float(index.avg_income[i]), 2),
+                geometry=index.geometry(int(i)),
+            )
+            for i in index.query_radius(lat, lng, radius_km)
+        ]
+
+    def get_area_profile(self, lat: float, lng: float, radius_km: float = 1.0, city_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Aggregated population, households and household-weighted income of the
+        tracts intersecting a radius, without materializing tract objects.
+        Returns None when no index covers the point.
+        """
+        index = self._resolve_index(lat, lng, city_id)
+        if index is None:
+            return None
+        profile = index.aggregate(index.query_radius(lat, lng, radius_km))
+        profile["city_id"] = index.city_id
+        return profile
+
+    def _resolve_index(self, lat: float, lng: float, city_id: Optional[str]) -> Optional[CityTractIndex]:
+        if city_id:
+            return self.index_store.get(city_id)
+        return self.index_store.find_city(lat, lng)
 
 census_client = CensusClient()
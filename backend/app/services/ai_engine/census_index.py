@@ -0,0 +1,396 @@
+import os
+import json
+import math
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("BiaCensusClient")
+
+INDEX_VERSION = 1
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEG_LAT = 111.32
+# Grid cell size in degrees (~1.1 km at the equator)
+GRID_CELL_DEG = float(os.getenv("BIA_CENSUS_GRID_CELL_DEG", "0.01"))
+# Row stride for cell keys: longitudes span at most 360 / GRID_CELL_DEG columns
+_ROW_STRIDE = 1_000_000
+MAX_OPEN_INDEXES = int(os.getenv("BIA_CENSUS_MAX_OPEN_INDEXES", "32"))
+
+_ARRAY_NAMES = (
+    "codes",         # str tract code (CD_SETOR)
+    "centroids",     # float64 (n, 2) lat, lng
+    "bboxes",        # float64 (n, 4) min_lat, min_lng, max_lat, max_lng
+    "population",    # int32
+    "households",    # int32
+    "avg_income",    # float32
+    "tract_rings",   # int64 (n + 1) offsets into ring_offsets
+    "ring_offsets",  # int64 (rings + 1) offsets into coords
+    "coords",        # float64 (vertices, 2) lng, lat
+    "cell_keys",     # int64 sorted grid cell keys
+    "cell_order",    # int32 tract index for each entry of cell_keys
+)
+
+
+def _cell_key(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    rows = np.floor((lat + 90.0) / GRID_CELL_DEG).astype(np.int64)
+    cols = np.floor((lng + 180.0) / GRID_CELL_DEG).astype(np.int64)
+    return rows * _ROW_STRIDE + cols
+
+
+def haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    """Vectorized great-circle distance from one point to many."""
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2.0) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2.0) ** 2
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _outer_rings(geometry: Dict[str, Any]) -> List[List[List[float]]]:
+    """Outer rings of a GeoJSON Polygon/MultiPolygon (holes are ignored)."""
+    if not isinstance(geometry, dict):
+        return []
+    coords = geometry.get("coordinates") or []
+    if geometry.get("type") == "Polygon":
+        return [coords[0]] if coords else []
+    if geometry.get("type") == "MultiPolygon":
+        return [polygon[0] for polygon in coords if polygon]
+    return []
+
+
+def _ring_centroid(ring: np.ndarray) -> Tuple[float, float, float]:
+    """Area-weighted centroid (lng, lat) and absolute area of a ring, in degrees."""
+    x, y = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2.0
+    if abs(area) < 1e-14:
+        return float(x.mean()), float(y.mean()), 0.0
+    cx = ((x + x1) * cross).sum() / (6.0 * area)
+    cy = ((y + y1) * cross).sum() / (6.0 * area)
+    return float(cx), float(cy), abs(float(area))
+
+
+class CityTractIndex:
+    """
+    Read-only spatial index over one city's census tracts.
+
+    Arrays are memory-mapped from `.npy` files, so many workers share the same
+    pages and opening an index costs almost nothing. Tracts are bucketed by the
+    grid cell of their centroid; a radius query scans the cells within
+    `radius + max_extent_km`, filters candidates by centroid distance and
+    bounding box, and confirms edge cases with an exact polygon/circle test.
+    """
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.city_id = self.meta["city_id"]
+        self.max_extent_km = float(self.meta["max_extent_km"])
+        self.bbox = tuple(self.meta["bbox"])
+        for name in _ARRAY_NAMES:
+            setattr(self, name, np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return int(self.codes.shape[0])
+
+    def contains(self, lat: float, lng: float, margin_km: float = 0.0) -> bool:
+        min_lat, min_lng, max_lat, max_lng = self.bbox
+        dlat = margin_km / KM_PER_DEG_LAT
+        dlng = margin_km / (KM_PER_DEG_LAT * max(0.01, math.cos(math.radians(lat))))
+        return (min_lat - dlat) <= lat <= (max_lat + dlat) and (min_lng - dlng) <= lng <= (max_lng + dlng)
+
+    def _candidates(self, lat: float, lng: float, reach_km: float) -> np.ndarray:
+        dlat = reach_km / KM_PER_DEG_LAT
+        dlng = reach_km / (KM_PER_DEG_LAT * max(0.01, math.cos(math.radians(lat))))
+        low = _cell_key(np.array([lat - dlat]), np.array([lng - dlng]))[0]
+        high = _cell_key(np.array([lat + dlat]), np.array([lng + dlng]))[0]
+        row_low, col_low = divmod(int(low), _ROW_STRIDE)
+        row_high, col_high = divmod(int(high), _ROW_STRIDE)
+
+        # Within a row the cells form a contiguous key range: one binary search per row
+        rows = np.arange(row_low, row_high + 1, dtype=np.int64) * _ROW_STRIDE
+        starts = np.searchsorted(self.cell_keys, rows + col_low, side="left")
+        ends = np.searchsorted(self.cell_keys, rows + col_high, side="right")
+        spans = [self.cell_order[s:e] for s, e in zip(starts, ends) if e > s]
+        if not spans:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(spans).astype(np.int64)
+
+    def query_radius(self, lat: float, lng: float, radius_km: float) -> np.ndarray:
+        """Indices of tracts whose outline intersects the circle."""
+        candidates = self._candidates(lat, lng, radius_km + self.max_extent_km)
+        if candidates.size == 0:
+            return candidates
+
+        centroids = np.asarray(self.centroids[candidates])
+        inside = haversine_km(lat, lng, centroids[:, 0], centroids[:, 1]) <= radius_km
+
+        # Closest point of each bounding box to the center
+        bboxes = np.asarray(self.bboxes[candidates])
+        near_lat = np.clip(lat, bboxes[:, 0], bboxes[:, 2])
+        near_lng = np.clip(lng, bboxes[:, 1], bboxes[:, 3])
+        touches_bbox = haversine_km(lat, lng, near_lat, near_lng) <= radius_km
+
+        borderline = candidates[touches_bbox & ~inside]
+        confirmed = [i for i in borderline if self._polygon_intersects_circle(int(i), lat, lng, radius_km)]
+        result = candidates[inside]
+        if confirmed:
+            result = np.concatenate([result, np.asarray(confirmed, dtype=np.int64)])
+        return result
+
+    def _polygon_intersects_circle(self, index: int, lat: float, lng: float, radius_km: float) -> bool:
+        kx = KM_PER_DEG_LAT * math.cos(math.radians(lat))
+        for ring_id in range(int(self.tract_rings[index]), int(self.tract_rings[index + 1])):
+            ring = np.asarray(self.coords[int(self.ring_offsets[ring_id]):int(self.ring_offsets[ring_id + 1])])
+            if ring.shape[0] < 3:
+                continue
+            # Local equirectangular projection (km) centred on the query point
+            x = (ring[:, 0] - lng) * kx
+            y = (ring[:, 1] - lat) * KM_PER_DEG_LAT
+            x2, y2 = np.roll(x, -1), np.roll(y, -1)
+
+            # Center inside the polygon (ray casting)
+            crosses = ((y > 0) != (y2 > 0)) & (0 < (x2 - x) * (-y) / np.where(y2 - y == 0, 1e-12, y2 - y) + x)
+            if np.count_nonzero(crosses) % 2 == 1:
+                return True
+
+            # Any edge within radius of the center
+            dx, dy = x2 - x, y2 - y
+            length_sq = np.where(dx * dx + dy * dy == 0, 1e-12, dx * dx + dy * dy)
+            t = np.clip(-(x * dx + y * dy) / length_sq, 0.0, 1.0)
+            if np.any((x + t * dx) ** 2 + (y + t * dy) ** 2 <= radius_km ** 2):
+                return True
+        return False
+
+    def aggregate(self, indices: np.ndarray) -> Dict[str, Any]:
+        """Population, households and household-weighted income for a set of tracts."""
+        if indices.size == 0:
+            return {"tract_count": 0, "population": 0, "households": 0, "avg_income": None}
+        households = np.asarray(self.households[indices], dtype=np.float64)
+        income = np.asarray(self.avg_income[indices], dtype=np.float64)
+        total_households = households.sum()
+        weighted_income = (income * households).sum() / total_households if total_households else income.mean()
+        return {
+            "tract_count": int(indices.size),
+            "population": int(np.asarray(self.population[indices], dtype=np.int64).sum()),
+            "households": int(total_households),
+            "avg_income": round(float(weighted_income), 2),
+        }
+
+    def grid_totals(self, lat_edges: np.ndarray, lng_edges: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Bins tracts by centroid into a lat/lng grid in one pass. Returns
+        (rows, cols) arrays of population, households and household-weighted
+        income (NaN where a cell has no tract).
+        """
+        centroids = np.asarray(self.centroids)
+        households = np.asarray(self.households, dtype=np.float64)
+        bins = (lat_edges, lng_edges)
+        population, _, _ = np.histogram2d(centroids[:, 0], centroids[:, 1], bins=bins, weights=np.asarray(self.population, dtype=np.float64))
+        total_households, _, _ = np.histogram2d(centroids[:, 0], centroids[:, 1], bins=bins, weights=households)
+        income_sum, _, _ = np.histogram2d(
+            centroids[:, 0], centroids[:, 1], bins=bins, weights=np.asarray(self.avg_income, dtype=np.float64) * households
+        )
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg_income = np.where(total_households > 0, income_sum / total_households, np.nan)
+        return {"population": population, "households": total_households, "avg_income": avg_income}
+
+    def rings(self, index: int) -> List[np.ndarray]:
+        """Outer rings of a tract as (vertices, 2) lng/lat arrays."""
+        return [
+            np.asarray(self.coords[int(self.ring_offsets[ring_id]):int(self.ring_offsets[ring_id + 1])])
+            for ring_id in range(int(self.tract_rings[index]), int(self.tract_rings[index + 1]))
+        ]
+
+    def geometry(self, index: int) -> Dict[str, Any]:
+        rings = [[ring.tolist()] for ring in self.rings(index)]
+        if len(rings) == 1:
+            return {"type": "Polygon", "coordinates": rings[0]}
+        return {"type": "MultiPolygon", "coordinates": rings}
+
+
+def build_city_index(directory: str, city_id: str, tracts: Iterable[Any]) -> Optional[str]:
+    """
+    Precomputes centroids, bounding boxes, outlines and the grid for a city and
+    writes them as `.npy` files (plus meta.json) under `directory`.
+    `tracts` are CensusTract-like objects (id, population, households, avg_income, geometry).
+    """
+    codes, centroids, bboxes = [], [], []
+    population, households, income = [], [], []
+    tract_rings, ring_offsets, coord_chunks = [0], [0], []
+    max_extent_km = 0.0
+
+    for tract in tracts:
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for ring in _outer_rings(tract.geometry) if len(ring) >= 3]
+        if not rings:
+            continue
+        weighted = [_ring_centroid(ring) for ring in rings]
+        total_area = sum(w[2] for w in weighted)
+        if total_area > 0:
+            c_lng = sum(w[0] * w[2] for w in weighted) / total_area
+            c_lat = sum(w[1] * w[2] for w in weighted) / total_area
+        else:
+            c_lng, c_lat = weighted[0][0], weighted[0][1]
+
+        stacked = np.vstack(rings)
+        min_lng, min_lat = stacked.min(axis=0)
+        max_lng, max_lat = stacked.max(axis=0)
+        corner_dist = haversine_km(c_lat, c_lng, np.array([min_lat, min_lat, max_lat, max_lat]), np.array([min_lng, max_lng, min_lng, max_lng]))
+        max_extent_km = max(max_extent_km, float(corner_dist.max()))
+
+        codes.append(str(tract.id))
+        centroids.append((c_lat, c_lng))
+        bboxes.append((min_lat, min_lng, max_lat, max_lng))
+        population.append(int(tract.population or 0))
+        households.append(int(tract.households or 0))
+        income.append(float(tract.avg_income or 0.0))
+        for ring in rings:
+            coord_chunks.append(ring)
+            ring_offsets.append(ring_offsets[-1] + ring.shape[0])
+        tract_rings.append(len(ring_offsets) - 1)
+
+    if not codes:
+        logger.warning(f"No tract geometry to index for city {city_id}")
+        return None
+
+    centroid_arr = np.asarray(centroids, dtype=np.float64)
+    keys = _cell_key(centroid_arr[:, 0], centroid_arr[:, 1])
+    order = np.argsort(keys, kind="stable")
+    bbox_arr = np.asarray(bboxes, dtype=np.float64)
+
+    arrays = {
+        "codes": np.asarray(codes, dtype=str),
+        "centroids": centroid_arr,
+        "bboxes": bbox_arr,
+        "population": np.asarray(population, dtype=np.int32),
+        "households": np.asarray(households, dtype=np.int32),
+        "avg_income": np.asarray(income, dtype=np.float32),
+        "tract_rings": np.asarray(tract_rings, dtype=np.int64),
+        "ring_offsets": np.asarray(ring_offsets, dtype=np.int64),
+        "coords": np.vstack(coord_chunks),
+        "cell_keys": keys[order],
+        "cell_order": order.astype(np.int32),
+    }
+
+    # Write into a temp dir and rename so readers never see a half-built index
+    tmp_dir = f"{directory}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), array)
+    meta = {
+        "version": INDEX_VERSION,
+        "city_id": str(city_id),
+        "count": len(codes),
+        "grid_cell_deg": GRID_CELL_DEG,
+        "max_extent_km": round(max_extent_km, 4),
+        "bbox": [
+            float(bbox_arr[:, 0].min()), float(bbox_arr[:, 1].min()),
+            float(bbox_arr[:, 2].max()), float(bbox_arr[:, 3].max()),
+        ],
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+    os.replace(tmp_dir, directory)
+    logger.info(f"Built census index for city {city_id}: {len(codes)} tracts")
+    return directory
+
+
+class CensusIndexStore:
+    """
+    Opens (and keeps a bounded set of) per-city indexes under one root directory.
+    The bounding boxes of all cities are kept in one in-memory array, reloaded
+    when the root directory changes, so locating a point's city touches no files.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._open: "OrderedDict[str, CityTractIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        # (root mtime, city ids, (n, 4) min_lat, min_lng, max_lat, max_lng)
+        self._bounds: Optional[Tuple[int, List[str], np.ndarray]] = None
+
+    def path_for(self, city_id: str) -> str:
+        return os.path.join(self.root, str(city_id))
+
+    def has(self, city_id: str) -> bool:
+        return os.path.exists(os.path.join(self.path_for(city_id), "meta.json"))
+
+    def build(self, city_id: str, tracts: Iterable[Any]) -> Optional[CityTractIndex]:
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            self._open.pop(str(city_id), None)
+            self._bounds = None
+        if build_city_index(self.path_for(city_id), city_id, tracts) is None:
+            return None
+        return self.get(city_id)
+
+    def get(self, city_id: str) -> Optional[CityTractIndex]:
+        city_id = str(city_id)
+        with self._lock:
+            index = self._open.get(city_id)
+            if index is not None:
+                self._open.move_to_end(city_id)
+                return index
+        if not self.has(city_id):
+            return None
+        try:
+            index = CityTractIndex(self.path_for(city_id))
+        except Exception as e:
+            logger.warning(f"Failed to open census index for {city_id}: {e}")
+            return None
+        if index.meta.get("version") != INDEX_VERSION:
+            logger.info(f"Census index for {city_id} is outdated; rebuild required")
+            return None
+        with self._lock:
+            self._open[city_id] = index
+            while len(self._open) > MAX_OPEN_INDEXES:
+                self._open.popitem(last=False)
+        return index
+
+    def _city_bounds(self) -> Tuple[List[str], np.ndarray]:
+        """City ids and bounding boxes of every built index, reread only when the root changes."""
+        try:
+            mtime = os.stat(self.root).st_mtime_ns
+        except OSError:
+            return [], np.empty((0, 4), dtype=np.float64)
+        bounds = self._bounds
+        if bounds is not None and bounds[0] == mtime:
+            return bounds[1], bounds[2]
+
+        # Indexes are swapped in by renaming their directory, which bumps the root's mtime
+        city_ids, boxes = [], []
+        for city_id in os.listdir(self.root):
+            try:
+                with open(os.path.join(self.root, city_id, "meta.json"), "r") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if meta.get("version") == INDEX_VERSION and meta.get("bbox"):
+                city_ids.append(city_id)
+                boxes.append(meta["bbox"])
+        array = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        with self._lock:
+            self._bounds = (mtime, city_ids, array)
+        return city_ids, array
+
+    def find_city(self, lat: float, lng: float) -> Optional[CityTractIndex]:
+        """Index of a city whose extent contains the point."""
+        city_ids, boxes = self._city_bounds()
+        if not city_ids:
+            return None
+        hits = np.flatnonzero(
+            (boxes[:, 0] <= lat) & (lat <= boxes[:, 2]) & (boxes[:, 1] <= lng) & (lng <= boxes[:, 3])
+        )
+        for position in hits:
+            index = self.get(city_ids[int(position)])
+            if index is not None:
+                return index
+        return None
@@ -0,0 +1,227 @@
+import os
+import csv
+import json
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("BiaCensusClient")
+
+# Default column names of the IBGE Censo 2022 "Agregados por Setores Censitários" CSVs
+DEFAULT_COLUMNS = {
+    "code": "CD_SETOR",
+    "city_id": "CD_MUN",
+    "population": "v0001",   # Total de pessoas
+    "households": "v0007",   # Domicílios particulares permanentes ocupados
+    "avg_income": "",        # Renda média (released in a separate file; set via --income-column)
+}
+_VALUE_FIELDS = ("population", "households", "avg_income")
+BATCH_SIZE = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS census_tracts (
+    rowid INTEGER PRIMARY KEY,
+    code TEXT NOT NULL UNIQUE,
+    city_id TEXT NOT NULL,
+    population INTEGER NOT NULL DEFAULT 0,
+    households INTEGER NOT NULL DEFAULT 0,
+    avg_income REAL NOT NULL DEFAULT 0,
+    geometry TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_census_tracts_city ON census_tracts (city_id);
+"""
+
+
+def _parse_number(value: Any) -> float:
+    """IBGE CSVs use ',' as decimal separator and 'X'/'.' for suppressed cells."""
+    if value is None:
+        return 0.0
+    text = str(value).strip()
+    if not text or text in ("X", ".", "-", ".."):
+        return 0.0
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def _city_from_code(code: str) -> str:
+    # CD_SETOR starts with the 7-digit IBGE municipality code
+    return code[:7]
+
+
+class CensusStore:
+    """
+    Local SQLite store of Censo 2022 tracts, populated offline from the IBGE
+    bulk downloads (see `backend/ingest_census.py`).
+
+    One row per tract with its aggregates and GeoJSON outline, indexed by
+    municipality. Spatial lookups go through the per-city indexes built from
+    it (see census_index.py). Reads never touch the network, so lookups are
+    deterministic.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.row_factory = sqlite3.Row
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def ingest_aggregates(
+        self,
+        csv_path: str,
+        columns: Optional[Dict[str, str]] = None,
+        city_ids: Optional[Iterable[str]] = None,
+        delimiter: str = ";",
+        encoding: str = "utf-8-sig",
+    ) -> int:
+        """
+        Upserts tract aggregates from an IBGE CSV. Only fields with a mapped
+        column are written, so population and income files can be loaded
+        separately into the same rows.
+        """
+        mapping = {**DEFAULT_COLUMNS, **(columns or {})}
+        fields = [f for f in _VALUE_FIELDS if mapping.get(f)]
+        if not fields:
+            raise ValueError("No aggregate column mapped (population, households or avg_income)")
+        wanted = set(city_ids) if city_ids else None
+
+        sql = (
+            f"INSERT INTO census_tracts (code, city_id, {', '.join(fields)}) "
+            f"VALUES (?, ?, {', '.join('?' for _ in fields)}) "
+            f"ON CONFLICT(code) DO UPDATE SET {', '.join(f'{f} = excluded.{f}' for f in fields)}"
+        )
+
+        def rows() -> Iterator[Tuple]:
+            with open(csv_path, "r", encoding=encoding, errors="replace", newline="") as f:
+                reader = csv.DictReader(f, delimiter=delimiter)
+                missing = [mapping[f] for f in ["code", *fields] if mapping[f] not in (reader.fieldnames or [])]
+                if missing:
+                    raise ValueError(f"Columns not found in {csv_path}: {', '.join(missing)}")
+                for record in reader:
+                    code = (record.get(mapping["code"]) or "").strip()
+                    if not code:
+                        continue
+                    city_id = (record.get(mapping["city_id"]) or "").strip() or _city_from_code(code)
+                    if wanted and city_id not in wanted:
+                        continue
+                    values = [_parse_number(record.get(mapping[f])) for f in fields]
+                    yield (code, city_id, *[v if f == "avg_income" else int(v) for f, v in zip(fields, values)])
+
+        return self._executemany(sql, rows())
+
+    def ingest_geometry(
+        self,
+        path: str,
+        code_property: str = "CD_SETOR",
+        city_property: str = "CD_MUN",
+        city_ids: Optional[Iterable[str]] = None,
+    ) -> int:
+        """
+        Upserts tract outlines from a GeoJSON FeatureCollection (IBGE Malha API
+        or `ogr2ogr -f GeoJSON` of the shapefile) or, with pyshp installed,
+        directly from the IBGE shapefile.
+        """
+        wanted = set(city_ids) if city_ids else None
+        conn = self._conn()
+        count = 0
+        for code, city_id, geometry in self._read_features(path, code_property, city_property):
+            if wanted and city_id not in wanted:
+                continue
+            conn.execute(
+                "INSERT INTO census_tracts (code, city_id, geometry) VALUES (?, ?, ?) "
+                "ON CONFLICT(code) DO UPDATE SET geometry = excluded.geometry",
+                (code, city_id, json.dumps(geometry, separators=(",", ":"))),
+            )
+            count += 1
+            if count % BATCH_SIZE == 0:
+                conn.commit()
+        conn.commit()
+        return count
+
+    def _read_features(self, path: str, code_property: str, city_property: str) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        if path.lower().endswith(".shp"):
+            try:
+                import shapefile  # Optional: pyshp, only needed for raw shapefiles
+            except ImportError:
+                raise RuntimeError("Reading .shp requires pyshp (pip install pyshp); or convert to GeoJSON with ogr2ogr")
+            with shapefile.Reader(path) as reader:
+                for shape_record in reader.iterShapeRecords():
+                    props = shape_record.record.as_dict()
+                    code = str(props.get(code_property) or "").strip()
+                    if code:
+                        yield code, str(props.get(city_property) or _city_from_code(code)), shape_record.shape.__geo_interface__
+            return
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for feature in data.get("features", []):
+            props = feature.get("properties") or {}
+            code = str(props.get(code_property) or "").strip()
+            if code and feature.get("geometry"):
+                yield code, str(props.get(city_property) or _city_from_code(code)), feature["geometry"]
+
+    def _executemany(self, sql: str, rows: Iterator[Tuple]) -> int:
+        conn = self._conn()
+        batch, count = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                conn.executemany(sql, batch)
+                conn.commit()
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(sql, batch)
+            count += len(batch)
+        conn.commit()
+        return count
+
+    def has_city(self, city_id: str) -> bool:
+        if not self.exists:
+            return False
+        row = self._conn().execute(
+            "SELECT 1 FROM census_tracts WHERE city_id = ? AND geometry IS NOT NULL LIMIT 1", (str(city_id),)
+        ).fetchone()
+        return row is not None
+
+    def city_ids(self) -> List[str]:
+        if not self.exists:
+            return []
+        return [row[0] for row in self._conn().execute("SELECT DISTINCT city_id FROM census_tracts ORDER BY city_id")]
+
+    def load_city(self, city_id: str) -> List[Dict[str, Any]]:
+        """Every tract of a municipality that has an outline, as CensusTract kwargs."""
+        if not self.exists:
+            return []
+        cursor = self._conn().execute(
+            "SELECT code, city_id, population, households, avg_income, geometry FROM census_tracts "
+            "WHERE city_id = ? AND geometry IS NOT NULL ORDER BY code",
+            (str(city_id),),
+        )
+        return [
+            {
+                "id": row["code"],
+                "city_id": row["city_id"],
+                "population": row["population"],
+                "households": row["households"],
+                "avg_income": row["avg_income"],
+                "geometry": json.loads(row["geometry"]),
+            }
+            for row in cursor
+        ]
@@ -591,7 +591,7 @@ def get_smart_dayparting(niche: str) -> str:
 
 
 
-from app.services.ai_engine import market_scorer
+from app.services.ai_engine import census_client, market_scorer
 
 async def generate_marketing_estimate(
     *,
@@ -603,24 +603,32 @@ async def generate_marketing_estimate(
     product_name: Optional[str] = None,
     currency: str = "BRL",
     reason: str = "simulated",
+    city_id: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Advanced estimate using BIA Intelligence Core (Census + OSM + Meta).
     Replaces the old 'simulate_marketing_estimate'.
     """
     # 1. Gather Real Data (Async where possible)
-    # TODO: Connect to Census Client here once fully populated
-    # For now, we simulate the INPUTS based on the location, but calculate the SCORE for real.
-    
-    # Heuristic for Income Input (Placeholder for future census_client.get_income(lat, lng))
-    # Richer areas: Sao Paulo, Rio, Brasilia logic or random variation based on coordinates
-    income_level = 3500.0 # Default Brazil Avg
+    # Census tracts come from the city's memory-mapped index (no IBGE call per estimate)
+    census = census_client.get_area_profile(lat, lng, radius_km, city_id=city_id)
+    has_census = bool(census and census["tract_count"])
+    warnings = []
+
+    if has_census:
+        income_level = census["avg_income"] or 3500.0
+        population = census["population"]
+    else:
+        # Heuristics until the city's index is built (census_client.load_city_index)
+        income_level = 3500.0 # Default Brazil Avg
+        population = population_density_estimator(lat, lng, radius_km)
+        warnings.append("Dados de setores censitários ainda em modo de integração (MVP).")
     
     # Heuristic for Competition (Placeholder for future osm_client.count_competitors)
     competitors = 5 
     
     # Heuristic for Audience Reach (Placeholder for Meta Reach Estimate)
-    meta_reach = int(population_density_estimator(lat, lng, radius_km) * 0.6)
+    meta_reach = int(population * 0.6)
     meta_cpm = 25.0
     
     # 2. Calculate Real Score using the Scorer Module
@@ -653,8 +661,9 @@ async def generate_marketing_estimate(
             "metric_name": metric_name,
             "cpm": {"value": meta_cpm, "currency": currency},
         },
+        "census": census if has_census else None,
         "fallbacks": [],
-        "warnings": ["Dados de setores censitários ainda em modo de integração (MVP)."],
+        "warnings": warnings,
         "notes": [f"Análise de Inteligência: {score_data['verdict']}"],
     }
 
@@ -0,0 +1,89 @@
+import os
+import math
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .census_client import census_client
+from .scorer import VERDICTS, market_scorer
+
+logger = logging.getLogger("BiaMarketScorer")
+
+MAX_GRID_CELLS = int(os.getenv("BIA_GRID_MAX_CELLS", "40000"))
+KM_PER_DEG_LAT = 111.32
+# Same fallbacks generate_marketing_estimate uses when a point has no census data
+DEFAULT_INCOME = 3500.0
+DEFAULT_DENSITY_PER_KM2 = 4000.0
+DEFAULT_COMPETITORS = 5
+DEFAULT_CPM = 25.0
+
+
+def score_bbox_grid(
+    min_lat: float,
+    min_lng: float,
+    max_lat: float,
+    max_lng: float,
+    cell_km: float = 1.0,
+    strategy: str = "blue_ocean",
+    city_id: Optional[str] = None,
+    competitors: int = DEFAULT_COMPETITORS,
+    meta_cpm: float = DEFAULT_CPM,
+) -> Dict[str, Any]:
+    """
+    Scores a regular grid over a bounding box in one vectorized pass.
+
+    Census population and income are binned per cell from the city's tract
+    index; cells without tracts use the density/income heuristics. The result
+    is columnar (row-major, flattened) to keep large grids compact.
+    """
+    if max_lat <= min_lat or max_lng <= min_lng or cell_km <= 0:
+        return {"error": "Invalid bounding box or cell size."}
+
+    mid_lat = (min_lat + max_lat) / 2.0
+    dlat = cell_km / KM_PER_DEG_LAT
+    dlng = cell_km / (KM_PER_DEG_LAT * max(0.01, math.cos(math.radians(mid_lat))))
+    rows = max(1, math.ceil((max_lat - min_lat) / dlat))
+    cols = max(1, math.ceil((max_lng - min_lng) / dlng))
+    if rows * cols > MAX_GRID_CELLS:
+        return {"error": f"Grid too large ({rows * cols} cells, max {MAX_GRID_CELLS}); increase cell_km."}
+
+    lat_edges = min_lat + np.arange(rows + 1) * dlat
+    lng_edges = min_lng + np.arange(cols + 1) * dlng
+    cell_area = cell_km * cell_km
+
+    population = np.full((rows, cols), DEFAULT_DENSITY_PER_KM2 * cell_area)
+    income = np.full((rows, cols), DEFAULT_INCOME)
+    has_census = np.zeros((rows, cols), dtype=bool)
+
+    index = census_client.index_store.get(city_id) if city_id else census_client.index_store.find_city(mid_lat, (min_lng + max_lng) / 2.0)
+    if index is not None:
+        totals = index.grid_totals(lat_edges, lng_edges)
+        has_census = totals["households"] > 0
+        population = np.where(has_census, totals["population"], population)
+        income = np.where(has_census, totals["avg_income"], income)
+
+    meta_reach = population * 0.6
+    scores = market_scorer.calculate_scores_batch(
+        income_level=income,
+        population_density=population / cell_area,
+        competitor_count=competitors,
+        meta_reach=meta_reach,
+        meta_cpm=meta_cpm,
+        strategy=strategy,
+    )
+
+    return {
+        "bbox": [min_lat, min_lng, max_lat, max_lng],
+        "cell_km": cell_km,
+        "shape": [rows, cols],
+        "lat_edges": np.round(lat_edges, 6).tolist(),
+        "lng_edges": np.round(lng_edges, 6).tolist(),
+        "strategy": strategy,
+        "city_id": index.city_id if index is not None else None,
+        "verdicts": list(VERDICTS),
+        "score": scores["total_score"].ravel().tolist(),
+        "verdict_code": scores["verdict_code"].ravel().tolist(),
+        "population": np.rint(population).astype(np.int64).ravel().tolist(),
+        "census": has_census.ravel().astype(np.int8).tolist(),
+    }
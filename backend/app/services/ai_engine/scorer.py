@@ -3,8 +3,14 @@ from typing import Dict, Any, List, Optional
 import math
 import logging
 
+import numpy as np
+
 logger = logging.getLogger("BiaMarketScorer")
 
+# Verdict codes returned by calculate_scores_batch index into this tuple
+VERDICTS = ("Baixo Potencial", "Médio/Regular", "Muito Bom", "Excelente (Hotspot)")
+VERDICT_THRESHOLDS = (50, 70, 85)
+
 class MarketScorer:
     """
     Calculates the 'Opportunity Score' (0-100) for a given location.
@@ -59,6 +65,41 @@ class MarketScorer:
             "verdict": self._get_verdict(final_score)
         }
         
+    def calculate_scores_batch(
+        self,
+        income_level,
+        population_density,
+        competitor_count,
+        meta_reach,
+        meta_cpm,
+        strategy: str = "blue_ocean"
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized calculate_score for many locations (grid cells, tracts).
+        Inputs are arrays (or scalars, broadcast against the arrays); returns
+        score arrays plus `verdict_code`, an index into VERDICTS.
+        """
+        income, _, competitors, reach, _ = np.broadcast_arrays(
+            *(np.asarray(v, dtype=np.float64) for v in (income_level, population_density, competitor_count, meta_reach, meta_cpm))
+        )
+
+        income_score = np.minimum(100.0, (income / 15000.0) * 100)
+        audience_score = np.minimum(100.0, (reach / 5000.0) * 80 + 20)
+        if strategy == "blue_ocean":
+            comp_score = np.maximum(0.0, 100 - (competitors * 10))
+        else:
+            comp_score = np.maximum(0.0, 100 - (np.abs(competitors - 7) * 15))
+
+        final_score = (income_score * 0.4) + (audience_score * 0.3) + (comp_score * 0.3)
+
+        return {
+            "total_score": np.round(final_score, 1),
+            "income_score": np.round(income_score, 1),
+            "audience_score": np.round(audience_score, 1),
+            "competition_score": np.round(comp_score, 1),
+            "verdict_code": np.digitize(final_score, VERDICT_THRESHOLDS).astype(np.int8),
+        }
+
     def _get_verdict(self, score: float) -> str:
         if score >= 85: return "Excelente (Hotspot)"
         if score >= 70: return "Muito Bom"
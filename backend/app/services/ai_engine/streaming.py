@@ -0,0 +1,186 @@
+import json
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+
+def _decode(text: str, pos: int) -> Tuple[Any, int]:
+    value, end = _DECODER.raw_decode(text, pos)
+    # A number at the very end of the buffer may still be growing ("12" -> "125")
+    if end == len(text) and isinstance(value, (int, float)) and not isinstance(value, bool):
+        raise json.JSONDecodeError("Number may be incomplete", text, pos)
+    return value, end
+
+
+class PartialJSONScanner:
+    """
+    Incrementally parses a JSON object while an LLM is still generating it.
+
+    `feed()` receives raw text deltas and returns the top-level fields whose
+    values became complete since the last call, as (key, value) pairs. When
+    `list_key` is set, elements of that array are also returned one by one as
+    ("<list_key>[]", element) before the array itself closes, so the first
+    tags can be shown while the rest are still being generated.
+
+    <think> blocks and Markdown fences before the object are skipped.
+    """
+
+    def __init__(self, list_key: Optional[str] = None):
+        self.list_key = list_key
+        self.buffer = ""
+        self._pos: Optional[int] = None  # next unparsed index in `buffer`
+        self._list_items: Optional[List[Any]] = None
+        self._done = False
+
+    def feed(self, delta: str) -> List[Tuple[str, Any]]:
+        self.buffer += delta or ""
+        if self._done:
+            return []
+        if self._pos is None and not self._find_start():
+            return []
+        return self._scan()
+
+    def _find_start(self) -> bool:
+        text = self.buffer
+        think_end = text.rfind("</think>")
+        if "<think>" in text and think_end == -1:
+            return False
+        start = text.find("{", think_end + len("</think>") if think_end != -1 else 0)
+        if start == -1:
+            return False
+        self._pos = start + 1
+        return True
+
+    def _skip(self, pos: int, chars: str = _WHITESPACE + ",") -> int:
+        text = self.buffer
+        while pos < len(text) and text[pos] in chars:
+            pos += 1
+        return pos
+
+    def _scan(self) -> List[Tuple[str, Any]]:
+        text = self.buffer
+        events: List[Tuple[str, Any]] = []
+        while True:
+            if self._list_items is not None:
+                if not self._scan_list(events):
+                    return events
+                continue
+
+            pos = self._skip(self._pos)
+            if pos >= len(text):
+                return events
+            if text[pos] == "}":
+                self._done = True
+                return events
+            try:
+                key, pos = _decode(text, pos)
+            except json.JSONDecodeError:
+                return events
+            pos = self._skip(pos, _WHITESPACE)
+            if pos >= len(text):
+                return events
+            if text[pos] != ":":
+                # Not valid JSON; stop streaming and let the final parse report it
+                self._done = True
+                return events
+            pos = self._skip(pos + 1, _WHITESPACE)
+            if pos >= len(text):
+                return events
+
+            if key == self.list_key and text[pos] == "[":
+                self._list_items = []
+                self._pos = pos + 1
+                continue
+            try:
+                value, pos = _decode(text, pos)
+            except json.JSONDecodeError:
+                return events
+            events.append((key, value))
+            self._pos = pos
+
+    def _scan_list(self, events: List[Tuple[str, Any]]) -> bool:
+        """Consume complete list elements; returns True once the list closed."""
+        text = self.buffer
+        while True:
+            pos = self._skip(self._pos)
+            if pos >= len(text):
+                return False
+            if text[pos] == "]":
+                events.append((self.list_key, self._list_items))
+                self._list_items = None
+                self._pos = pos + 1
+                return True
+            try:
+                item, pos = _decode(text, pos)
+            except json.JSONDecodeError:
+                return False
+            self._list_items.append(item)
+            events.append((f"{self.list_key}[]", item))
+            self._pos = pos
+
+
+class StreamMetrics:
+    """Time-to-first-token and total stream duration over recent streams."""
+
+    def __init__(self, window: int = 200):
+        self._ttft_ms = deque(maxlen=window)
+        self._total_ms = deque(maxlen=window)
+        self.streams = 0
+        self.failures = 0
+
+    def record(self, ttft_ms: Optional[float], total_ms: float) -> None:
+        self.streams += 1
+        if ttft_ms is not None:
+            self._ttft_ms.append(ttft_ms)
+        self._total_ms.append(total_ms)
+
+    def record_failure(self) -> None:
+        self.failures += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "streams": self.streams,
+            "failures": self.failures,
+            "ttft_ms": _summarize(self._ttft_ms),
+            "total_ms": _summarize(self._total_ms),
+        }
+
+
+# Shared by every assistant instance so the metrics outlive per-request agents
+stream_metrics = StreamMetrics()
+
+
+class StreamTimer:
+    """Measures one stream; call `token()` on every delta and `finish()` at the end."""
+
+    def __init__(self, metrics: StreamMetrics):
+        self.metrics = metrics
+        self.started = time.monotonic()
+        self.ttft_ms: Optional[float] = None
+
+    def token(self) -> None:
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.monotonic() - self.started) * 1000.0
+
+    def finish(self) -> None:
+        self.metrics.record(self.ttft_ms, (time.monotonic() - self.started) * 1000.0)
+
+
+def _summarize(values) -> Dict[str, Any]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "last": round(values[-1], 1),
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+    }
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Serialize one Server-Sent Event (json.dumps never emits raw newlines)."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
@@ -1,15 +1,26 @@
 import logging
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import inspect, select
 from sqlalchemy.orm import Session
 
-from app.models.campaign_analysis import CampaignAnalysisReport, CampaignKpiDaily
+from app.models.campaign_analysis import CampaignAnalysisReport, CampaignKpiDaily, legacy_kpi_daily
+from app.services.insights_warehouse import insights_warehouse_service
 from app.services.meta_ads import meta_ads_service
 
 logger = logging.getLogger(__name__)
 
 
+# Columns of CampaignKpiDaily filled from _parse_daily_metric
+DAILY_COLUMNS = (
+    "date_start", "date_stop", "amount_spent", "impressions", "reach", "frequency",
+    "clicks", "link_clicks", "outbound_clicks", "ctr", "cpc", "cpm",
+    "leads", "purchases", "purchase_value", "raw_metrics",
+)
+UPSERT_CHUNK_ROWS = 500
+
+
 class CampaignAnalysisService:
     SUPPORTED_GOAL_TYPES = {"sales", "lead_gen", "growth", "awareness", "advocacy"}
 
@@ -40,11 +51,14 @@ class CampaignAnalysisService:
         if "error" in campaign:
             return {"error": campaign["error"]}
 
-        insights = meta_ads_service.get_campaign_insights(campaign_id, time_increment=1)
-        if "error" in insights:
-            return {"error": insights["error"]}
+        # Lifetime days from the insights warehouse when it covers them; live from Meta otherwise
+        raw_daily_rows = self._warehouse_daily_rows(db, campaign_id, campaign)
+        if raw_daily_rows is None:
+            insights = meta_ads_service.get_campaign_insights(campaign_id, time_increment=1)
+            if "error" in insights:
+                return {"error": insights["error"]}
+            raw_daily_rows = insights.get("data", [])
 
-        raw_daily_rows = insights.get("data", [])
         if not raw_daily_rows:
             fallback = meta_ads_service.get_campaign_insights(campaign_id, time_increment=0)
             if "error" in fallback:
@@ -54,7 +68,11 @@ class CampaignAnalysisService:
         if not raw_daily_rows:
             return {"error": "Campanha sem insights disponíveis para análise."}
 
-        daily_metrics = [self._parse_daily_metric(row) for row in raw_daily_rows]
+        daily_metrics = self._dedupe_days([self._parse_daily_metric(row) for row in raw_daily_rows])
+        # Only single-day rows belong in the shared per-day table; the time_increment=0
+        # fallback is a period total and stays on this report
+        days = [metric for metric in daily_metrics if metric["date_start"] == metric["date_stop"]]
+        period_metrics = [metric for metric in daily_metrics if metric["date_start"] != metric["date_stop"]]
         metrics = self._aggregate_metrics(daily_metrics)
         scores = self._calculate_scores(metrics, normalized_goal)
         success_points, attention_points = self._build_findings(metrics, normalized_goal, scores["final"])
@@ -109,45 +127,44 @@ class CampaignAnalysisService:
                     "start_time": campaign.get("start_time"),
                     "stop_time": campaign.get("stop_time"),
                 },
+                "daily_range": self._daily_range(days),
+                "period_metrics": [self._metric_to_json(metric) for metric in period_metrics],
             },
+            # Set here (not by the server default) so the report serializes without a refresh
+            created_at=datetime.now(timezone.utc),
         )
         db.add(report)
         db.flush()
 
-        for metric in daily_metrics:
-            db.add(
-                CampaignKpiDaily(
-                    report_id=report.id,
-                    campaign_id=campaign_id,
-                    date_start=metric["date_start"],
-                    date_stop=metric["date_stop"],
-                    amount_spent=metric["amount_spent"],
-                    impressions=metric["impressions"],
-                    reach=metric["reach"],
-                    frequency=metric["frequency"],
-                    clicks=metric["clicks"],
-                    link_clicks=metric["link_clicks"],
-                    outbound_clicks=metric["outbound_clicks"],
-                    ctr=metric["ctr"],
-                    cpc=metric["cpc"],
-                    cpm=metric["cpm"],
-                    leads=metric["leads"],
-                    purchases=metric["purchases"],
-                    purchase_value=metric["purchase_value"],
-                    raw_metrics=metric["raw_metrics"],
-                )
-            )
-
+        self._upsert_daily_metrics(db, campaign_id, report.id, days)
+        # Serialized from memory: no reload of the report or the days we just wrote
+        result = self._serialize_report(report, daily_metrics)
         db.commit()
-        db.refresh(report)
-
-        persisted_daily_metrics = (
-            db.query(CampaignKpiDaily)
-            .filter(CampaignKpiDaily.report_id == report.id)
-            .order_by(CampaignKpiDaily.date_start.asc(), CampaignKpiDaily.id.asc())
-            .all()
-        )
-        return self._serialize_report(report, persisted_daily_metrics)
+        return result
+
+    def _warehouse_daily_rows(self, db: Session, campaign_id: str, campaign: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """
+        The campaign's daily rows from start to stop (or today) out of the
+        insights warehouse, or None when it does not cover (or is stale for)
+        that range.
+        """
+        # start_time/stop_time are ISO timestamps in the account's timezone, like date_start
+        since = self._parse_date(str(campaign.get("start_time") or "")[:10])
+        if since is None:
+            return None
+        until = date.today()
+        stop = self._parse_date(str(campaign.get("stop_time") or "")[:10])
+        if stop is not None and stop < until:
+            until = stop
+        try:
+            return insights_warehouse_service.get_daily_rows(
+                db, "campaign", since, until,
+                ad_account_id=campaign.get("account_id"),
+                campaign_id=campaign_id,
+            )
+        except Exception as e:
+            logger.warning(f"Insights warehouse unavailable, falling back to Meta: {e}")
+            return None
 
     def get_latest_report(self, db: Session, campaign_id: str) -> Optional[Dict[str, Any]]:
         report = (
@@ -159,13 +176,119 @@ class CampaignAnalysisService:
         if not report:
             return None
 
-        daily_metrics = (
+        raw_metrics = report.raw_metrics or {}
+        if "daily_range" not in raw_metrics:
+            # Report from before days were shared: its rows are in the legacy per-report table
+            return self._serialize_report(report, self._legacy_daily_metrics(db, report.id))
+
+        period_metrics = [self._metric_from_json(metric) for metric in raw_metrics.get("period_metrics") or []]
+        daily_range = raw_metrics.get("daily_range")
+        if not daily_range:
+            return self._serialize_report(report, period_metrics)
+
+        # Days are shared across reports; later analyses may have refreshed them
+        rows = (
             db.query(CampaignKpiDaily)
-            .filter(CampaignKpiDaily.report_id == report.id)
-            .order_by(CampaignKpiDaily.date_start.asc(), CampaignKpiDaily.id.asc())
+            .filter(
+                CampaignKpiDaily.campaign_id == campaign_id,
+                CampaignKpiDaily.date_start >= self._parse_date(daily_range["since"]),
+                CampaignKpiDaily.date_start <= self._parse_date(daily_range["until"]),
+            )
+            .order_by(CampaignKpiDaily.date_start.asc())
+            .all()
+        )
+        daily_metrics = [{column: getattr(row, column) for column in DAILY_COLUMNS} for row in rows]
+        return self._serialize_report(report, daily_metrics + period_metrics)
+
+    def _legacy_daily_metrics(self, db: Session, report_id: int) -> List[Dict[str, Any]]:
+        if not inspect(db.get_bind()).has_table(legacy_kpi_daily.name):
+            return []
+        columns = [legacy_kpi_daily.c[column] for column in DAILY_COLUMNS]
+        rows = db.execute(
+            select(*columns)
+            .where(legacy_kpi_daily.c.report_id == report_id)
+            .order_by(legacy_kpi_daily.c.date_start.asc())
+        ).all()
+        return [dict(row._mapping) for row in rows]
+
+    def _metric_to_json(self, metric: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **metric,
+            "date_start": metric["date_start"].isoformat() if metric["date_start"] else None,
+            "date_stop": metric["date_stop"].isoformat() if metric["date_stop"] else None,
+        }
+
+    def _metric_from_json(self, metric: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **metric,
+            "date_start": self._parse_date(metric.get("date_start")),
+            "date_stop": self._parse_date(metric.get("date_stop")),
+        }
+
+    def _dedupe_days(self, daily_metrics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """One entry per day (the last one wins), ordered by date; undated rows are dropped."""
+        by_day = {metric["date_start"]: metric for metric in daily_metrics if metric["date_start"]}
+        return [by_day[day] for day in sorted(by_day)]
+
+    def _daily_range(self, daily_metrics: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        if not daily_metrics:
+            return None
+        return {
+            "since": daily_metrics[0]["date_start"].isoformat(),
+            "until": daily_metrics[-1]["date_start"].isoformat(),
+        }
+
+    def _upsert_daily_metrics(
+        self,
+        db: Session,
+        campaign_id: str,
+        report_id: int,
+        daily_metrics: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Writes the days in one statement keyed by (campaign_id, date_start):
+        INSERT ... ON CONFLICT DO UPDATE on SQLite/PostgreSQL, bulk mappings elsewhere.
+        """
+        if not daily_metrics:
+            return
+        rows = [
+            {"campaign_id": campaign_id, "report_id": report_id, **{column: metric[column] for column in DAILY_COLUMNS}}
+            for metric in daily_metrics
+        ]
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+
+            # Chunked to stay under SQLite's bound-parameter limit on long campaigns
+            for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+                statement = insert(CampaignKpiDaily).values(rows[start:start + UPSERT_CHUNK_ROWS])
+                updated = {
+                    column: statement.excluded[column]
+                    for column in ("report_id",) + DAILY_COLUMNS
+                    if column != "date_start"
+                }
+                updated["updated_at"] = datetime.now(timezone.utc)
+                db.execute(statement.on_conflict_do_update(index_elements=["campaign_id", "date_start"], set_=updated))
+            return
+
+        existing = dict(
+            db.query(CampaignKpiDaily.date_start, CampaignKpiDaily.id)
+            .filter(
+                CampaignKpiDaily.campaign_id == campaign_id,
+                CampaignKpiDaily.date_start.in_([row["date_start"] for row in rows]),
+            )
             .all()
         )
-        return self._serialize_report(report, daily_metrics)
+        inserts = [row for row in rows if row["date_start"] not in existing]
+        updates = [{**row, "id": existing[row["date_start"]]} for row in rows if row["date_start"] in existing]
+        if inserts:
+            db.bulk_insert_mappings(CampaignKpiDaily, inserts)
+        if updates:
+            db.bulk_update_mappings(CampaignKpiDaily, updates)
 
     def _normalize_goal(self, goal_type: str) -> str:
         normalized_goal = (goal_type or "sales").strip().lower()
@@ -176,7 +299,7 @@ class CampaignAnalysisService:
     def _serialize_report(
         self,
         report: CampaignAnalysisReport,
-        daily_metrics: List[CampaignKpiDaily],
+        daily_metrics: List[Dict[str, Any]],
     ) -> Dict[str, Any]:
         return {
             "report_id": report.id,
@@ -218,17 +341,17 @@ class CampaignAnalysisService:
             "executive_summary": report.executive_summary or "",
             "daily_metrics": [
                 {
-                    "date_start": metric.date_start,
-                    "date_stop": metric.date_stop,
-                    "amount_spent": round(float(metric.amount_spent or 0), 2),
-                    "impressions": int(metric.impressions or 0),
-                    "reach": int(metric.reach or 0),
-                    "clicks": int(metric.clicks or 0),
-                    "ctr": round(float(metric.ctr or 0), 2),
-                    "cpc": round(float(metric.cpc or 0), 2),
-                    "cpm": round(float(metric.cpm or 0), 2),
-                    "leads": int(metric.leads or 0),
-                    "purchases": int(metric.purchases or 0),
+                    "date_start": metric["date_start"],
+                    "date_stop": metric["date_stop"],
+                    "amount_spent": round(float(metric["amount_spent"] or 0), 2),
+                    "impressions": int(metric["impressions"] or 0),
+                    "reach": int(metric["reach"] or 0),
+                    "clicks": int(metric["clicks"] or 0),
+                    "ctr": round(float(metric["ctr"] or 0), 2),
+                    "cpc": round(float(metric["cpc"] or 0), 2),
+                    "cpm": round(float(metric["cpm"] or 0), 2),
+                    "leads": int(metric["leads"] or 0),
+                    "purchases": int(metric["purchases"] or 0),
                 }
                 for metric in daily_metrics
             ],
@@ -1,7 +1,21 @@
 import os
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+from app.core.cache import get_cache
 from app.core.database import SessionLocal
 from app.models.agent import SystemSettings
 
+logger = logging.getLogger(__name__)
+
+# How often a worker checks the shared settings version, and the longest it
+# trusts its snapshot if the version store is unreachable
+SETTINGS_RECHECK_SEC = float(os.getenv("BIA_SETTINGS_RECHECK_SEC", "5"))
+SETTINGS_MAX_AGE_SEC = float(os.getenv("BIA_SETTINGS_MAX_AGE_SEC", "300"))
+SETTINGS_FIELDS = ("meta_access_token", "meta_ad_account_id", "meta_app_id", "meta_app_secret", "openai_api_key")
+
 FIELD_BY_KEY = {
     "FACEBOOK_ACCESS_TOKEN": "meta_access_token",
     "meta_access_token": "meta_access_token",
@@ -25,6 +39,58 @@ ENV_BY_KEY = {
 
 
 class ConfigService:
+    """
+    System settings with a process-local snapshot.
+
+    Reads are dict lookups; the snapshot is reloaded from the database when
+    another worker bumps the shared settings version (Redis when available)
+    or when it is older than SETTINGS_MAX_AGE_SEC.
+    """
+    def __init__(self):
+        self._snapshot: Optional[Dict[str, Optional[str]]] = None
+        self._snapshot_version: Optional[str] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._version_store = get_cache("config_version", default_ttl=30 * 24 * 3600)
+
+    def _settings_snapshot(self) -> Dict[str, Optional[str]]:
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._checked_at < SETTINGS_RECHECK_SEC:
+            return snapshot
+
+        version = self._version_store.get("system_settings")
+        if snapshot is not None and version == self._snapshot_version and now - self._loaded_at < SETTINGS_MAX_AGE_SEC:
+            self._checked_at = now
+            return snapshot
+
+        with self._lock:
+            loaded: Dict[str, Optional[str]] = {}
+            db = SessionLocal()
+            try:
+                settings = self._get_singleton_settings(db)
+                if settings:
+                    loaded = {field: getattr(settings, field, None) for field in SETTINGS_FIELDS}
+            except Exception as e:
+                logger.error(f"ConfigService Error: {e}")
+                # Keep serving the last good snapshot (retried after SETTINGS_RECHECK_SEC);
+                # with none yet, nothing is cached so the next call retries
+                if snapshot is not None:
+                    self._checked_at = time.monotonic()
+                return snapshot if snapshot is not None else {}
+            finally:
+                db.close()
+            self._snapshot = loaded
+            self._snapshot_version = version
+            self._loaded_at = self._checked_at = time.monotonic()
+            return loaded
+
+    def invalidate(self):
+        """Drops the local snapshot and tells other workers to reload theirs."""
+        self._version_store.set("system_settings", uuid.uuid4().hex)
+        self._snapshot = None
+
     def _get_singleton_settings(self, db, create: bool = False, cleanup_duplicates: bool = False):
         settings_list = db.query(SystemSettings).order_by(SystemSettings.id.asc()).all()
         if not settings_list:
@@ -48,17 +114,10 @@ class ConfigService:
         key_name = key.strip()
         field_name = FIELD_BY_KEY.get(key_name)
 
-        db = SessionLocal()
-        try:
-            settings = self._get_singleton_settings(db)
-            if settings and field_name:
-                value = getattr(settings, field_name, None)
-                if value:
-                    return value
-        except Exception as e:
-            print(f"ConfigService Error: {e}")
-        finally:
-            db.close()
+        if field_name:
+            value = self._settings_snapshot().get(field_name)
+            if value:
+                return value
 
         # Fallback to Env – try the mapped key first, then common aliases
         env_key = ENV_BY_KEY.get(key_name, key_name)
@@ -107,9 +166,10 @@ class ConfigService:
                 settings.openai_api_key = normalized["openai_api_key"]
 
             db.commit()
+            self.invalidate()
             return True
         except Exception as e:
-            print(f"Error saving settings: {e}")
+            logger.error(f"Error saving settings: {e}")
             db.rollback()
             return False
         finally:
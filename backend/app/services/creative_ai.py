@@ -1,87 +1,325 @@
 import os
 import cv2
+import asyncio
+import hashlib
+import threading
 import numpy as np
 import requests
 import logging
-from typing import List, Dict, Any
-from ultralytics import YOLO
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 import pandas as pd
 from collections import Counter
 
+from app.core.database import SessionLocal
+from app.core.lazy import lazy_resource
+from app.models.creative import CreativeAnalysis
+from app.services.meta_engine.http_client import CDN_CLIENT, get_http_client
+
 logger = logging.getLogger(__name__)
 
+# Frames per model(batch) call; CPU inference amortizes well up to ~16 images
+YOLO_BATCH_SIZE = int(os.getenv("BIA_YOLO_BATCH_SIZE", "16"))
+YOLO_DEVICE = os.getenv("YOLO_DEVICE", "cpu")
+YOLO_CONFIDENCE = 0.4  # Trusted threshold
+DOWNLOAD_CONCURRENCY = int(os.getenv("BIA_CREATIVE_DOWNLOAD_CONCURRENCY", "8"))
+DECODE_WORKERS = int(os.getenv("BIA_CREATIVE_DECODE_WORKERS", "4"))
+# Shared model server (app/vision_server.py): workers send frames there instead of each loading YOLO
+VISION_SERVER_URL = os.getenv("BIA_VISION_SERVER_URL", "").rstrip("/")
+VISION_SERVER_TIMEOUT = float(os.getenv("BIA_VISION_SERVER_TIMEOUT_SEC", "60"))
+
+# Detection result of images the model could not process; never stored, so they are retried
+DETECTION_FAILED = {"objects": [], "face_count": 0, "error": "Object detection failed"}
+
+# cv2.imdecode releases the GIL, so decoding scales across threads
+_decode_pool = ThreadPoolExecutor(max_workers=DECODE_WORKERS, thread_name_prefix="creative-decode")
+
+
+def _decode_image(data: bytes) -> Optional[np.ndarray]:
+    # IMREAD_COLOR: grayscale/alpha images become 3-channel BGR like the rest of the pipeline expects
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def image_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
 class CreativeIntelligenceService:
     """
     Module A: 'The Eye' (Vision AI)
     Analyzes ad creatives to extract visual elements (objects, colors, text density)
     and correlates them with performance data.
+
+    `analyze_creatives` is the batch path: images are downloaded concurrently,
+    decoded in a thread pool and run through YOLO in batches, and every result
+    is stored by image hash so a creative reused across ads is analyzed once.
     """
-    def __init__(self):
+    def __init__(self, use_server: bool = True):
         self.model_path = os.getenv("YOLO_MODEL_PATH", "yolov8n.pt") # Default to nano model for speed
+        self.server_url = VISION_SERVER_URL if use_server else ""
+        # One inference at a time: batches already use every core
+        self._model_lock = threading.Lock()
+
+    @lazy_resource
+    def model(self):
+        """YOLO is loaded on first use (importing ultralytics alone pulls in torch)."""
         try:
+            from ultralytics import YOLO
+
             logger.info(f"Loading YOLOv8 model from {self.model_path}...")
-            self.model = YOLO(self.model_path)
+            return YOLO(self.model_path)
         except Exception as e:
             logger.error(f"Failed to load YOLO model: {e}")
-            self.model = None
+            return None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.server_url) or self.model is not None
+
+    def warm_up(self) -> Dict[str, Any]:
+        if self.server_url:
+            resp = requests.get(f"{self.server_url}/health", timeout=5)
+            resp.raise_for_status()
+            return {"mode": "server", "server": resp.json()}
+        if self.model is None:
+            raise RuntimeError("Vision Model not initialized")
+        return {"mode": "local", "model": self.model_path}
 
     def analyze_creative_from_url(self, image_url: str) -> Dict[str, Any]:
         """
         Downloads image and runs full visual analysis.
         """
-        if not self.model:
+        if not self.available:
             return {"error": "Vision Model not initialized"}
 
         # 1. Download Image
         try:
-            resp = requests.get(image_url, stream=True, timeout=10)
+            resp = requests.get(image_url, timeout=10)
             if resp.status_code != 200:
                 return {"error": f"Download failed: {resp.status_code}"}
-            
-            # Convert to numpy array for OpenCV
-            arr = np.asarray(bytearray(resp.content), dtype=np.uint8)
-            img = cv2.imdecode(arr, -1)
-            
+            data = resp.content
+        except Exception as e:
+            return {"error": f"Image processing failed: {str(e)}"}
+
+        digest = image_hash(data)
+        db = SessionLocal()
+        try:
+            stored = self._load_analyses(db, [digest])
+            if digest in stored:
+                return stored[digest]
+
+            img = _decode_image(data)
             if img is None:
                 return {"error": "Invalid image data"}
 
-        except Exception as e:
-            return {"error": f"Image processing failed: {str(e)}"}
+            # 2. Run Analysis
+            result = self._analyze_batch([img])[0]
+            if "error" not in result:
+                self._save_analyses(db, {digest: (image_url, result)})
+            return {**result, "image_hash": digest}
+        finally:
+            db.close()
+
+    async def analyze_creatives(self, image_urls: List[str], db: Optional[Session] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyzes many creatives at once. Returns {url: analysis}; analyses
+        already stored for an image hash are reused without running the model.
+        """
+        if not self.available:
+            return {url: {"error": "Vision Model not initialized"} for url in image_urls}
+
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            downloads = await self._download_all(list(dict.fromkeys(image_urls)))
+            results: Dict[str, Dict[str, Any]] = {}
+            url_hashes: Dict[str, str] = {}
+            for url, data in downloads.items():
+                if isinstance(data, dict):
+                    results[url] = data
+                else:
+                    url_hashes[url] = image_hash(data)
 
-        # 2. Run Analysis
-        return self._analyze_image_data(img)
+            # Database work runs in a thread so the event loop keeps serving requests
+            stored = await asyncio.to_thread(self._load_analyses, db, set(url_hashes.values()))
+            # One decode/inference per distinct image, even if several URLs serve it
+            pending: Dict[str, Tuple[str, bytes]] = {}
+            for url, digest in url_hashes.items():
+                if digest not in stored and digest not in pending:
+                    pending[digest] = (url, downloads[url])
+
+            loop = asyncio.get_running_loop()
+            decoded = await asyncio.gather(*(
+                loop.run_in_executor(_decode_pool, _decode_image, data) for _, data in pending.values()
+            ))
+
+            analyzed: Dict[str, Dict[str, Any]] = {}
+            valid = [(digest, img) for digest, img in zip(pending, decoded) if img is not None]
+            for digest, img in zip(pending, decoded):
+                if img is None:
+                    analyzed[digest] = {"error": "Invalid image data"}
+            if valid:
+                batch_results = await asyncio.to_thread(self._analyze_batch, [img for _, img in valid])
+                fresh = {digest: result for (digest, _), result in zip(valid, batch_results)}
+                # Failed detections are returned with their error but not stored
+                await asyncio.to_thread(self._save_analyses, db, {
+                    digest: (pending[digest][0], result) for digest, result in fresh.items() if "error" not in result
+                })
+                analyzed.update({digest: {**result, "image_hash": digest} for digest, result in fresh.items()})
+
+            for url, digest in url_hashes.items():
+                results[url] = stored.get(digest) or analyzed[digest]
+            logger.info(
+                f"Creative analysis: {len(image_urls)} urls, {len(stored)} cached, {len(valid)} analyzed"
+            )
+            return results
+        finally:
+            if own_session:
+                db.close()
+
+    async def _download_all(self, urls: List[str]) -> Dict[str, Any]:
+        """{url: bytes} or {url: {"error": ...}} for every URL."""
+        client = get_http_client(CDN_CLIENT)
+        semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+
+        async def download(url: str):
+            async with semaphore:
+                try:
+                    resp = await client.get(url, timeout=10)
+                    if resp.status_code != 200:
+                        return url, {"error": f"Download failed: {resp.status_code}"}
+                    return url, resp.content
+                except Exception as e:
+                    return url, {"error": f"Image processing failed: {str(e)}"}
+
+        return dict(await asyncio.gather(*(download(url) for url in urls)))
+
+    def _load_analyses(self, db: Session, hashes) -> Dict[str, Dict[str, Any]]:
+        if not hashes:
+            return {}
+        rows = db.query(CreativeAnalysis).filter(CreativeAnalysis.image_hash.in_(list(hashes))).all()
+        return {
+            row.image_hash: {
+                "objects": row.objects or [],
+                "colors": row.colors or [],
+                "brightness": row.brightness,
+                "text_density": row.text_density,
+                "face_count": row.face_count,
+                "image_hash": row.image_hash,
+            }
+            for row in rows
+        }
+
+    def _save_analyses(self, db: Session, analyses: Dict[str, Tuple[str, Dict[str, Any]]]) -> None:
+        """Stores analyses by image hash; hashes another worker stored concurrently are left as they are."""
+        rows = [
+            {
+                "image_hash": digest,
+                "source_url": url,
+                "objects": result["objects"],
+                "colors": result["colors"],
+                "brightness": result["brightness"],
+                "text_density": result["text_density"],
+                "face_count": result["face_count"],
+                "model_name": self.model_path,
+            }
+            for digest, (url, result) in analyses.items()
+        ]
+        if not rows:
+            return
+
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+
+            db.execute(insert(CreativeAnalysis).values(rows).on_conflict_do_nothing(index_elements=["image_hash"]))
+        else:
+            for row in rows:
+                try:
+                    with db.begin_nested():
+                        db.add(CreativeAnalysis(**row))
+                except IntegrityError:
+                    # Another worker stored the same image concurrently
+                    pass
+        db.commit()
 
     def _analyze_image_data(self, img: np.ndarray) -> Dict[str, Any]:
         """
         Internal: Runs Vision Logic on CV2 image.
         """
+        return self._analyze_batch([img])[0]
+
+    def _analyze_batch(self, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Runs YOLO in batches of YOLO_BATCH_SIZE, then the per-image color/texture analysis."""
+        detections = self._detect_objects(images)
+        return [{**detections[i], **self._visual_features(img)} for i, img in enumerate(images)]
+
+    def _detect_objects(self, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+        if self.server_url:
+            return self._detect_remote(images)
+        return self._detect_local(images)
+
+    def _detect_remote(self, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+        """Sends frames (JPEG) to the shared vision server in YOLO_BATCH_SIZE chunks."""
+        detections = [dict(DETECTION_FAILED) for _ in images]
+        for start in range(0, len(images), YOLO_BATCH_SIZE):
+            chunk = images[start:start + YOLO_BATCH_SIZE]
+            files = []
+            for offset, img in enumerate(chunk):
+                ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+                if ok:
+                    files.append(("files", (f"{start + offset}.jpg", encoded.tobytes(), "image/jpeg")))
+            try:
+                resp = requests.post(f"{self.server_url}/detect", files=files, timeout=VISION_SERVER_TIMEOUT)
+                resp.raise_for_status()
+                for name, detection in zip((f[1][0] for f in files), resp.json()["detections"]):
+                    detections[int(name.split(".")[0])] = detection
+            except Exception as e:
+                logger.error(f"Vision server detection failed: {e}")
+        return detections
+
+    def _detect_local(self, images: List[np.ndarray]) -> List[Dict[str, Any]]:
+        # A. Object Detection (YOLO)
+        detections = [dict(DETECTION_FAILED) for _ in images]
+        if self.model is None:
+            return detections
+        for start in range(0, len(images), YOLO_BATCH_SIZE):
+            chunk = images[start:start + YOLO_BATCH_SIZE]
+            try:
+                with self._model_lock:
+                    yolo_results = self.model(chunk, verbose=False, device=YOLO_DEVICE)
+            except Exception as e:
+                logger.error(f"YOLO detections failed: {e}")
+                continue
+
+            for offset, yolo_res in enumerate(yolo_results):
+                detected_classes = []
+                face_count = 0
+                for box in yolo_res.boxes:
+                    cls_id = int(box.cls[0])
+                    conf = float(box.conf[0])
+                    label = self.model.names[cls_id]
+
+                    if conf > YOLO_CONFIDENCE:
+                        detected_classes.append(label)
+                        if label == "person":
+                            face_count += 1
+
+                detections[start + offset] = {"objects": list(set(detected_classes)), "face_count": face_count}
+        return detections
+
+    def _visual_features(self, img: np.ndarray) -> Dict[str, Any]:
         results = {
-            "objects": [],
             "colors": [],
             "brightness": 0.0,
             "text_density": 0.0,
-            "face_count": 0
         }
 
-        # A. Object Detection (YOLO)
-        try:
-            yolo_res = self.model(img, verbose=False)[0]
-            
-            detected_classes = []
-            for box in yolo_res.boxes:
-                cls_id = int(box.cls[0])
-                conf = float(box.conf[0])
-                label = self.model.names[cls_id]
-                
-                if conf > 0.4: # Trusted threshold
-                    detected_classes.append(label)
-                    if label == "person":
-                        results["face_count"] += 1
-            
-            results["objects"] = list(set(detected_classes)) # Unique tags
-        except Exception as e:
-            logger.error(f"YOLO detections failed: {e}")
-
         # B. Dominant Colors (K-Means simplified)
         try:
             # Resize for speed
@@ -102,7 +340,7 @@ class CreativeIntelligenceService:
             
             # Avg Brightness
             hsv = cv2.cvtColor(small_img, cv2.COLOR_BGR2HSV)
-            results["brightness"] = np.mean(hsv[:, :, 2]) / 255.0 # 0 to 1
+            results["brightness"] = float(np.mean(hsv[:, :, 2]) / 255.0) # 0 to 1
             
         except Exception as e:
             logger.error(f"Color analysis failed: {e}")
@@ -1,13 +1,64 @@
 import os
+import hashlib
 import logging
-from typing import List, Dict, Any
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Dict, Any, Optional
 
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import OllamaEmbeddings
-from langchain_core.documents import Document
+import requests
+from langchain_core.embeddings import Embeddings
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.lazy import lazy_resource
 
 logger = logging.getLogger(__name__)
 
+# Texts per /api/embed request
+EMBED_BATCH_SIZE = int(os.getenv("BIA_EMBED_BATCH_SIZE", "64"))
+# Ads fetched from Meta per checkpointed step of the account indexing job
+INDEX_PAGE_SIZE = int(os.getenv("BIA_CREATIVE_INDEX_PAGE_SIZE", "200"))
+# Seconds without a checkpoint after which a "running" indexing job is considered dead
+INDEX_LEASE_SEC = int(os.getenv("BIA_CREATIVE_INDEX_LEASE_SEC", "1800"))
+
+# HNSW parameters, applied when the collection is created
+HNSW_METADATA = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": int(os.getenv("BIA_CHROMA_CONSTRUCTION_EF", "200")),
+    "hnsw:search_ef": int(os.getenv("BIA_CHROMA_SEARCH_EF", "100")),
+    "hnsw:M": int(os.getenv("BIA_CHROMA_M", "16")),
+}
+
+
+class OllamaBatchEmbeddings(Embeddings):
+    """
+    Ollama embeddings through /api/embed, which takes a list of inputs per
+    request (OllamaEmbeddings posts one text at a time).
+    """
+
+    def __init__(self, base_url: str, model: str, batch_size: int = EMBED_BATCH_SIZE, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.session.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": texts[start:start + self.batch_size]},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            vectors.extend(response.json()["embeddings"])
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
 class CreativeSearchService:
     """
     Semantic Search Engine for Ad Creatives.
@@ -16,65 +67,258 @@ class CreativeSearchService:
 
     def __init__(self):
         self.persist_directory = "./data/chroma_db"
-        self.collection_name = "ad_creatives_v1"
+        # v2: batched /api/embed vectors (normalized) in a cosine HNSW index
+        self.collection_name = "ad_creatives_v2"
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         self.model_name = "nomic-embed-text"  # Best open source embedding model
-        
+
+    @lazy_resource
+    def vector_store(self):
+        """Chroma + Ollama embeddings, opened on first use."""
+        from langchain_community.vectorstores import Chroma
+
         logger.info(f"Initializing CreativeSearchService with {self.model_name}...")
-        
+
         try:
-            self.embeddings = OllamaEmbeddings(
+            embeddings = OllamaBatchEmbeddings(
                 base_url=self.ollama_base_url,
                 model=self.model_name
             )
-            
-            self.vector_store = Chroma(
+
+            vector_store = Chroma(
                 collection_name=self.collection_name,
-                embedding_function=self.embeddings,
-                persist_directory=self.persist_directory
+                embedding_function=embeddings,
+                persist_directory=self.persist_directory,
+                collection_metadata=HNSW_METADATA,
             )
             logger.info("ChromaDB initialized successfully.")
-            
+            return vector_store
+
         except Exception as e:
             logger.error(f"Failed to initialize Vector Store: {e}")
-            self.vector_store = None
+            return None
+
+    def warm_up(self) -> Dict[str, Any]:
+        if self.vector_store is None:
+            raise RuntimeError("Vector Store not initialized")
+        return {"collection": self.collection_name, "model": self.model_name}
 
     def index_creative(self, creative_id: str, description: str, metadata: Dict[str, Any] = None):
         """
         Adds a creative to the vector index.
         """
+        self.index_creatives([{"creative_id": creative_id, "description": description, "metadata": metadata}])
+
+    def index_creatives(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Upserts creatives ({creative_id, description, metadata}) by creative_id.
+
+        Descriptions whose content hash is already stored are not embedded
+        again; only their metadata (e.g. performance) is refreshed. New or
+        changed texts are embedded EMBED_BATCH_SIZE at a time.
+        """
+        counts = {"indexed": 0, "updated": 0, "skipped": 0, "failed": 0}
         if not self.vector_store:
             logger.warning("Vector Store not initialized. Skipping indexing.")
-            return
+            counts["failed"] = len(items)
+            return counts
+
+        # Last occurrence wins when a creative appears twice in the batch
+        by_id = {}
+        for item in items:
+            if item.get("creative_id") and item.get("description"):
+                by_id[str(item["creative_id"])] = item
+        counts["skipped"] = len(items) - len(by_id)
+        if not by_id:
+            return counts
 
         try:
-            # Metadata must be simple types for Chroma
-            safe_metadata = metadata or {}
-            safe_metadata["creative_id"] = creative_id
-            
-            doc = Document(
-                page_content=description,
-                metadata=safe_metadata
-            )
-            
-            self.vector_store.add_documents([doc])
-            # self.vector_store.persist() # Chroma 0.4+ persists automatically or on close usually, but helpful to be aware
-            logger.info(f"Indexed creative {creative_id}")
-            
+            existing = self.vector_store.get(ids=list(by_id), include=["metadatas"])
+            stored = dict(zip(existing["ids"], existing["metadatas"]))
+        except Exception as e:
+            logger.error(f"Error reading indexed creatives: {e}")
+            counts["failed"] += len(by_id)
+            return counts
+
+        to_embed, to_update = [], []
+        for creative_id, item in by_id.items():
+            metadata = self._safe_metadata(item.get("metadata"))
+            metadata["creative_id"] = creative_id
+            metadata["content_hash"] = hashlib.sha256(item["description"].encode("utf-8")).hexdigest()
+            previous = stored.get(creative_id)
+            if previous is None or previous.get("content_hash") != metadata["content_hash"]:
+                to_embed.append((creative_id, item["description"], metadata))
+            elif previous != metadata:
+                to_update.append((creative_id, metadata))
+            else:
+                counts["skipped"] += 1
+
+        for start in range(0, len(to_embed), EMBED_BATCH_SIZE):
+            batch = to_embed[start:start + EMBED_BATCH_SIZE]
+            try:
+                # Chroma add_texts upserts by id, so re-runs never duplicate creatives
+                self.vector_store.add_texts(
+                    texts=[text for _, text, _ in batch],
+                    metadatas=[metadata for _, _, metadata in batch],
+                    ids=[creative_id for creative_id, _, _ in batch],
+                )
+                counts["indexed"] += len(batch)
+            except Exception as e:
+                logger.error(f"Error indexing {len(batch)} creatives: {e}")
+                counts["failed"] += len(batch)
+
+        if to_update:
+            try:
+                self.vector_store._collection.update(
+                    ids=[creative_id for creative_id, _ in to_update],
+                    metadatas=[metadata for _, metadata in to_update],
+                )
+                counts["updated"] += len(to_update)
+            except Exception as e:
+                logger.error(f"Error updating metadata of {len(to_update)} creatives: {e}")
+                counts["failed"] += len(to_update)
+
+        logger.info(f"Indexed creatives: {counts}")
+        return counts
+
+    def index_account(self, db: Session, ad_account_id: str = None) -> Dict[str, Any]:
+        """
+        Indexes every ad creative of an account, one Meta page at a time.
+        Progress is checkpointed after each page, so a job that fails or dies
+        midway resumes from the last cursor instead of starting over. The
+        checkpoint row is claimed with a compare-and-set on its status, so only
+        one job indexes an account at a time.
+        """
+        from app.services.meta_ads import meta_ads_service
+
+        account = ad_account_id or meta_ads_service.ad_account_id
+        if not account:
+            return {"error": "No Ad Account ID provided."}
+        if not account.startswith("act_"):
+            account = f"act_{account}"
+
+        state = self._claim_index_state(db, account)
+        if state is None:
+            return {"error": f"Creative indexing of {account} is already running."}
+
+        try:
+            while True:
+                page = meta_ads_service.get_ads_page(account, after=state.cursor, limit=INDEX_PAGE_SIZE)
+                if "error" in page:
+                    raise RuntimeError(str(page["error"]))
+
+                counts = self.index_creatives([self._ad_to_item(ad, account) for ad in page.get("data", [])])
+                if counts["failed"]:
+                    raise RuntimeError(f"{counts['failed']} creatives failed to index")
+
+                state.indexed += counts["indexed"]
+                state.updated += counts["updated"]
+                state.skipped += counts["skipped"]
+                state.heartbeat_at = datetime.now(timezone.utc)
+                next_cursor = page.get("paging", {}).get("cursors", {}).get("after")
+                if not page.get("paging", {}).get("next") or not next_cursor:
+                    state.status, state.cursor = "done", None
+                    state.finished_at = state.heartbeat_at
+                    db.commit()
+                    break
+                state.cursor = next_cursor
+                db.commit()
         except Exception as e:
-            logger.error(f"Error indexing creative {creative_id}: {e}")
+            # Keep the cursor of the last checkpointed page for the retry
+            db.rollback()
+            state.status, state.last_error = "error", str(e)
+            db.commit()
+            raise RuntimeError(f"Creative indexing of {account} stopped: {e}") from e
+
+        return {
+            "ad_account_id": account,
+            "indexed": state.indexed,
+            "updated": state.updated,
+            "skipped": state.skipped,
+        }
+
+    def _claim_index_state(self, db: Session, account: str):
+        """
+        Marks the account's checkpoint row as running and returns it, or None
+        when another job holds it (a "running" row whose heartbeat is older
+        than INDEX_LEASE_SEC is treated as abandoned and taken over). A row
+        left in "error" or "running" resumes from its cursor.
+        """
+        from app.models.creative import CreativeIndexState
 
-    def search_creatives(self, query: str, k: int = 5) -> List[Dict]:
+        query = db.query(CreativeIndexState).filter(CreativeIndexState.ad_account_id == account)
+        state = query.first()
+        if state is None:
+            try:
+                with db.begin_nested():
+                    db.add(CreativeIndexState(ad_account_id=account, status="idle"))
+            except IntegrityError:
+                pass  # Created by a concurrent job; the compare-and-set below decides
+            db.commit()
+            state = query.first()
+
+        now = datetime.now(timezone.utc)
+        previous_status = state.status
+        claim = query.filter(CreativeIndexState.status == previous_status)
+        if previous_status == "running":
+            claim = claim.filter(or_(
+                CreativeIndexState.heartbeat_at.is_(None),
+                CreativeIndexState.heartbeat_at < now - timedelta(seconds=INDEX_LEASE_SEC),
+            ))
+        claimed = claim.update({"status": "running", "heartbeat_at": now}, synchronize_session=False)
+        db.commit()
+        if not claimed:
+            return None
+
+        db.refresh(state)
+        if previous_status not in ("running", "error") or not state.cursor:
+            state.cursor = None
+            state.indexed = state.updated = state.skipped = 0
+            state.started_at, state.finished_at = now, None
+        state.last_error = None
+        db.commit()
+        return state
+
+    def search_creatives(
+        self,
+        query: str,
+        k: int = 5,
+        ad_account_id: Optional[str] = None,
+        date_from: Optional[Any] = None,
+        date_to: Optional[Any] = None,
+        min_ctr: Optional[float] = None,
+        min_roas: Optional[float] = None,
+        min_spend: Optional[float] = None,
+    ) -> List[Dict]:
         """
         Semantic search for creatives.
+        Filters are applied as Chroma metadata pre-filters, so only matching
+        vectors are searched.
         """
         if not self.vector_store:
             return []
 
+        conditions = []
+        if ad_account_id:
+            account = ad_account_id if ad_account_id.startswith("act_") else f"act_{ad_account_id}"
+            conditions.append({"ad_account_id": account})
+        if date_from:
+            conditions.append({"created_date": {"$gte": self._date_key(date_from)}})
+        if date_to:
+            conditions.append({"created_date": {"$lte": self._date_key(date_to)}})
+        for field, minimum in (("ctr", min_ctr), ("roas", min_roas), ("spend", min_spend)):
+            if minimum is not None:
+                conditions.append({field: {"$gte": float(minimum)}})
+        where = None
+        if len(conditions) == 1:
+            where = conditions[0]
+        elif conditions:
+            where = {"$and": conditions}
+
         try:
-            logger.info(f"Searching for: {query}")
-            results = self.vector_store.similarity_search_with_score(query, k=k)
-            
+            logger.info(f"Searching for: {query} (filter: {where})")
+            results = self.vector_store.similarity_search_with_score(query, k=k, filter=where)
+
             formatted_results = []
             for doc, score in results:
                 formatted_results.append({
@@ -83,11 +327,65 @@ class CreativeSearchService:
                     "metadata": doc.metadata,
                     "similarity_score": score
                 })
-                
+
             return formatted_results
-            
+
         except Exception as e:
             logger.error(f"Error during search: {e}")
             return []
 
+    def _ad_to_item(self, ad: Dict[str, Any], account: str) -> Dict[str, Any]:
+        creative = ad.get("creative") or {}
+        link_data = (creative.get("object_story_spec") or {}).get("link_data") or {}
+        feed = creative.get("asset_feed_spec") or {}
+
+        texts = [creative.get("title"), creative.get("body"), link_data.get("name"), link_data.get("message"), link_data.get("description")]
+        for key in ("titles", "bodies", "descriptions"):
+            texts.extend(entry.get("text") for entry in feed.get(key) or [])
+        seen, parts = set(), []
+        for text in texts:
+            if text and text not in seen:
+                seen.add(text)
+                parts.append(text.strip())
+
+        insights = ((ad.get("insights") or {}).get("data") or [{}])[0]
+        roas = insights.get("purchase_roas") or []
+        return {
+            "creative_id": creative.get("id"),
+            "description": "\n".join(parts),
+            "metadata": {
+                "ad_id": ad.get("id"),
+                "ad_name": ad.get("name"),
+                "ad_account_id": account,
+                "created_date": self._date_key(ad["created_time"]) if ad.get("created_time") else None,
+                "spend": self._to_float(insights.get("spend")),
+                "impressions": self._to_float(insights.get("impressions")),
+                "ctr": self._to_float(insights.get("ctr")),
+                "cpc": self._to_float(insights.get("cpc")),
+                "roas": self._to_float(roas[0].get("value")) if roas else 0.0,
+            },
+        }
+
+    def _safe_metadata(self, metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Metadata must be simple types for Chroma
+        return {
+            key: value
+            for key, value in (metadata or {}).items()
+            if isinstance(value, (str, int, float, bool))
+        }
+
+    def _date_key(self, value: Any) -> int:
+        """Dates as YYYYMMDD ints, since Chroma range filters only work on numbers."""
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value[:10])
+        if isinstance(value, (date, datetime)):
+            return value.year * 10000 + value.month * 100 + value.day
+        return int(value)
+
+    def _to_float(self, value: Any) -> float:
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
 creative_search_service = CreativeSearchService()
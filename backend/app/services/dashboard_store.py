@@ -0,0 +1,179 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.dashboard import ClientCampaignStats, DashboardCampaign
+
+logger = logging.getLogger(__name__)
+
+CAMPAIGN_FIELDS = (
+    "id", "client_id", "name", "objective", "status", "budget_total", "budget_daily",
+    "start_date", "end_date", "ad_accounts", "targeting", "creative", "metrics",
+    "created_at", "updated_at",
+)
+# ClientCampaignStats column -> campaign metrics key
+METRIC_TOTALS = {
+    "total_spend": "spend",
+    "total_impressions": "impressions",
+    "total_clicks": "clicks",
+    "total_conversions": "conversions",
+}
+
+
+class CampaignStore:
+    """
+    Dashboard campaigns in the database, indexed by (client_id, status) and
+    (client_id, created_at), plus per-client running totals.
+
+    Every write applies the campaign's contribution delta to its client's
+    ClientCampaignStats row in the same transaction (as SQL increments, so
+    concurrent writers do not lose updates). Updates and deletes lock the
+    campaign row before reading its old contribution, so two writers to the
+    same campaign cannot both apply the same delta.
+    """
+
+    def create(self, db: Session, data: Dict[str, Any]) -> Dict[str, Any]:
+        campaign = DashboardCampaign(**{field: data.get(field) for field in CAMPAIGN_FIELDS if field in data})
+        db.add(campaign)
+        self._apply(db, campaign.client_id, self._contribution(campaign), sign=1)
+        result = self._to_dict(campaign)
+        db.commit()
+        return result
+
+    def get(self, db: Session, campaign_id: str) -> Optional[Dict[str, Any]]:
+        campaign = db.get(DashboardCampaign, campaign_id)
+        return self._to_dict(campaign) if campaign else None
+
+    def update(self, db: Session, campaign_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        campaign = self._locked(db, campaign_id)
+        if campaign is None:
+            return None
+        before = self._contribution(campaign)
+        for field, value in fields.items():
+            if field in CAMPAIGN_FIELDS and field not in ("id", "client_id", "created_at"):
+                setattr(campaign, field, value)
+        campaign.updated_at = fields.get("updated_at") or datetime.now()
+        after = self._contribution(campaign)
+        self._apply(db, campaign.client_id, {key: after[key] - before[key] for key in after}, sign=1)
+        result = self._to_dict(campaign)
+        db.commit()
+        return result
+
+    def delete(self, db: Session, campaign_id: str) -> bool:
+        campaign = self._locked(db, campaign_id)
+        if campaign is None:
+            return False
+        self._apply(db, campaign.client_id, self._contribution(campaign), sign=-1)
+        db.delete(campaign)
+        db.commit()
+        return True
+
+    def _locked(self, db: Session, campaign_id: str) -> Optional[DashboardCampaign]:
+        """The campaign row, locked (SELECT ... FOR UPDATE) and reloaded until the transaction ends."""
+        return (
+            db.query(DashboardCampaign)
+            .filter_by(id=campaign_id)
+            .with_for_update()
+            .populate_existing()
+            .one_or_none()
+        )
+
+    def list(
+        self,
+        db: Session,
+        client_id: str,
+        status: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        query = db.query(DashboardCampaign).filter(DashboardCampaign.client_id == client_id)
+        if status:
+            query = query.filter(DashboardCampaign.status == status)
+            total = query.count()
+        else:
+            total = self.stats(db, client_id)["total_campaigns"]
+        rows = query.order_by(DashboardCampaign.created_at.asc()).offset(offset).limit(limit).all()
+        return [self._to_dict(row) for row in rows], total
+
+    def recent(self, db: Session, client_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        rows = (
+            db.query(DashboardCampaign)
+            .filter(DashboardCampaign.client_id == client_id)
+            .order_by(DashboardCampaign.created_at.desc())
+            .limit(limit)
+            .all()
+        )
+        return [self._to_dict(row) for row in rows]
+
+    def stats(self, db: Session, client_id: str) -> Dict[str, Any]:
+        """The client's running totals (one primary-key lookup)."""
+        row = db.get(ClientCampaignStats, client_id)
+        if row is None:
+            return {"total_campaigns": 0, "active_campaigns": 0, "paused_campaigns": 0, **{column: 0 for column in METRIC_TOTALS}}
+        return {
+            "total_campaigns": row.total_campaigns or 0,
+            "active_campaigns": row.active_campaigns or 0,
+            "paused_campaigns": row.paused_campaigns or 0,
+            **{column: getattr(row, column) or 0 for column in METRIC_TOTALS},
+        }
+
+    def rebuild_stats(self, db: Session, client_id: str) -> Dict[str, Any]:
+        """Recomputes a client's totals from its campaigns (repair tool; not needed in normal operation)."""
+        totals = {"total_campaigns": 0, "active_campaigns": 0, "paused_campaigns": 0, **{column: 0 for column in METRIC_TOTALS}}
+        for campaign in db.query(DashboardCampaign).filter(DashboardCampaign.client_id == client_id):
+            for key, value in self._contribution(campaign).items():
+                totals[key] += value
+        row = db.get(ClientCampaignStats, client_id)
+        if row is None:
+            row = ClientCampaignStats(client_id=client_id)
+            db.add(row)
+        for key, value in totals.items():
+            setattr(row, key, value)
+        db.commit()
+        return totals
+
+    def _contribution(self, campaign: DashboardCampaign) -> Dict[str, Any]:
+        metrics = campaign.metrics or {}
+        return {
+            "total_campaigns": 1,
+            "active_campaigns": 1 if campaign.status == "ACTIVE" else 0,
+            "paused_campaigns": 1 if campaign.status == "PAUSED" else 0,
+            **{column: metrics.get(key, 0) or 0 for column, key in METRIC_TOTALS.items()},
+        }
+
+    def _apply(self, db: Session, client_id: str, delta: Dict[str, Any], sign: int) -> None:
+        if not any(delta.values()):
+            return
+        if db.get(ClientCampaignStats, client_id) is None:
+            try:
+                with db.begin_nested():
+                    db.add(ClientCampaignStats(
+                        client_id=client_id,
+                        total_campaigns=0,
+                        active_campaigns=0,
+                        paused_campaigns=0,
+                        **{column: 0 for column in METRIC_TOTALS},
+                    ))
+            except IntegrityError:
+                # Another request created the row first
+                pass
+        db.query(ClientCampaignStats).filter(ClientCampaignStats.client_id == client_id).update(
+            {getattr(ClientCampaignStats, key): getattr(ClientCampaignStats, key) + sign * value for key, value in delta.items() if value},
+            synchronize_session=False,
+        )
+        stats = db.get(ClientCampaignStats, client_id)
+        if stats is not None:
+            db.expire(stats)
+
+    def _to_dict(self, campaign: DashboardCampaign) -> Dict[str, Any]:
+        data = {field: getattr(campaign, field) for field in CAMPAIGN_FIELDS}
+        for field in ("created_at", "updated_at"):
+            if isinstance(data[field], datetime):
+                data[field] = data[field].isoformat()
+        return data
+
+
+campaign_store = CampaignStore()
@@ -0,0 +1,268 @@
+import heapq
+import logging
+import os
+from datetime import date, datetime, timezone
+from operator import itemgetter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.audience import DemographicSnapshot
+from app.services.meta_engine.api import make_api_request
+
+logger = logging.getLogger(__name__)
+
+# Entries kept per snapshot; more than the dashboard shows so that accounts
+# moving into the displayed top still have a previous count to diff against
+SNAPSHOT_TOP_N = int(os.getenv("BIA_DEMOGRAPHICS_TOP_N", "50"))
+DISPLAY_TOP_N = 15
+
+AGE_GROUPS = ("13-17", "18-24", "25-34", "35-44", "45-54", "55-64", "65+")
+GENDER_INDEX = {"M": 0, "F": 1, "U": 2}
+
+# (gender_age, city, country) lifetime metrics per platform
+DEMOGRAPHIC_METRICS = {
+    "facebook": ("page_fans_gender_age", "page_fans_city", "page_fans_country"),
+    "instagram": ("audience_gender_age", "audience_city", "audience_country"),
+}
+
+
+def empty_demographics() -> Dict[str, Any]:
+    return {
+        "age": [],
+        "top_country": "N/A",
+        "top_cities": [],
+        "top_city": "N/A",
+        "top_language": "PT-BR",
+        "top_audience": "N/A",
+        "top_age_group": "N/A",
+        "countries_data": [],
+        "cities_data": [],
+        "cities_by_gender": [],
+        "cities_by_age": []
+    }
+
+
+def compact_demographics(demo_data: Dict[str, Any], platform: str) -> Optional[Dict[str, Any]]:
+    """
+    Reduces a lifetime demographics Graph response to its snapshot form:
+    top-N countries and cities (partial selection, no full sort), an
+    age x gender count matrix and the totals percentages are computed from.
+    Returns None when the response has no demographic values.
+    """
+    if not demo_data or 'data' not in demo_data:
+        return None
+
+    metrics = {}
+    for m in demo_data['data']:
+        if 'values' in m and m['values'] and 'value' in m['values'][0]:
+            metrics[m['name']] = m['values'][0]['value']
+
+    gender_age_key, city_key, country_key = DEMOGRAPHIC_METRICS.get(platform, DEMOGRAPHIC_METRICS["facebook"])
+    snapshot = {"totals": {}, "countries": [], "cities": [], "gender_age": {}}
+
+    for name, key in (("countries", country_key), ("cities", city_key)):
+        values = metrics.get(key)
+        if isinstance(values, dict) and values:
+            snapshot["totals"][name] = sum(values.values())
+            snapshot[name] = [list(item) for item in heapq.nlargest(SNAPSHOT_TOP_N, values.items(), key=itemgetter(1))]
+
+    ga_dict = metrics.get(gender_age_key)
+    if isinstance(ga_dict, dict) and ga_dict:
+        snapshot["totals"]["gender_age"] = sum(ga_dict.values())
+        for ga_str, count in ga_dict.items():
+            parts = ga_str.split('.')
+            if len(parts) == 2 and parts[0] in GENDER_INDEX:
+                gender, age = parts
+                snapshot["gender_age"].setdefault(age, [0, 0, 0])[GENDER_INDEX[gender]] = count
+
+    if not any(snapshot["totals"].values()):
+        return None
+    return snapshot
+
+
+def summarize_demographics(snapshot: Optional[Dict[str, Any]], previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Dashboard demographics from a compact snapshot. `growth` is the change in
+    count since the previous snapshot (0 when there is none).
+    """
+    demographics = empty_demographics()
+    if not snapshot:
+        return demographics
+
+    totals = snapshot.get("totals", {})
+    previous = previous or {}
+
+    # Countries
+    total_fans = totals.get("countries", 0)
+    if total_fans > 0:
+        country_list = snapshot["countries"][:DISPLAY_TOP_N]
+        previous_counts = dict(previous.get("countries", []))
+        demographics["top_country"] = country_list[0][0] if country_list else "N/A"
+        for c_code, count in country_list:
+            demographics["countries_data"].append({
+                "country": c_code,
+                "likes": count,
+                "growth": count - previous_counts[c_code] if c_code in previous_counts else 0,
+                "percentage": round((count / total_fans) * 100, 1)
+            })
+
+    # Cities
+    total_fans = totals.get("cities", 0)
+    if total_fans > 0:
+        city_list = snapshot["cities"][:DISPLAY_TOP_N]
+        previous_counts = dict(previous.get("cities", []))
+        top_city = city_list[0][0] if city_list else "N/A"
+        demographics["top_city"] = top_city.split(',')[0] if ',' in top_city else top_city
+        for city_str, count in city_list:
+            demographics["cities_data"].append({
+                "city": city_str,
+                "likes": count,
+                "growth": count - previous_counts[city_str] if city_str in previous_counts else 0,
+                "percentage": int(round((count / total_fans) * 100, 1))
+            })
+
+    # Age & Gender
+    total_fans = totals.get("gender_age", 0)
+    if total_fans > 0:
+        matrix = snapshot["gender_age"]
+        previous_matrix = previous.get("gender_age", {})
+        for age in AGE_GROUPS:
+            male, female, _ = matrix.get(age, (0, 0, 0))
+            prev_male, prev_female, _ = previous_matrix.get(age, (male, female, 0))
+            demographics["age"].append({
+                "range": age,
+                "male": int((male / total_fans) * 100),
+                "female": int((female / total_fans) * 100),
+                "male_growth": male - prev_male,
+                "female_growth": female - prev_female,
+            })
+
+        # Find top audience
+        cells = [(count, gender, age) for age, counts in matrix.items() for gender, count in zip("MFU", counts)]
+        if cells:
+            _, g, a = max(cells)
+            g_str = "Homens" if g == 'M' else "Mulheres" if g == 'F' else "ND"
+            demographics["top_audience"] = f"{g_str} {a}"
+            demographics["top_age_group"] = a
+
+    demographics["total_fans"] = totals.get("gender_age") or totals.get("countries", 0)
+    if previous.get("totals"):
+        previous_total = previous["totals"].get("gender_age") or previous["totals"].get("countries", 0)
+        demographics["total_growth"] = demographics["total_fans"] - previous_total
+    return demographics
+
+
+class DemographicsStore:
+    """
+    Daily lifetime demographic snapshots per Page / Instagram account.
+
+    Ingestion compacts the Graph response once, diffs it against the previous
+    day and stores the dashboard summary, so reads are a single indexed row
+    lookup instead of re-sorting the raw country/city dictionaries.
+    """
+
+    def today(self) -> date:
+        return datetime.now(timezone.utc).date()
+
+    def latest(self, db: Session, platform: str, account_id: str, on_or_after: Optional[date] = None) -> Optional[Dict[str, Any]]:
+        """Summary of the account's most recent snapshot (optionally not older than `on_or_after`)."""
+        row = self._latest_row(db, platform, account_id)
+        if row is None or (on_or_after and row.snapshot_date < on_or_after):
+            return None
+        return row.summary
+
+    def ingest(
+        self,
+        db: Session,
+        platform: str,
+        account_id: str,
+        demo_data: Dict[str, Any],
+        snapshot_date: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        """
+        Stores the snapshot of `demo_data` for `snapshot_date` (today by
+        default, replacing an earlier snapshot of the same day) and returns its
+        summary. Responses without demographic values are not stored.
+        """
+        snapshot = compact_demographics(demo_data, platform)
+        if snapshot is None:
+            return summarize_demographics(None)
+
+        snapshot_date = snapshot_date or self.today()
+        previous_row = self._latest_row(db, platform, account_id, before=snapshot_date)
+        previous = self._snapshot_of(previous_row) if previous_row else None
+        summary = summarize_demographics(snapshot, previous)
+
+        values = {**snapshot, "summary": summary}
+        row = self._row(db, platform, account_id, snapshot_date)
+        if row is None:
+            try:
+                with db.begin_nested():
+                    db.add(DemographicSnapshot(platform=platform, account_id=account_id, snapshot_date=snapshot_date, **values))
+            except IntegrityError:
+                # Another worker stored the day first; overwrite with ours
+                row = self._row(db, platform, account_id, snapshot_date)
+        if row is not None:
+            for key, value in values.items():
+                setattr(row, key, value)
+        db.commit()
+        return summary
+
+    def history(self, db: Session, platform: str, account_id: str, limit: int = 30) -> List[Dict[str, Any]]:
+        rows = (
+            db.query(DemographicSnapshot)
+            .filter(DemographicSnapshot.platform == platform, DemographicSnapshot.account_id == account_id)
+            .order_by(DemographicSnapshot.snapshot_date.desc())
+            .limit(limit)
+            .all()
+        )
+        return [{"date": row.snapshot_date.isoformat(), "totals": row.totals, "summary": row.summary} for row in rows]
+
+    async def ingest_accounts(self, db: Session, access_token: str, page_id: str) -> List[Dict[str, Any]]:
+        """Fetches and stores today's snapshot of a Page and of its Instagram account, if connected."""
+        accounts = [("facebook", page_id)]
+        ig_data = await make_api_request(page_id, access_token, {"fields": "instagram_business_account"})
+        if 'instagram_business_account' in ig_data:
+            accounts.append(("instagram", ig_data['instagram_business_account']['id']))
+
+        results = []
+        for platform, account_id in accounts:
+            demo_data = await make_api_request(f"{account_id}/insights", access_token, {
+                "metric": ",".join(DEMOGRAPHIC_METRICS[platform]),
+                "period": "lifetime",
+            })
+            if 'error' in demo_data:
+                logger.error(f"Demographics fetch failed for {platform} {account_id}: {demo_data['error']}")
+                results.append({"platform": platform, "account_id": account_id, "error": str(demo_data['error'])})
+                continue
+            summary = self.ingest(db, platform, account_id, demo_data)
+            results.append({"platform": platform, "account_id": account_id, "total_fans": summary.get("total_fans", 0)})
+        return results
+
+    def _row(self, db: Session, platform: str, account_id: str, snapshot_date: date) -> Optional[DemographicSnapshot]:
+        return (
+            db.query(DemographicSnapshot)
+            .filter(
+                DemographicSnapshot.platform == platform,
+                DemographicSnapshot.account_id == account_id,
+                DemographicSnapshot.snapshot_date == snapshot_date,
+            )
+            .first()
+        )
+
+    def _latest_row(self, db: Session, platform: str, account_id: str, before: Optional[date] = None) -> Optional[DemographicSnapshot]:
+        query = db.query(DemographicSnapshot).filter(
+            DemographicSnapshot.platform == platform,
+            DemographicSnapshot.account_id == account_id,
+        )
+        if before is not None:
+            query = query.filter(DemographicSnapshot.snapshot_date < before)
+        return query.order_by(DemographicSnapshot.snapshot_date.desc()).first()
+
+    def _snapshot_of(self, row: DemographicSnapshot) -> Dict[str, Any]:
+        return {"totals": row.totals or {}, "countries": row.countries or [], "cities": row.cities or [], "gender_age": row.gender_age or {}}
+
+
+demographics_store = DemographicsStore()
@@ -0,0 +1,233 @@
+import hashlib
+import logging
+import os
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.models.heatmap import HeatmapCell, HeatmapTile
+from app.services.ai_engine.census_client import census_client
+from app.services.ai_engine.opportunity_grid import DEFAULT_COMPETITORS, DEFAULT_CPM
+from app.services.ai_engine.scorer import VERDICTS, market_scorer
+
+logger = logging.getLogger(__name__)
+
+# Resolution 8 cells are ~0.74 km²; tiles group every cell under the same
+# parent TILE_OFFSET levels up (7^3 = ~343 cells per tile)
+DEFAULT_RESOLUTION = int(os.getenv("BIA_HEATMAP_RESOLUTION", "8"))
+TILE_OFFSET = int(os.getenv("BIA_HEATMAP_TILE_OFFSET", "3"))
+# Part of every cell's input hash: bump when MarketScorer formulas change
+SCORER_VERSION = "1"
+
+
+def _h3():
+    try:
+        import h3  # Optional: only needed for heatmaps
+    except ImportError:
+        raise RuntimeError("H3 heatmaps require the h3 package (pip install h3)")
+    return h3
+
+
+class HeatmapService:
+    """
+    Opportunity heatmap of a city on the H3 grid.
+
+    `build_city` tessellates the city's census tracts into H3 cells, joins
+    population/income (split across the cells each tract covers) and
+    competitor counts, batch-scores every cell with MarketScorer and stores
+    the result. Cells whose inputs did not change are left untouched, and
+    only tiles containing changed cells get a new ETag, so map clients keep
+    using their cached tiles.
+    """
+
+    def build_city(
+        self,
+        db: Session,
+        city_id: str,
+        resolution: int = DEFAULT_RESOLUTION,
+        strategy: str = "blue_ocean",
+        competitor_points: Optional[Iterable[Tuple[float, float]]] = None,
+    ) -> Dict[str, Any]:
+        h3 = _h3()
+        city_id = str(city_id)
+        index = census_client.index_store.get(city_id)
+        if index is None:
+            return {"error": f"No census index for city {city_id}. Load it first (census_client.load_city_index)."}
+
+        cells = self._join_census(h3, index, resolution)
+        if not cells:
+            return {"error": f"No census tracts to tessellate for city {city_id}."}
+
+        h3_ids = list(cells)
+        population = np.array([cells[c][0] for c in h3_ids])
+        households = np.array([cells[c][1] for c in h3_ids])
+        income_sum = np.array([cells[c][2] for c in h3_ids])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            income = np.where(households > 0, income_sum / households, 0.0)
+
+        if competitor_points is None:
+            competitors = np.full(len(h3_ids), DEFAULT_COMPETITORS)
+        else:
+            counts = Counter(h3.latlng_to_cell(float(lat), float(lng), resolution) for lat, lng in competitor_points)
+            competitors = np.array([counts.get(c, 0) for c in h3_ids])
+
+        cell_area = h3.average_hexagon_area(resolution, unit="km^2")
+        scores = market_scorer.calculate_scores_batch(
+            income_level=income,
+            population_density=population / cell_area,
+            competitor_count=competitors,
+            meta_reach=population * 0.6,
+            meta_cpm=DEFAULT_CPM,
+            strategy=strategy,
+        )
+
+        tile_resolution = max(0, resolution - TILE_OFFSET)
+        rows = {}
+        for i, cell in enumerate(h3_ids):
+            row = {
+                "h3_index": cell,
+                "tile_id": h3.cell_to_parent(cell, tile_resolution),
+                "population": int(round(population[i])),
+                "households": int(round(households[i])),
+                "avg_income": round(float(income[i]), 2),
+                "competitors": int(competitors[i]),
+                "score": float(scores["total_score"][i]),
+                "verdict_code": int(scores["verdict_code"][i]),
+            }
+            row["input_hash"] = self._input_hash(strategy, row)
+            rows[cell] = row
+
+        stats = self._store(db, city_id, strategy, resolution, rows)
+        logger.info(
+            f"Heatmap {city_id}/{strategy}/r{resolution}: {len(rows)} cells, "
+            f"{stats['changed']} changed, {stats['removed']} removed, {stats['tiles_changed']} tiles updated"
+        )
+        return {"city_id": city_id, "strategy": strategy, "resolution": resolution, "cells": len(rows), **stats}
+
+    def _join_census(self, h3, index, resolution: int) -> Dict[str, List[float]]:
+        """cell -> [population, households, income * households] summed over tracts."""
+        cells: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+        for i in range(len(index)):
+            covered = set()
+            for ring in index.rings(i):
+                poly = h3.LatLngPoly([(float(lat), float(lng)) for lng, lat in ring])
+                covered.update(h3.polygon_to_cells(poly, resolution))
+            if not covered:
+                # Tracts smaller than a cell contain no cell center
+                lat, lng = index.centroids[i]
+                covered.add(h3.latlng_to_cell(float(lat), float(lng), resolution))
+
+            share = 1.0 / len(covered)
+            population = float(index.population[i]) * share
+            households = float(index.households[i]) * share
+            income = float(index.avg_income[i])
+            for cell in covered:
+                acc = cells[cell]
+                acc[0] += population
+                acc[1] += households
+                acc[2] += income * households
+        return cells
+
+    def _input_hash(self, strategy: str, row: Dict[str, Any]) -> str:
+        key = f"{SCORER_VERSION}|{strategy}|{row['population']}|{row['households']}|{row['avg_income']:.2f}|{row['competitors']}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def _store(self, db: Session, city_id: str, strategy: str, resolution: int, rows: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        scope = {"city_id": city_id, "strategy": strategy, "resolution": resolution}
+        existing = {
+            h3_index: (row_id, input_hash, tile_id)
+            for row_id, h3_index, input_hash, tile_id in db.query(
+                HeatmapCell.id, HeatmapCell.h3_index, HeatmapCell.input_hash, HeatmapCell.tile_id
+            ).filter_by(**scope)
+        }
+
+        inserts, updates, changed_tiles = [], [], set()
+        for cell, row in rows.items():
+            current = existing.get(cell)
+            if current is None:
+                inserts.append({**scope, **row})
+            elif current[1] != row["input_hash"]:
+                updates.append({"id": current[0], **row})
+            else:
+                continue
+            changed_tiles.add(row["tile_id"])
+
+        removed = [(row_id, tile_id) for cell, (row_id, _, tile_id) in existing.items() if cell not in rows]
+        changed_tiles.update(tile_id for _, tile_id in removed)
+
+        if inserts:
+            db.bulk_insert_mappings(HeatmapCell, inserts)
+        if updates:
+            db.bulk_update_mappings(HeatmapCell, updates)
+        if removed:
+            db.query(HeatmapCell).filter(HeatmapCell.id.in_([row_id for row_id, _ in removed])).delete(synchronize_session=False)
+
+        self._update_tiles(db, scope, rows, changed_tiles)
+        db.commit()
+        return {"changed": len(inserts) + len(updates), "removed": len(removed), "tiles_changed": len(changed_tiles)}
+
+    def _update_tiles(self, db: Session, scope: Dict[str, Any], rows: Dict[str, Dict[str, Any]], tile_ids: set) -> None:
+        if not tile_ids:
+            return
+        members: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        for cell, row in rows.items():
+            if row["tile_id"] in tile_ids:
+                members[row["tile_id"]].append((cell, row["input_hash"]))
+
+        tiles = {
+            tile.tile_id: tile
+            for tile in db.query(HeatmapTile).filter_by(**scope).filter(HeatmapTile.tile_id.in_(list(tile_ids)))
+        }
+        for tile_id in tile_ids:
+            cells = sorted(members.get(tile_id, []))
+            tile = tiles.get(tile_id)
+            if not cells:
+                if tile is not None:
+                    db.delete(tile)
+                continue
+            etag = hashlib.sha1("".join(f"{c}:{h};" for c, h in cells).encode("utf-8")).hexdigest()[:20]
+            if tile is None:
+                db.add(HeatmapTile(**scope, tile_id=tile_id, etag=etag, cell_count=len(cells)))
+            else:
+                tile.etag = etag
+                tile.cell_count = len(cells)
+
+    def list_tiles(self, db: Session, city_id: str, strategy: str = "blue_ocean", resolution: int = DEFAULT_RESOLUTION) -> List[Dict[str, Any]]:
+        tiles = db.query(HeatmapTile).filter_by(city_id=str(city_id), strategy=strategy, resolution=resolution).all()
+        return [{"tile_id": t.tile_id, "etag": t.etag, "cell_count": t.cell_count} for t in tiles]
+
+    def get_tile_etag(self, db: Session, city_id: str, tile_id: str, strategy: str, resolution: int) -> Optional[str]:
+        tile = db.query(HeatmapTile.etag).filter_by(
+            city_id=str(city_id), strategy=strategy, resolution=resolution, tile_id=tile_id
+        ).first()
+        return tile[0] if tile else None
+
+    def get_tile(self, db: Session, city_id: str, tile_id: str, strategy: str = "blue_ocean", resolution: int = DEFAULT_RESOLUTION) -> Optional[Dict[str, Any]]:
+        """Scored cells of one tile (columnar), or None if the tile does not exist."""
+        etag = self.get_tile_etag(db, city_id, tile_id, strategy, resolution)
+        if etag is None:
+            return None
+        cells = (
+            db.query(HeatmapCell.h3_index, HeatmapCell.score, HeatmapCell.verdict_code, HeatmapCell.population, HeatmapCell.avg_income)
+            .filter_by(city_id=str(city_id), strategy=strategy, resolution=resolution, tile_id=tile_id)
+            .order_by(HeatmapCell.h3_index)
+            .all()
+        )
+        return {
+            "city_id": str(city_id),
+            "strategy": strategy,
+            "resolution": resolution,
+            "tile_id": tile_id,
+            "etag": etag,
+            "verdicts": list(VERDICTS),
+            "h3": [c[0] for c in cells],
+            "score": [c[1] for c in cells],
+            "verdict_code": [c[2] for c in cells],
+            "population": [c[3] for c in cells],
+            "avg_income": [c[4] for c in cells],
+        }
+
+
+heatmap_service = HeatmapService()
@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.insights_warehouse import InsightsDaily, InsightsSyncState
+from app.services.meta_ads import meta_ads_service
+
+logger = logging.getLogger(__name__)
+
+# Meta keeps restating the last few days (late conversions, invalid traffic)
+RESTATEMENT_DAYS = int(os.getenv("BIA_INSIGHTS_RESTATEMENT_DAYS", "3"))
+BACKFILL_DAYS = int(os.getenv("BIA_INSIGHTS_BACKFILL_DAYS", "90"))
+# Non-final days are only trusted for this long after a sync
+FRESHNESS_SEC = int(os.getenv("BIA_INSIGHTS_FRESHNESS_SEC", "3900"))
+SYNC_LEVELS = tuple(
+    level.strip() for level in os.getenv("BIA_INSIGHTS_SYNC_LEVELS", "account,campaign,ad").split(",") if level.strip()
+)
+
+INSIGHTS_FIELDS = (
+    "account_id,campaign_id,campaign_name,adset_id,adset_name,ad_id,ad_name,"
+    "date_start,date_stop,spend,impressions,reach,frequency,clicks,cpc,ctr,cpm,"
+    "actions,action_values,cost_per_action_type,outbound_clicks"
+)
+
+
+class InsightsWarehouseService:
+    """
+    Local store of daily Meta insights, kept current by an incremental sync.
+
+    Services read from here instead of calling Meta on every request; the read
+    methods return None when the requested range is not covered (or not fresh),
+    so callers can fall back to a live fetch.
+    """
+
+    def sync_account(
+        self,
+        db: Session,
+        ad_account_id: str = None,
+        level: str = "campaign",
+        backfill_days: int = BACKFILL_DAYS,
+    ) -> Dict[str, Any]:
+        """
+        Fetches every day that is not final yet for one account/level and upserts it.
+        """
+        account = self._normalize_account(ad_account_id)
+        if not account:
+            return {"error": "No Ad Account ID provided."}
+
+        today = date.today()
+        state = self._get_state(db, account, level)
+        if state and state.final_through:
+            since = state.final_through + timedelta(days=1)
+        else:
+            since = today - timedelta(days=backfill_days)
+        final_through = today - timedelta(days=RESTATEMENT_DAYS + 1)
+
+        params = {
+            "level": level,
+            "fields": INSIGHTS_FIELDS,
+            "time_range": json.dumps({"since": since.isoformat(), "until": today.isoformat()}),
+            "time_increment": "1",
+            "limit": 500,
+        }
+        days = (today - since).days + 1
+
+        try:
+            rows = list(meta_ads_service.iter_insights(account, params, days=days))
+        except Exception as e:
+            logger.error(f"Insights sync failed for {account}/{level}: {e}")
+            return {"error": str(e)}
+
+        upserted = self._upsert_rows(db, account, level, rows, since, today, final_through)
+
+        if not state:
+            state = InsightsSyncState(ad_account_id=account, level=level)
+            db.add(state)
+        state.backfill_since = min(state.backfill_since or since, since)
+        state.final_through = max(final_through, since - timedelta(days=1))
+        state.synced_through = today
+        state.last_synced_at = datetime.now(timezone.utc)
+        db.commit()
+
+        logger.info(f"Insights warehouse synced {account}/{level}: {upserted} rows ({since} -> {today})")
+        return {"ad_account_id": account, "level": level, "since": since, "until": today, "rows": upserted}
+
+    def sync_all(self, db: Session, ad_account_id: str = None) -> List[Dict[str, Any]]:
+        return [self.sync_account(db, ad_account_id, level) for level in SYNC_LEVELS]
+
+    def get_daily_rows(
+        self,
+        db: Session,
+        level: str,
+        since: date,
+        until: date,
+        ad_account_id: str = None,
+        object_id: str = None,
+        campaign_id: str = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Returns Meta-shaped daily rows for the range, or None if the warehouse
+        cannot answer it (range not synced, or recent days gone stale).
+        """
+        account = self._normalize_account(ad_account_id)
+        if not account or not self._is_covered(db, account, level, since, until):
+            return None
+
+        query = db.query(InsightsDaily).filter(
+            InsightsDaily.ad_account_id == account,
+            InsightsDaily.level == level,
+            InsightsDaily.date_start >= since,
+            InsightsDaily.date_start <= until,
+        )
+        if object_id:
+            query = query.filter(InsightsDaily.object_id == object_id)
+        if campaign_id:
+            query = query.filter(InsightsDaily.campaign_id == campaign_id)
+
+        return [row.raw_metrics for row in query.order_by(InsightsDaily.date_start.asc()).all()]
+
+    def get_recent_rows(self, db: Session, level: str, days: int, **filters) -> Optional[List[Dict[str, Any]]]:
+        """Rows for the last `days` complete days (Meta's last_Nd presets exclude today)."""
+        until = date.today() - timedelta(days=1)
+        since = until - timedelta(days=days - 1)
+        return self.get_daily_rows(db, level, since, until, **filters)
+
+    def _is_covered(self, db: Session, account: str, level: str, since: date, until: date) -> bool:
+        state = self._get_state(db, account, level)
+        if not state or not state.backfill_since or not state.synced_through:
+            return False
+        if since < state.backfill_since or until > state.synced_through:
+            return False
+        if state.final_through and until <= state.final_through:
+            return True
+        last_synced = state.last_synced_at
+        if last_synced is None:
+            return False
+        if last_synced.tzinfo is None:
+            last_synced = last_synced.replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - last_synced).total_seconds() <= FRESHNESS_SEC
+
+    def _upsert_rows(
+        self,
+        db: Session,
+        account: str,
+        level: str,
+        rows: List[Dict[str, Any]],
+        since: date,
+        until: date,
+        final_through: date,
+    ) -> int:
+        existing = {
+            (row.object_id, row.date_start): row
+            for row in db.query(InsightsDaily).filter(
+                InsightsDaily.ad_account_id == account,
+                InsightsDaily.level == level,
+                InsightsDaily.date_start >= since,
+                InsightsDaily.date_start <= until,
+            )
+        }
+
+        count = 0
+        for raw in rows:
+            object_id = self._object_id(raw, level, account)
+            day = self._parse_date(raw.get("date_start"))
+            if not object_id or not day:
+                continue
+
+            record = existing.get((object_id, day))
+            if record is None:
+                record = InsightsDaily(ad_account_id=account, level=level, object_id=object_id, date_start=day)
+                db.add(record)
+                existing[(object_id, day)] = record
+
+            record.object_name = raw.get(f"{level}_name") or raw.get("account_name")
+            record.campaign_id = raw.get("campaign_id")
+            record.spend = self._safe_float(raw.get("spend"))
+            record.impressions = int(self._safe_float(raw.get("impressions")))
+            record.reach = int(self._safe_float(raw.get("reach")))
+            record.frequency = self._safe_float(raw.get("frequency"))
+            record.clicks = int(self._safe_float(raw.get("clicks")))
+            record.ctr = self._safe_float(raw.get("ctr"))
+            record.cpc = self._safe_float(raw.get("cpc"))
+            record.cpm = self._safe_float(raw.get("cpm"))
+            record.actions = raw.get("actions") or []
+            record.action_values = raw.get("action_values") or []
+            record.raw_metrics = raw
+            record.is_final = day <= final_through
+            count += 1
+
+        db.flush()
+        return count
+
+    def _get_state(self, db: Session, account: str, level: str) -> Optional[InsightsSyncState]:
+        return (
+            db.query(InsightsSyncState)
+            .filter(InsightsSyncState.ad_account_id == account, InsightsSyncState.level == level)
+            .first()
+        )
+
+    def _normalize_account(self, ad_account_id: Optional[str]) -> Optional[str]:
+        account = ad_account_id or meta_ads_service.ad_account_id
+        if not account:
+            return None
+        return account if account.startswith("act_") else f"act_{account}"
+
+    def _object_id(self, raw: Dict[str, Any], level: str, account: str) -> Optional[str]:
+        if level == "account":
+            return raw.get("account_id") or account
+        return raw.get(f"{level}_id")
+
+    def _parse_date(self, value: Any) -> Optional[date]:
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            return None
+
+    def _safe_float(self, value: Any) -> float:
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return 0.0
+
+
+insights_warehouse_service = InsightsWarehouseService()
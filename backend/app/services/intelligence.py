@@ -1,6 +1,9 @@
 import os
 import json
+import time
+import asyncio
 import logging
+from datetime import datetime, timezone
 from typing import List, Dict, Any, Optional
 
 from langchain_core.prompts import ChatPromptTemplate
@@ -10,11 +13,24 @@ from pydantic import BaseModel, Field
 
 from app.services.meta_ads import meta_ads_service
 from app.services.financial import financial_service
-from app.models.agent import AgentMode, Recommendation, AutonomousAction
+from app.services.insights_warehouse import insights_warehouse_service
+from app.services.meta_engine.rate_limiter import rate_limiter
+from app.models.agent import AgentMode, Recommendation, AutonomousAction, AgentAccountRun
 from app.core.database import SessionLocal
+from app.core.lazy import lazy_resource
 
 logger = logging.getLogger(__name__)
 
+# Ad accounts the hourly cycle analyzes (comma separated); all active accounts of the token when unset
+AGENT_AD_ACCOUNTS = [account.strip() for account in os.getenv("BIA_AGENT_AD_ACCOUNTS", "").split(",") if account.strip()]
+# Accounts per Celery task; the scheduler fans partitions out across workers
+AGENT_ACCOUNTS_PER_TASK = int(os.getenv("BIA_AGENT_ACCOUNTS_PER_TASK", "10"))
+# Concurrent campaign fetches and LLM calls within one task
+AGENT_FETCH_CONCURRENCY = int(os.getenv("BIA_AGENT_FETCH_CONCURRENCY", "8"))
+AGENT_LLM_CONCURRENCY = int(os.getenv("BIA_AGENT_LLM_CONCURRENCY", "2"))
+# Large accounts are split into several prompts of at most this many campaigns
+AGENT_CAMPAIGNS_PER_PROMPT = int(os.getenv("BIA_AGENT_CAMPAIGNS_PER_PROMPT", "40"))
+
 # --- Pydantic Models for Structured Output ---
 
 class StrategicAction(BaseModel):
@@ -47,36 +63,172 @@ class StrategistAgent:
     def __init__(self):
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         self.model_name = os.getenv("BIA_AI_MODEL", "qwen2.5-coder:7b")
-        
+
+    @lazy_resource
+    def llm(self):
         logger.info(f"Initializing StrategistAgent with Local Ollama ({self.model_name})...")
-        self.llm = ChatOllama(model=self.model_name, base_url=self.ollama_base_url, temperature=0.1)
+        return ChatOllama(model=self.model_name, base_url=self.ollama_base_url, temperature=0.1)
 
-    async def analyze_performance(self, mode: str):
+    def warm_up(self) -> Dict[str, Any]:
+        self.llm
+        return {"model": self.model_name}
+
+    async def analyze_performance(self, mode: str, ad_account_id: str = None):
         """
-        Main loop for performance analysis.
+        Main loop for performance analysis of one ad account (the configured one by default).
         """
-        logger.info(f"Agent starting analysis in {mode} mode...")
-        
-        # 1. Gather Data
-        campaigns = meta_ads_service.get_campaigns()
-        if "error" in campaigns:
-            logger.error(f"Could not fetch campaigns for analysis: {campaigns['error']}")
-            return
+        runs = await self.analyze_accounts([ad_account_id], mode)
+        return runs[0]
+
+    def managed_accounts(self) -> List[str]:
+        """Ad accounts the periodic cycle covers: BIA_AGENT_AD_ACCOUNTS, else every active account."""
+        if AGENT_AD_ACCOUNTS:
+            return list(AGENT_AD_ACCOUNTS)
+        accounts = meta_ads_service.list_active_ad_accounts()
+        if "error" in accounts or not accounts.get("data"):
+            logger.warning(f"Could not list ad accounts, using the configured one: {accounts.get('error', 'none active')}")
+            return [meta_ads_service.ad_account_id] if meta_ads_service.ad_account_id else []
+        return [account["id"] for account in accounts["data"]]
+
+    async def analyze_accounts(self, ad_account_ids: List[Optional[str]], mode: str, cycle_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Analyzes several ad accounts concurrently. Campaign fetches are bounded
+        by AGENT_FETCH_CONCURRENCY and go through the Graph API rate limiter
+        (inside background_priority they yield to dashboard calls); LLM calls
+        are bounded by AGENT_LLM_CONCURRENCY. Every account run is recorded in
+        agent_account_runs.
+        """
+        logger.info(f"Agent starting analysis of {len(ad_account_ids)} ad account(s) in {mode} mode...")
+        fetch_slots = asyncio.Semaphore(AGENT_FETCH_CONCURRENCY)
+        llm_slots = asyncio.Semaphore(AGENT_LLM_CONCURRENCY)
+        return await asyncio.gather(*[
+            self._analyze_account(ad_account_id, mode, fetch_slots, llm_slots, cycle_id)
+            for ad_account_id in ad_account_ids
+        ])
 
-        # 2. Build Context for IA
-        context = self._prepare_context(campaigns)
-        
-        # 3. Ask the Strategist (LangChain)
-        decision = await self._ask_strategist(context)
-        
-        if not decision:
+    async def _analyze_account(
+        self,
+        ad_account_id: Optional[str],
+        mode: str,
+        fetch_slots: asyncio.Semaphore,
+        llm_slots: asyncio.Semaphore,
+        cycle_id: str = None,
+    ) -> Dict[str, Any]:
+        started_at = datetime.now(timezone.utc)
+        started = time.monotonic()
+        run = {
+            "cycle_id": cycle_id,
+            "ad_account_id": ad_account_id or meta_ads_service.ad_account_id,
+            "mode": mode,
+            "status": "ok",
+            "error": None,
+            "campaigns": 0,
+            "prompts": 0,
+            "actions": 0,
+            "fetch_seconds": 0.0,
+            "llm_seconds": 0.0,
+        }
+        try:
+            # 1. Gather Data (requests-based client: run in threads)
+            account = run["ad_account_id"] or ""
+            async with fetch_slots:
+                # Wait for quota headroom here rather than in a blocked thread; the
+                # client's own per-request acquire_sync then paces the pages, and
+                # both see this task's (background) priority
+                await rate_limiter.acquire(f"{account if account.startswith('act_') else f'act_{account}'}/campaigns")
+                campaigns = await asyncio.to_thread(meta_ads_service.get_campaigns, ad_account_id)
+                if "error" not in campaigns:
+                    await asyncio.to_thread(self._apply_warehouse_totals, campaigns, ad_account_id)
+            run["fetch_seconds"] = round(time.monotonic() - started, 3)
+
+            if "error" in campaigns:
+                logger.error(f"Could not fetch campaigns of {run['ad_account_id']} for analysis: {campaigns['error']}")
+                run.update(status="error", error=str(campaigns["error"]))
+            else:
+                # 2. Build Context for IA, one prompt per chunk of campaigns
+                rows = self._campaign_rows(campaigns)
+                chunks = [rows[i:i + AGENT_CAMPAIGNS_PER_PROMPT] for i in range(0, len(rows), AGENT_CAMPAIGNS_PER_PROMPT)]
+                run.update(campaigns=len(rows), prompts=len(chunks))
+
+                # 3. Ask the Strategist (LangChain)
+                llm_started = time.monotonic()
+                decisions = await asyncio.gather(*[self._ask_with_slot(llm_slots, json.dumps(chunk, indent=2)) for chunk in chunks])
+                run["llm_seconds"] = round(time.monotonic() - llm_started, 3)
+
+                actions = [action for decision in decisions if decision for action in decision.get("actions", [])]
+                if chunks and not any(decisions):
+                    run.update(status="error", error="Strategist analysis failed")
+
+                # 4. Process Decision based on Mode
+                if actions:
+                    run["actions"] = await asyncio.to_thread(self._execute_decision, {"actions": actions}, mode)
+        except Exception as e:
+            logger.error(f"Strategist run for {run['ad_account_id']} failed: {e}")
+            run.update(status="error", error=str(e))
+
+        run["duration_seconds"] = round(time.monotonic() - started, 3)
+        logger.info(
+            f"Strategist run for {run['ad_account_id']}: {run['campaigns']} campaigns in {run['prompts']} prompt(s), "
+            f"{run['actions']} action(s), {run['duration_seconds']}s"
+        )
+        await asyncio.to_thread(self._record_run, run, started_at)
+        return run
+
+    async def _ask_with_slot(self, llm_slots: asyncio.Semaphore, context: str) -> Optional[Dict]:
+        async with llm_slots:
+            return await self._ask_strategist(context)
+
+    def _record_run(self, run: Dict[str, Any], started_at: datetime):
+        db = SessionLocal()
+        try:
+            db.add(AgentAccountRun(started_at=started_at, **run))
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Could not record strategist run for {run['ad_account_id']}: {e}")
+        finally:
+            db.close()
+
+    def _warehouse_rows(self, level: str, days: int, ad_account_id: str = None) -> Optional[List[Dict[str, Any]]]:
+        """Daily rows from the local insights warehouse, or None if it can't cover the range."""
+        db = SessionLocal()
+        try:
+            return insights_warehouse_service.get_recent_rows(db, level, days, ad_account_id=ad_account_id)
+        except Exception as e:
+            logger.warning(f"Insights warehouse unavailable, falling back to Meta: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _apply_warehouse_totals(self, campaigns: Dict, ad_account_id: str = None):
+        """Replace per-campaign nested insights with 30-day totals from the warehouse when available."""
+        rows = self._warehouse_rows("campaign", days=30, ad_account_id=ad_account_id)
+        if not rows:
             return
 
-        # 4. Process Decision based on Mode
-        self._execute_decision(decision, mode)
+        totals: Dict[str, Dict[str, float]] = {}
+        for row in rows:
+            bucket = totals.setdefault(row.get("campaign_id"), {"spend": 0.0, "clicks": 0.0, "impressions": 0.0})
+            for key in bucket:
+                bucket[key] += float(row.get(key) or 0)
+
+        for camp in campaigns.get("data", []):
+            total = totals.get(camp.get("id"))
+            if not total:
+                continue
+            clicks, impressions = total["clicks"], total["impressions"]
+            camp["insights"] = {"data": [{
+                "spend": round(total["spend"], 2),
+                "clicks": int(clicks),
+                "cpc": round(total["spend"] / clicks, 2) if clicks else 0,
+                "ctr": round(clicks / impressions * 100, 2) if impressions else 0,
+            }]}
 
     def _prepare_context(self, campaigns: Dict):
         """Build a clean string for the LLM."""
+        return json.dumps(self._campaign_rows(campaigns), indent=2)
+
+    def _campaign_rows(self, campaigns: Dict) -> List[Dict[str, Any]]:
+        """The campaign fields the Strategist sees."""
         data_summary = []
         for camp in campaigns.get("data", []):
             insights = camp.get("insights", {"data": [{}]})["data"][0]
@@ -90,7 +242,7 @@ class StrategistAgent:
                 "clicks": insights.get("clicks", 0)
             })
         
-        return json.dumps(data_summary, indent=2)
+        return data_summary
 
     async def _ask_strategist(self, context: str) -> Optional[Dict]:
         """Use LangChain to analyze campaign data."""
@@ -122,8 +274,10 @@ class StrategistAgent:
             logger.error(f"Error in Strategist analysis: {e}")
             return None
 
-    def _execute_decision(self, decision: Dict, mode: str):
+    def _execute_decision(self, decision: Dict, mode: str) -> int:
+        """Applies or records the decided actions; returns how many were not NOTHING."""
         db = SessionLocal()
+        executed = 0
         try:
             actions = decision.get("actions", [])
             for action in actions:
@@ -135,6 +289,7 @@ class StrategistAgent:
 
                 if act_type == "NOTHING":
                     continue
+                executed += 1
 
                 if mode == AgentMode.AUTOMATIC.value:
                     # Execute directly on Meta
@@ -162,6 +317,7 @@ class StrategistAgent:
                     db.add(rec)
             
             db.commit()
+            return executed
         finally:
             db.close()
 
@@ -169,8 +325,9 @@ class StrategistAgent:
         """
         Analyzes the financial health of the ad account using 'True ROI' logic.
         """
-        # Fetch last 30 days insights
-        insights = meta_ads_service.get_historical_insights(days=30)
+        # Fetch last 30 days insights (local warehouse first, Meta as fallback)
+        rows = self._warehouse_rows("account", days=30)
+        insights = {"data": rows} if rows is not None else meta_ads_service.get_historical_insights(days=30)
         
         total_spend = 0.0
         total_conversions = 0 
@@ -315,8 +472,17 @@ class StrategistAgent:
         Identifies ads with dropping CTR or high frequency (Saturation/Fatigue).
         Returns a list of 'Fatigued Assets' and suggested Organic Replacements.
         """
-        # 1. Fetch Daily Data
-        data = meta_ads_service.get_ad_creative_insights(days=3)
+        # 1. Fetch Daily Data (local warehouse first, Meta as fallback)
+        rows = self._warehouse_rows("ad", days=3)
+        if rows is not None:
+            # The warehouse holds every ad; keep the ones still delivering, like the Meta query does
+            active = meta_ads_service.get_delivering_ad_ids()
+            if "error" in active:
+                rows = None
+            else:
+                active_ids = set(active["data"])
+                rows = [row for row in rows if row.get("ad_id") in active_ids]
+        data = {"data": rows} if rows is not None else meta_ads_service.get_ad_creative_insights(days=3)
         if "error" in data:
             return {"error": data["error"]}
             
@@ -1,15 +1,37 @@
+import os
+import re
 import logging
 import asyncio
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
+from app.core.cache import get_cache
 from app.services.meta_api import meta_service
 from app.services.interactions_ai import interactions_ai_service
 
 logger = logging.getLogger(__name__)
 
+COMMENTS_FETCH_CONCURRENCY = int(os.getenv("BIA_COMMENTS_FETCH_CONCURRENCY", "8"))
+# Comments are immutable once classified; keep results for a week
+TRIAGE_CACHE_TTL_SEC = int(os.getenv("BIA_TRIAGE_CACHE_TTL_SEC", str(7 * 24 * 3600)))
+# Short praise ("lindo!", "amei") is classified by keywords instead of the model
+QUICK_TRIAGE_MAX_CHARS = int(os.getenv("BIA_QUICK_TRIAGE_MAX_CHARS", "40"))
+# Whole words only: "topo" or "legalidade" are not praise
+PRAISE_WORDS = {"lindo", "linda", "lindos", "lindas", "top", "amei", "legal"}
+# Any of these sends the comment to the model ("nada legal", "não achei lindo", "top, mas chegou quebrado")
+NEGATION_WORDS = {"não", "nao", "nem", "nunca", "jamais", "nada", "sem", "mas", "porém", "porem"}
+COMPLAINT_WORDS = {
+    "ruim", "péssimo", "pessimo", "péssima", "pessima", "horrível", "horrivel", "pior", "lixo",
+    "problema", "defeito", "quebrado", "quebrou", "atraso", "atrasado", "demora", "golpe",
+    "reclamação", "reclamacao", "decepção", "decepcao", "decepcionado", "decepcionada", "caro",
+}
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
 class InteractionsManager:
     """
     Manages fetching and classifying social interactions (Comments & DMs).
     """
+    def __init__(self):
+        # v2: drops results of the old substring shortcut that labeled complaints as praise
+        self._triage_cache = get_cache("comment_triage_v2", TRIAGE_CACHE_TTL_SEC, max_entries=5000)
 
     async def get_latest_interactions(self, page_id: str = None) -> Dict:
         """
@@ -38,44 +60,42 @@ class InteractionsManager:
                         if p['id'] == pid:
                             p['is_paid'] = True
 
+            # 3. Fetch comments for every post concurrently
+            post_comments = await self._fetch_all_comments(all_posts)
+
+            # 4. Triage: cache -> keyword short-circuit -> batched LLM
+            pending = []
+            for post, comments_data in zip(all_posts, post_comments):
+                for comment in comments_data.get("data", []):
+                    pending.append((post, comment))
+            analyses = await self._triage_comments(pending)
+
             comments = []
-            
-            for post in all_posts:
-                post_id = post.get("id")
+            for post, comment in pending:
                 is_paid_source = post.get("is_paid", False)
-                post_message = post.get("message", "No Context")
-                
-                # Fetch comments for this post
-                post_comments = meta_service.get_post_comments(post_id)
-                
-                for comment in post_comments.get("data", []):
-                    # Classify sentiment/intent using LangChain AI
-                    comment_text = comment.get("message", "")
-                    
-                    # Call AI Service (Async)
-                    ai_analysis = await interactions_ai_service.analyze_interaction(comment_text, post_message)
-                    
-                    # Extract fields with defaults
-                    intent = ai_analysis.get("intent", "other")
-                    priority = ai_analysis.get("priority_score", 0)
-                    
-                    # Tagging Logic
-                    sentiment_tag = intent.upper()
-                    
-                    # Force "PAID" sentiment if intent is HOT/WARM and source is Paid
-                    if is_paid_source and priority > 5: 
-                         sentiment_tag = f"PAID {intent.upper()}"
-                    
-                    comments.append({
-                        "id": comment.get("id"),
-                        "message": comment.get("message"),
-                        "from_name": comment.get("from", {}).get("name", "Unknown"),
-                        "created_time": comment.get("created_time"),
-                        "sentiment": sentiment_tag,
-                        "source": "paid" if is_paid_source else "organic",
-                        "ai_reply": ai_analysis.get("suggested_reply"),
-                        "priority": priority
-                    })
+                ai_analysis = analyses.get(comment.get("id")) or {}
+
+                # Extract fields with defaults
+                intent = ai_analysis.get("intent", "other")
+                priority = ai_analysis.get("priority_score", 0)
+
+                # Tagging Logic
+                sentiment_tag = intent.upper()
+
+                # Force "PAID" sentiment if intent is HOT/WARM and source is Paid
+                if is_paid_source and priority > 5:
+                     sentiment_tag = f"PAID {intent.upper()}"
+
+                comments.append({
+                    "id": comment.get("id"),
+                    "message": comment.get("message"),
+                    "from_name": comment.get("from", {}).get("name", "Unknown"),
+                    "created_time": comment.get("created_time"),
+                    "sentiment": sentiment_tag,
+                    "source": "paid" if is_paid_source else "organic",
+                    "ai_reply": ai_analysis.get("suggested_reply"),
+                    "priority": priority
+                })
             
             return {"comments": comments, "messages": []} # DMs require stricter permissions
             
@@ -83,6 +103,89 @@ class InteractionsManager:
             logger.error(f"Error fetching interactions: {e}")
             return {"error": str(e)}
 
+    async def _fetch_all_comments(self, posts: List[Dict]) -> List[Dict]:
+        """Fetches comments for every post in parallel (bounded), keeping post order."""
+        semaphore = asyncio.Semaphore(COMMENTS_FETCH_CONCURRENCY)
+
+        async def fetch(post: Dict) -> Dict:
+            async with semaphore:
+                try:
+                    return await asyncio.to_thread(meta_service.get_post_comments, post.get("id"))
+                except Exception as e:
+                    logger.warning(f"Could not fetch comments for post {post.get('id')}: {e}")
+                    return {"data": []}
+
+        return await asyncio.gather(*(fetch(post) for post in posts))
+
+    async def _triage_comments(self, pending: List[Tuple[Dict, Dict]]) -> Dict[str, Dict]:
+        """
+        Classifies comments, keyed by comment id. Already classified comments come
+        from the cache, obvious ones from the keyword classifier, and the rest are
+        sent to the LLM in batches.
+        """
+        analyses: Dict[str, Dict] = {}
+        to_model: List[Dict[str, str]] = []
+
+        for post, comment in pending:
+            comment_id = comment.get("id")
+            if not comment_id or comment_id in analyses:
+                continue
+            cached = self._triage_cache.get(comment_id)
+            if cached is not None:
+                analyses[comment_id] = cached
+                continue
+
+            text = comment.get("message", "") or ""
+            quick = self._quick_analysis(text)
+            if quick is not None:
+                analyses[comment_id] = quick
+                self._triage_cache.set(comment_id, quick)
+                continue
+
+            to_model.append({
+                "id": comment_id,
+                "text": text,
+                "post_context": post.get("message", "No Context"),
+            })
+
+        if to_model:
+            logger.info(f"Triage: {len(analyses)} comments resolved without the model, {len(to_model)} sent in batches")
+            model_results = await interactions_ai_service.analyze_batch(to_model)
+            for comment_id, analysis in model_results.items():
+                analyses[comment_id] = analysis
+                if "error" not in analysis:
+                    self._triage_cache.set(comment_id, analysis)
+
+        return analyses
+
+    def _quick_analysis(self, text: str) -> Optional[Dict]:
+        """Keyword short-circuit for comments the LLM would not add anything to."""
+        stripped = text.strip()
+        if not stripped:
+            return {"sentiment": "neutral", "intent": "other", "suggested_reply": "", "priority_score": 0, "source": "keyword"}
+        if len(stripped) <= QUICK_TRIAGE_MAX_CHARS and self._is_plain_praise(stripped):
+            return {
+                "sentiment": "positive",
+                "intent": "other",
+                "suggested_reply": "Obrigado pelo carinho! 💙",
+                "priority_score": 1,
+                "source": "keyword",
+            }
+        return None
+
+    def _is_plain_praise(self, text: str) -> bool:
+        """
+        Short comment with a praise word and nothing that could change its
+        meaning: no negation, complaint, question or sales/support keyword.
+        """
+        if "?" in text:
+            return False
+        words = set(_WORD_RE.findall(text.lower()))
+        if not words & PRAISE_WORDS or words & (NEGATION_WORDS | COMPLAINT_WORDS):
+            return False
+        # Purchase or support intent goes to the model even when phrased as praise
+        return self._classify_intent_legacy(text) not in ("HOT", "WARM")
+
     def _classify_intent_legacy(self, text: str) -> str:
         """
         Uses simple heuristic or AI to classify intent.
@@ -1,12 +1,16 @@
 import os
+import json
+import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_community.chat_models import ChatOllama
 from pydantic import BaseModel, Field
 
+from app.core.lazy import lazy_resource
+
 logger = logging.getLogger(__name__)
 
 # 1. Define the desired output structure (Type-safe)
@@ -16,6 +20,12 @@ class CommentAnalysis(BaseModel):
     suggested_reply: str = Field(description="A short, polite, and engaging reply in Portuguese (BR).")
     priority_score: int = Field(description="1 to 10, where 10 is an urgent sales opportunity or critical complaint.")
 
+class CommentBatchItem(CommentAnalysis):
+    id: str = Field(description="The id of the comment being analyzed, copied exactly from the input.")
+
+class CommentBatchAnalysis(BaseModel):
+    results: List[CommentBatchItem] = Field(description="One analysis per input comment, in the same order.")
+
 class InteractionsAI:
     """
     AI Service for analyzing social media interactions using LangChain.
@@ -23,10 +33,6 @@ class InteractionsAI:
     def __init__(self):
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         self.model_name = os.getenv("BIA_AI_MODEL", "qwen2.5-coder:7b")
-        
-        logger.info(f"Initializing InteractionsAI with Local Ollama ({self.model_name})")
-        # Enforce Open Source Qwen2.5
-        self.llm = ChatOllama(model=self.model_name, base_url=self.ollama_base_url, temperature=0)
 
         # Initialize Parser
         self.parser = JsonOutputParser(pydantic_object=CommentAnalysis)
@@ -37,8 +43,33 @@ class InteractionsAI:
             ("user", "Comentário: {comment_text}\nContexto do Post: {post_context}\n\n{format_instructions}")
         ])
 
-        # Create Chain
-        self.analysis_chain = self.prompt | self.llm | self.parser
+        # Batched triage: N comments per LLM call, a few calls in flight
+        self.batch_size = int(os.getenv("BIA_TRIAGE_BATCH_SIZE", "10"))
+        self.batch_concurrency = int(os.getenv("BIA_TRIAGE_LLM_CONCURRENCY", "2"))
+        self.batch_parser = JsonOutputParser(pydantic_object=CommentBatchAnalysis)
+        self.batch_prompt = ChatPromptTemplate.from_messages([
+            ("system", "Você é o assistente de triagem de mídia social do bia. Analise cada comentário recebido com precisão. Responda APENAS em JSON."),
+            ("user", "Comentários (JSON, cada um com id, texto e contexto do post):\n{comments_json}\n\n{format_instructions}")
+        ])
+
+    @lazy_resource
+    def llm(self):
+        logger.info(f"Initializing InteractionsAI with Local Ollama ({self.model_name})")
+        # Enforce Open Source Qwen2.5
+        return ChatOllama(model=self.model_name, base_url=self.ollama_base_url, temperature=0)
+
+    @lazy_resource
+    def analysis_chain(self):
+        return self.prompt | self.llm | self.parser
+
+    @lazy_resource
+    def batch_chain(self):
+        return self.batch_prompt | self.llm | self.batch_parser
+
+    def warm_up(self) -> Dict[str, Any]:
+        self.analysis_chain
+        self.batch_chain
+        return {"model": self.model_name}
 
     async def analyze_interaction(self, comment_text: str, post_context: str = "Post genérico") -> Dict[str, Any]:
         """
@@ -64,5 +95,55 @@ class InteractionsAI:
                 "error": str(e)
             }
 
+    async def analyze_batch(self, items: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyzes many comments with one LLM call per `batch_size` comments.
+        `items` are dicts with id, text and post_context. Returns analyses keyed by
+        comment id; comments the model skipped are retried one by one.
+        """
+        if not items:
+            return {}
+
+        semaphore = asyncio.Semaphore(max(1, self.batch_concurrency))
+        chunks = [items[i:i + self.batch_size] for i in range(0, len(items), max(1, self.batch_size))]
+
+        async def run_chunk(chunk: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+            async with semaphore:
+                return await self._analyze_chunk(chunk)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        for chunk_result in await asyncio.gather(*(run_chunk(chunk) for chunk in chunks)):
+            results.update(chunk_result)
+        return results
+
+    async def _analyze_chunk(self, chunk: List[Dict[str, str]]) -> Dict[str, Dict[str, Any]]:
+        payload = [
+            {"id": item["id"], "texto": item.get("text", ""), "contexto": item.get("post_context", "")}
+            for item in chunk
+        ]
+        analyses: Dict[str, Dict[str, Any]] = {}
+        try:
+            logger.info(f"Analyzing batch of {len(chunk)} comments...")
+            result = await self.batch_chain.ainvoke({
+                "comments_json": json.dumps(payload, ensure_ascii=False),
+                "format_instructions": self.batch_parser.get_format_instructions()
+            })
+            rows = result.get("results", []) if isinstance(result, dict) else result
+            for row in rows or []:
+                if isinstance(row, dict) and row.get("id"):
+                    analyses[str(row.pop("id"))] = row
+        except Exception as e:
+            logger.error(f"Error in batched AI analysis, falling back to single calls: {e}")
+
+        missing = [item for item in chunk if item["id"] not in analyses]
+        if missing:
+            singles = await asyncio.gather(*(
+                self.analyze_interaction(item.get("text", ""), item.get("post_context", "Post genérico"))
+                for item in missing
+            ))
+            for item, analysis in zip(missing, singles):
+                analyses[item["id"]] = analysis
+        return analyses
+
 # Singleton instance
 interactions_ai_service = InteractionsAI()
@@ -1,11 +1,22 @@
 
 import os
+import math
+import time
 import requests
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, RetryError
+from app.services.meta_engine.response_cache import response_cache, invalidates_cache, split_graph_url
+from app.services.meta_engine.rate_limiter import rate_limiter, THROTTLE_ERROR_CODES
 
 logger = logging.getLogger(__name__)
 
+# Above this many estimated rows, insights are pulled through an async AdReportRun
+INSIGHTS_ASYNC_ROW_THRESHOLD = int(os.getenv("META_INSIGHTS_ASYNC_ROW_THRESHOLD", "2000"))
+INSIGHTS_ASYNC_TIMEOUT_SEC = float(os.getenv("META_INSIGHTS_ASYNC_TIMEOUT_SEC", "600"))
+INSIGHTS_ASYNC_PAGE_SIZE = int(os.getenv("META_INSIGHTS_ASYNC_PAGE_SIZE", "500"))
+
 class MetaAdsService:
     """
     Service for interacting with Meta Marketing API (Ads Manager).
@@ -65,15 +76,170 @@ class MetaAdsService:
 
         return str(root_error)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), retry=retry_if_exception_type(requests.exceptions.RequestException))
     def _make_request(self, method, url, params=None, json=None):
         """
-        Centralized request handler with Retry logic.
+        Centralized request handler. Identical concurrent GETs share one call and
+        are cached briefly; writes invalidate the cache.
+        """
+        endpoint, query = split_graph_url(url, params)
+        if method == "GET":
+            return response_cache.fetch_sync(
+                self.access_token, endpoint, query,
+                lambda: self._send_request(method, url, params, json),
+            )
+
+        result = self._send_request(method, url, params, json)
+        if invalidates_cache(method, endpoint):
+            response_cache.invalidate(f"{method} {endpoint}")
+        return result
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), retry=retry_if_exception_type(requests.exceptions.RequestException))
+    def _send_request(self, method, url, params=None, json=None):
+        """
+        Sends one request with Retry logic, scheduled by the shared Graph API rate limiter.
         """
+        endpoint, _ = split_graph_url(url)
+        rate_limiter.acquire_sync(endpoint)
         response = requests.request(method, url, headers=self._get_headers(), params=params, json=json, timeout=30)
+        rate_limiter.record_headers(response.headers, endpoint)
+        if response.status_code >= 400:
+            try:
+                error_code = response.json().get("error", {}).get("code")
+            except Exception:
+                error_code = None
+            if error_code in THROTTLE_ERROR_CODES:
+                rate_limiter.record_throttle(error_code, endpoint)
         response.raise_for_status()
         return response.json()
 
+    def iter_edges(self, url, params=None, max_items: int = None):
+        """
+        Yields every row of a paginated edge, following `paging.next`.
+
+        The next page is requested in a background thread while the caller
+        consumes the current one. Stops after `max_items` rows when given.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        # Prefetches keep the caller's request priority (see background_priority)
+        context = contextvars.copy_context()
+        pending = executor.submit(context.run, self._make_request, "GET", url, params)
+        yielded = 0
+        try:
+            while pending is not None:
+                page = pending.result()
+                pending = None
+                rows = page.get("data", [])
+                next_url = page.get("paging", {}).get("next")
+
+                if next_url and rows and (max_items is None or yielded + len(rows) < max_items):
+                    # `next` already carries every query param, including the cursor
+                    pending = executor.submit(context.run, self._make_request, "GET", next_url)
+
+                for row in rows:
+                    if max_items is not None and yielded >= max_items:
+                        return
+                    yielded += 1
+                    yield row
+        finally:
+            if pending is not None:
+                pending.cancel()
+            executor.shutdown(wait=False)
+
+    def _estimate_insights_rows(self, target_account: str, level: str, days: int, time_increment) -> int:
+        """
+        Rough row count for an insights query: time buckets x objects at `level`.
+        """
+        increment = int(time_increment) if str(time_increment).isdigit() else days
+        buckets = max(1, math.ceil(days / max(1, increment)))
+        if level in (None, "", "account"):
+            return buckets
+
+        try:
+            data = self._make_request(
+                "GET",
+                f"{self.BASE_URL}/{target_account}/{level}s",
+                params={"summary": "total_count", "limit": 1},
+            )
+            objects = int(data.get("summary", {}).get("total_count", 0))
+        except Exception as e:
+            logger.warning(f"Could not count {level}s for {target_account}, assuming large: {e}")
+            return INSIGHTS_ASYNC_ROW_THRESHOLD + 1
+        return buckets * max(1, objects)
+
+    def _run_async_insights(self, target_account: str, params: dict):
+        """
+        Creates an AdReportRun, polls it to completion with backoff and yields result rows.
+        """
+        run = self._make_request("POST", f"{self.BASE_URL}/{target_account}/insights", params=params)
+        report_run_id = run.get("report_run_id")
+        if not report_run_id:
+            raise RuntimeError(f"Meta did not return a report_run_id: {run}")
+        logger.info(f"Started async insights report {report_run_id} for {target_account}")
+
+        delay = 1.0
+        deadline = time.monotonic() + INSIGHTS_ASYNC_TIMEOUT_SEC
+        while True:
+            status = self._make_request(
+                "GET",
+                f"{self.BASE_URL}/{report_run_id}",
+                params={"fields": "async_status,async_percent_completion"},
+            )
+            async_status = status.get("async_status")
+            if async_status == "Job Completed":
+                break
+            if async_status in ("Job Failed", "Job Skipped"):
+                raise RuntimeError(f"Async insights report {report_run_id} ended with status '{async_status}'")
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"Async insights report {report_run_id} did not finish in {INSIGHTS_ASYNC_TIMEOUT_SEC}s")
+
+            logger.debug(f"Report {report_run_id}: {status.get('async_percent_completion', 0)}% ({async_status})")
+            time.sleep(delay)
+            delay = min(delay * 2, 15.0)
+
+        yield from self.iter_edges(
+            f"{self.BASE_URL}/{report_run_id}/insights",
+            params={"limit": INSIGHTS_ASYNC_PAGE_SIZE},
+        )
+
+    def iter_insights(self, target_account: str, params: dict, days: int):
+        """
+        Streams insights rows, choosing the synchronous edge or an async report run.
+
+        Small queries use the sync `/insights` edge. Large ones (estimated rows above
+        INSIGHTS_ASYNC_ROW_THRESHOLD) use an AdReportRun. A failed sync call falls
+        back to async, and a failed async run falls back to sync.
+        """
+        estimated_rows = self._estimate_insights_rows(
+            target_account, params.get("level", "account"), days, params.get("time_increment", days)
+        )
+        use_async = estimated_rows > INSIGHTS_ASYNC_ROW_THRESHOLD
+        logger.info(f"Insights for {target_account}: ~{estimated_rows} rows, using {'async' if use_async else 'sync'} mode")
+
+        if use_async:
+            streamed = 0
+            try:
+                for row in self._run_async_insights(target_account, params):
+                    streamed += 1
+                    yield row
+                return
+            except Exception as e:
+                # Rows already streamed cannot be taken back, so only fall back before the first one
+                if streamed:
+                    raise
+                logger.warning(f"Async insights failed for {target_account}, falling back to sync: {e}")
+            yield from self.iter_edges(f"{self.BASE_URL}/{target_account}/insights", params=params)
+            return
+
+        rows = []
+        try:
+            # Buffer the sync walk so a timeout halfway never yields duplicate rows
+            rows = list(self.iter_edges(f"{self.BASE_URL}/{target_account}/insights", params=params))
+        except Exception as e:
+            logger.warning(f"Sync insights failed for {target_account}, retrying as async report: {e}")
+            yield from self._run_async_insights(target_account, params)
+            return
+        yield from rows
+
     def list_ad_accounts(self):
         """
         List all Ad Accounts the user has access to.
@@ -93,9 +259,26 @@ class MetaAdsService:
             logger.error(f"Error fetching ad accounts: {e}")
             return {"error": self._normalize_meta_error(e)}
 
-    def get_campaigns(self, account_id: str = None):
+    def list_active_ad_accounts(self, max_items: int = 1000):
         """
-        Get all campaigns for a specific ad account.
+        All active Ad Accounts (account_status 1) the user has access to, following pagination.
+        """
+        if not self.access_token:
+            return {"error": "Missing Access Token"}
+
+        url = f"{self.BASE_URL}/me/adaccounts"
+        params = {"fields": "name,account_id,account_status", "limit": 100}
+
+        try:
+            accounts = self.iter_edges(url, params=params, max_items=max_items)
+            return {"data": [account for account in accounts if account.get("account_status") == 1]}
+        except Exception as e:
+            logger.error(f"Error fetching ad accounts: {e}")
+            return {"error": self._normalize_meta_error(e)}
+
+    def get_campaigns(self, account_id: str = None, max_items: int = 1000):
+        """
+        Get all campaigns for a specific ad account (up to `max_items`, following pagination).
         """
         target_account = account_id or self.ad_account_id
         if not target_account:
@@ -117,7 +300,7 @@ class MetaAdsService:
         }
 
         try:
-            return self._make_request("GET", url, params=params)
+            return {"data": list(self.iter_edges(url, params=params, max_items=max_items))}
         except Exception as e:
             logger.error(f"Error fetching campaigns for {target_account}: {e}")
             return {"error": self._normalize_meta_error(e)}
@@ -190,8 +373,6 @@ class MetaAdsService:
         if not target_account.startswith("act_"):
             target_account = f"act_{target_account}"
 
-        url = f"{self.BASE_URL}/{target_account}/insights"
-        
         # We fetch month by month or as a pre-set range
         params = {
             "date_preset": "maximum" if days > 900 else ("last_year" if days > 90 else "last_90d"),
@@ -201,7 +382,7 @@ class MetaAdsService:
         }
 
         try:
-            return self._make_request("GET", url, params=params)
+            return {"data": list(self.iter_insights(target_account, params, days=days))}
         except Exception as e:
             logger.error(f"Error fetching historical insights for {target_account}: {e}")
             return {"error": self._normalize_meta_error(e)}
@@ -242,6 +423,36 @@ class MetaAdsService:
             logger.error(f"Error fetching ad posts: {e}")
             return []
 
+    def get_ads_page(self, account_id: str = None, after: str = None, limit: int = 100):
+        """
+        One page of an account's ads with creative text and lifetime performance.
+        Returns the raw Graph page; `paging.cursors.after` resumes the walk.
+        """
+        target_account = account_id or self.ad_account_id
+        if not target_account:
+            return {"error": "No Ad Account ID provided."}
+
+        if not target_account.startswith("act_"):
+            target_account = f"act_{target_account}"
+
+        url = f"{self.BASE_URL}/{target_account}/ads"
+        params = {
+            "fields": (
+                "id,name,created_time,"
+                "creative{id,name,title,body,object_story_spec,asset_feed_spec},"
+                "insights.date_preset(maximum){spend,impressions,clicks,ctr,cpc,purchase_roas}"
+            ),
+            "limit": limit,
+        }
+        if after:
+            params["after"] = after
+
+        try:
+            return self._make_request("GET", url, params=params)
+        except Exception as e:
+            logger.error(f"Error fetching ads for {target_account}: {e}")
+            return {"error": self._normalize_meta_error(e)}
+
     def get_ad_creative_insights(self, days: int = 3):
         """
         Fetch daily insights for all ACTIVE ads to detect fatigue.
@@ -253,7 +464,6 @@ class MetaAdsService:
         if not target_account.startswith("act_"):
             target_account = f"act_{target_account}"
             
-        url = f"{self.BASE_URL}/{target_account}/insights"
         params = {
             "level": "ad",
             "date_preset": "last_3d", 
@@ -264,9 +474,30 @@ class MetaAdsService:
         }
         
         try:
-            return self._make_request("GET", url, params=params)
+            return {"data": list(self.iter_insights(target_account, params, days=days))}
         except Exception as e:
             logger.error(f"Error fetching ad insights: {e}")
             return {"error": self._normalize_meta_error(e)}
 
+    def get_delivering_ad_ids(self, max_items: int = 5000):
+        """
+        IDs of the account's ads that are currently delivering (effective_status ACTIVE,
+        which includes limited delivery) - the ad set get_ad_creative_insights covers.
+        """
+        target_account = self.ad_account_id
+        if not target_account:
+            return {"data": []}
+
+        if not target_account.startswith("act_"):
+            target_account = f"act_{target_account}"
+
+        url = f"{self.BASE_URL}/{target_account}/ads"
+        params = {"fields": "id", "effective_status": '["ACTIVE"]', "limit": 500}
+
+        try:
+            return {"data": [ad["id"] for ad in self.iter_edges(url, params=params, max_items=max_items)]}
+        except Exception as e:
+            logger.error(f"Error fetching active ads: {e}")
+            return {"error": self._normalize_meta_error(e)}
+
 meta_ads_service = MetaAdsService()
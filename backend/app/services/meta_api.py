@@ -3,6 +3,7 @@ import facebook
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 import requests
+from app.services.meta_engine.response_cache import response_cache, invalidates_cache, split_graph_url
 
 load_dotenv()
 
@@ -29,16 +30,31 @@ class MetaService:
             return None
         return facebook.GraphAPI(access_token=token)
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), retry=retry_if_exception_type(requests.exceptions.RequestException))
     def _make_request(self, method, url, params=None):
         """
         Resilient HTTP request handler.
+        Identical concurrent GETs share one call and are cached briefly.
         """
-        params = params or {}
+        params = dict(params or {})
         if "access_token" not in params:
             token = self._get_access_token()
             if token:
                 params["access_token"] = token
+
+        endpoint, query = split_graph_url(url, params)
+        if method == "GET":
+            return response_cache.fetch_sync(
+                params.get("access_token"), endpoint, query,
+                lambda: self._send_request(method, url, params),
+            )
+
+        result = self._send_request(method, url, params)
+        if invalidates_cache(method, endpoint):
+            response_cache.invalidate(f"{method} {endpoint}")
+        return result
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10), retry=retry_if_exception_type(requests.exceptions.RequestException))
+    def _send_request(self, method, url, params):
         response = requests.request(method, url, params=params, timeout=30)
         response.raise_for_status()
         return response.json()
@@ -136,6 +152,7 @@ class MetaService:
                 connection_name="feed",
                 message=message
             )
+            response_cache.invalidate(f"post to {page_id}/feed")
             return response
         except facebook.GraphAPIError as e:
             return {"error": str(e)}
@@ -153,6 +170,7 @@ class MetaService:
                 caption=message,
                 album_path=f"{page_id}/photos"
             )
+            response_cache.invalidate(f"post to {page_id}/photos")
             return response
         except facebook.GraphAPIError as e:
             return {"error": str(e)}
@@ -1,15 +1,16 @@
 """Ad and Creative-related functionality for Meta Ads API."""
 
 import json
+import asyncio
 from typing import Optional, Dict, Any, List
-import io
-from PIL import Image as PILImage
 import os
 import time
 
 from .api import meta_api_tool, make_api_request
+from .pagination import collect_edges
 from .accounts import get_ad_accounts
-from .utils import download_image, try_multiple_download_methods, ad_creative_images, extract_creative_image_urls
+from .utils import try_multiple_download_methods, extract_creative_image_urls
+from .image_cache import image_cache
 
 # Dummy Image class for typing compatibility since mcp is removed
 class Image:
@@ -25,7 +26,7 @@ ENABLE_SAVE_AD_IMAGE_LOCALLY = bool(os.environ.get("META_ADS_ENABLE_SAVE_AD_IMAG
 
 @meta_api_tool
 async def get_ads(account_id: str, access_token: Optional[str] = None, limit: int = 10, 
-                 campaign_id: str = "", adset_id: str = "") -> str:
+                 campaign_id: str = "", adset_id: str = "", max_items: int = 0) -> str:
     """
     Get ads for a Meta Ads account with optional filtering.
     
@@ -35,6 +36,8 @@ async def get_ads(account_id: str, access_token: Optional[str] = None, limit: in
         limit: Maximum number of ads to return (default: 10)
         campaign_id: Optional campaign ID to filter by
         adset_id: Optional ad set ID to filter by
+        max_items: If > 0, follow pagination cursors and return up to this many items in one response
+                   (limit then acts as the page size). Default 0 returns a single page.
     """
     # Require explicit account_id
     if not account_id:
@@ -62,7 +65,11 @@ async def get_ads(account_id: str, access_token: Optional[str] = None, limit: in
             "limit": limit
         }
 
-    data = await make_api_request(endpoint, access_token, params)
+    if max_items:
+        # Walk paging cursors instead of returning only the first page
+        data = await collect_edges(endpoint, access_token, params, max_items=max_items)
+    else:
+        data = await make_api_request(endpoint, access_token, params)
     
     return json.dumps(data, indent=2)
 
@@ -192,13 +199,14 @@ async def get_ad_creatives(ad_id: str, access_token: Optional[str] = None) -> st
 
 
 @meta_api_tool
-async def get_ad_image(ad_id: str, access_token: Optional[str] = None) -> Image:
+async def get_ad_image(ad_id: str, access_token: Optional[str] = None, thumbnail: bool = False) -> Image:
     """
     Get, download, and visualize a Meta ad image in one step. Useful to see the image in the LLM.
     
     Args:
         ad_id: Meta Ads ad ID
         access_token: Meta API access token (optional - will use cached token if not provided)
+        thumbnail: Return a small JPEG thumbnail instead of the full-size image (default: False)
     
     Returns:
         The ad image ready for direct visual analysis
@@ -309,25 +317,19 @@ async def get_ad_image(ad_id: str, access_token: Optional[str] = None) -> Image:
             if not image_url:
                 return "Error: No image URLs found in creative"
             
-            # Download the image directly
+            # Download the image directly (served from the image cache when seen before)
             print(f"Downloading image from direct URL: {image_url}")
-            image_bytes = await download_image(image_url)
+            cached = await image_cache.get_image(image_url)
             
-            if not image_bytes:
+            if not cached:
                 return "Error: Failed to download image from direct URL"
             
             try:
-                # Convert bytes to PIL Image
-                img = PILImage.open(io.BytesIO(image_bytes))
-                
-                # Convert to RGB if needed
-                if img.mode != "RGB":
-                    img = img.convert("RGB")
-                    
-                # Create a byte stream of the image data
-                byte_arr = io.BytesIO()
-                img.save(byte_arr, format="JPEG")
-                img_bytes = byte_arr.getvalue()
+                # RGB JPEG rendition (or thumbnail), converted once per image and cached
+                if thumbnail:
+                    img_bytes = await image_cache.get_thumbnail(cached.sha256)
+                else:
+                    img_bytes = await image_cache.get_jpeg(cached.sha256)
                 
                 # Return as an Image object that LLM can directly analyze
                 return Image(data=img_bytes, format="jpeg")
@@ -337,53 +339,51 @@ async def get_ad_image(ad_id: str, access_token: Optional[str] = None) -> Image:
     
     print(f"Found image hashes: {image_hashes}")
     
-    # Now fetch image data using adimages endpoint with specific format
-    image_endpoint = f"act_{account_id}/adimages"
-    
-    # Format the hashes parameter exactly as in our successful curl test
-    hashes_str = f'["{image_hashes[0]}"]'  # Format first hash only, as JSON string array
-    
-    image_params = {
-        "fields": "hash,url,width,height,name,status",
-        "hashes": hashes_str
-    }
-    
-    print(f"Requesting image data with params: {image_params}")
-    image_data = await make_api_request(image_endpoint, access_token, image_params)
-    
-    if "error" in image_data:
-        return f"Error: Failed to get image data - {json.dumps(image_data)}"
-    
-    if "data" not in image_data or not image_data["data"]:
-        return "Error: No image data returned from API"
-    
-    # Get the first image URL
-    first_image = image_data["data"][0]
-    image_url = first_image.get("url")
-    
-    if not image_url:
-        return "Error: No valid image URL found"
-    
-    print(f"Downloading image from URL: {image_url}")
+    # An image hash identifies its content, so a cached copy needs no API call at all
+    cached = await image_cache.get_image(None, image_hashes[0])
     
-    # Download the image
-    image_bytes = await download_image(image_url)
+    if not cached:
+        # Now fetch image data using adimages endpoint with specific format
+        image_endpoint = f"act_{account_id}/adimages"
+        
+        # Format the hashes parameter exactly as in our successful curl test
+        hashes_str = f'["{image_hashes[0]}"]'  # Format first hash only, as JSON string array
+        
+        image_params = {
+            "fields": "hash,url,width,height,name,status",
+            "hashes": hashes_str
+        }
+        
+        print(f"Requesting image data with params: {image_params}")
+        image_data = await make_api_request(image_endpoint, access_token, image_params)
+        
+        if "error" in image_data:
+            return f"Error: Failed to get image data - {json.dumps(image_data)}"
+        
+        if "data" not in image_data or not image_data["data"]:
+            return "Error: No image data returned from API"
+        
+        # Get the first image URL
+        first_image = image_data["data"][0]
+        image_url = first_image.get("url")
+        
+        if not image_url:
+            return "Error: No valid image URL found"
+        
+        print(f"Downloading image from URL: {image_url}")
+        
+        # Download the image
+        cached = await image_cache.get_image(image_url, image_hashes[0])
     
-    if not image_bytes:
+    if not cached:
         return "Error: Failed to download image"
     
     try:
-        # Convert bytes to PIL Image
-        img = PILImage.open(io.BytesIO(image_bytes))
-        
-        # Convert to RGB if needed
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-            
-        # Create a byte stream of the image data
-        byte_arr = io.BytesIO()
-        img.save(byte_arr, format="JPEG")
-        img_bytes = byte_arr.getvalue()
+        # RGB JPEG rendition (or thumbnail), converted once per image and cached
+        if thumbnail:
+            img_bytes = await image_cache.get_thumbnail(cached.sha256)
+        else:
+            img_bytes = await image_cache.get_jpeg(cached.sha256)
         
         # Return as an Image object that LLM can directly analyze
         return Image(data=img_bytes, format="jpeg")
@@ -467,36 +467,40 @@ if ENABLE_SAVE_AD_IMAGE_LOCALLY:
 
         print(f"Found image hashes: {image_hashes}")
         
-        # Fetch image data using the first hash
-        image_endpoint = f"act_{account_id}/adimages"
-        hashes_str = f'["{image_hashes[0]}"]'
-        image_params = {
-            "fields": "hash,url,width,height,name,status",
-            "hashes": hashes_str
-        }
-        
-        print(f"Requesting image data with params: {image_params}")
-        image_data = await make_api_request(image_endpoint, access_token, image_params)
+        cached = await image_cache.get_image(None, image_hashes[0])
         
-        if "error" in image_data:
-            return json.dumps({"error": f"Failed to get image data - {json.dumps(image_data)}"}, indent=2)
-        
-        if "data" not in image_data or not image_data["data"]:
-            return json.dumps({"error": "No image data returned from API"}, indent=2)
+        if not cached:
+            # Fetch image data using the first hash
+            image_endpoint = f"act_{account_id}/adimages"
+            hashes_str = f'["{image_hashes[0]}"]'
+            image_params = {
+                "fields": "hash,url,width,height,name,status",
+                "hashes": hashes_str
+            }
             
-        first_image = image_data["data"][0]
-        image_url = first_image.get("url")
-        
-        if not image_url:
-            return json.dumps({"error": "No valid image URL found in API response"}, indent=2)
+            print(f"Requesting image data with params: {image_params}")
+            image_data = await make_api_request(image_endpoint, access_token, image_params)
             
-        print(f"Downloading image from URL: {image_url}")
-        
-        # Download and Save Image
-        image_bytes = await download_image(image_url)
+            if "error" in image_data:
+                return json.dumps({"error": f"Failed to get image data - {json.dumps(image_data)}"}, indent=2)
+            
+            if "data" not in image_data or not image_data["data"]:
+                return json.dumps({"error": "No image data returned from API"}, indent=2)
+                
+            first_image = image_data["data"][0]
+            image_url = first_image.get("url")
+            
+            if not image_url:
+                return json.dumps({"error": "No valid image URL found in API response"}, indent=2)
+                
+            print(f"Downloading image from URL: {image_url}")
+            
+            # Download and Save Image
+            cached = await image_cache.get_image(image_url, image_hashes[0])
         
-        if not image_bytes:
+        if not cached:
             return json.dumps({"error": "Failed to download image"}, indent=2)
+        image_bytes = cached.data
             
         try:
             # Ensure output directory exists
@@ -1347,13 +1351,48 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
         # Collect all page IDs from multiple approaches
         all_page_ids = set()
         
+        # Issue every discovery approach concurrently; make_api_request
+        # coalesces them into a single Graph API batch call
+        page_fields = "id,name,username,category,fan_count,link,verification_status,picture"
+        # Strip 'act_' prefix to get raw account ID for business endpoints
+        raw_account_id = account_id.replace("act_", "")
+        (
+            user_pages_data,
+            business_pages_data,
+            client_pages_data,
+            creatives_data,
+            ads_data,
+            promoted_objects_data,
+            tracking_ads_data,
+            campaigns_data,
+        ) = await asyncio.gather(
+            make_api_request("me/accounts", access_token, {"fields": page_fields}),
+            make_api_request(f"{raw_account_id}/owned_pages", access_token, {"fields": page_fields}),
+            make_api_request(f"{account_id}/client_pages", access_token, {"fields": page_fields}),
+            make_api_request(f"{account_id}/adcreatives", access_token, {
+                "fields": "id,name,object_story_spec,link_url,call_to_action,image_hash",
+                "limit": 100
+            }),
+            make_api_request(f"{account_id}/ads", access_token, {
+                "fields": "creative{object_story_spec{page_id},link_url,call_to_action}",
+                "limit": 100
+            }),
+            make_api_request(f"{account_id}/promoted_objects", access_token, {
+                "fields": "page_id,object_store_url,product_set_id,application_id"
+            }),
+            make_api_request(f"{account_id}/ads", access_token, {
+                "fields": "id,name,status,creative,tracking_specs",
+                "limit": 100
+            }),
+            make_api_request(f"{account_id}/campaigns", access_token, {
+                "fields": "id,name,promoted_object,objective",
+                "limit": 50
+            }),
+            return_exceptions=True,
+        )
+
         # Approach 1: Get user's personal pages (broad scope)
         try:
-            endpoint = "me/accounts"
-            params = {
-                "fields": "id,name,username,category,fan_count,link,verification_status,picture"
-            }
-            user_pages_data = await make_api_request(endpoint, access_token, params)
             if "data" in user_pages_data:
                 for page in user_pages_data["data"]:
                     if "id" in page:
@@ -1363,13 +1402,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
         
         # Approach 2: Try business manager pages
         try:
-            # Strip 'act_' prefix to get raw account ID for business endpoints
-            raw_account_id = account_id.replace("act_", "")
-            endpoint = f"{raw_account_id}/owned_pages"
-            params = {
-                "fields": "id,name,username,category,fan_count,link,verification_status,picture"
-            }
-            business_pages_data = await make_api_request(endpoint, access_token, params)
             if "data" in business_pages_data:
                 for page in business_pages_data["data"]:
                     if "id" in page:
@@ -1379,11 +1411,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
         
         # Approach 3: Try ad account client pages
         try:
-            endpoint = f"{account_id}/client_pages"
-            params = {
-                "fields": "id,name,username,category,fan_count,link,verification_status,picture"
-            }
-            client_pages_data = await make_api_request(endpoint, access_token, params)
             if "data" in client_pages_data:
                 for page in client_pages_data["data"]:
                     if "id" in page:
@@ -1393,12 +1420,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
         
         # Approach 4: Extract page IDs from all ad creatives (broader creative search)
         try:
-            endpoint = f"{account_id}/adcreatives"
-            params = {
-                "fields": "id,name,object_story_spec,link_url,call_to_action,image_hash",
-                "limit": 100
-            }
-            creatives_data = await make_api_request(endpoint, access_token, params)
             if "data" in creatives_data:
                 for creative in creatives_data["data"]:
                     if "object_story_spec" in creative and "page_id" in creative["object_story_spec"]:
@@ -1408,12 +1429,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
             
         # Approach 5: Get active ads and extract page IDs from creatives
         try:
-            endpoint = f"{account_id}/ads"
-            params = {
-                "fields": "creative{object_story_spec{page_id},link_url,call_to_action}",
-                "limit": 100
-            }
-            ads_data = await make_api_request(endpoint, access_token, params)
             if "data" in ads_data:
                 for ad in ads_data.get("data", []):
                     if "creative" in ad and "object_story_spec" in ad["creative"] and "page_id" in ad["creative"]["object_story_spec"]:
@@ -1423,11 +1438,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
 
         # Approach 6: Try promoted_objects endpoint
         try:
-            endpoint = f"{account_id}/promoted_objects"
-            params = {
-                "fields": "page_id,object_store_url,product_set_id,application_id"
-            }
-            promoted_objects_data = await make_api_request(endpoint, access_token, params)
             if "data" in promoted_objects_data:
                 for obj in promoted_objects_data["data"]:
                     if "page_id" in obj:
@@ -1437,12 +1447,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
 
         # Approach 7: Extract page IDs from tracking_specs in ads (most reliable)
         try:
-            endpoint = f"{account_id}/ads"
-            params = {
-                "fields": "id,name,status,creative,tracking_specs",
-                "limit": 100
-            }
-            tracking_ads_data = await make_api_request(endpoint, access_token, params)
             if "data" in tracking_ads_data:
                 for ad in tracking_ads_data.get("data", []):
                     tracking_specs = ad.get("tracking_specs", [])
@@ -1459,12 +1463,6 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
             
         # Approach 8: Try campaigns and extract page info
         try:
-            endpoint = f"{account_id}/campaigns"
-            params = {
-                "fields": "id,name,promoted_object,objective",
-                "limit": 50
-            }
-            campaigns_data = await make_api_request(endpoint, access_token, params)
             if "data" in campaigns_data:
                 for campaign in campaigns_data["data"]:
                     if "promoted_object" in campaign and "page_id" in campaign["promoted_object"]:
@@ -1479,14 +1477,16 @@ async def get_account_pages(account_id: str, access_token: Optional[str] = None)
                 "total_pages_found": len(all_page_ids)
             }
             
-            for page_id in all_page_ids:
+            page_ids = list(all_page_ids)
+            page_results = await asyncio.gather(
+                *[make_api_request(f"{page_id}", access_token, {"fields": page_fields}) for page_id in page_ids],
+                return_exceptions=True,
+            )
+            
+            for page_id, page_data in zip(page_ids, page_results):
                 try:
-                    page_endpoint = f"{page_id}"
-                    page_params = {
-                        "fields": "id,name,username,category,fan_count,link,verification_status,picture"
-                    }
-                    
-                    page_data = await make_api_request(page_endpoint, access_token, page_params)
+                    if isinstance(page_data, Exception):
+                        raise page_data
                     if "id" in page_data:
                         page_details["data"].append(page_data)
                     else:
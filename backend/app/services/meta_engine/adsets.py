@@ -3,13 +3,15 @@
 import json
 from typing import Optional, Dict, Any, List
 from .api import meta_api_tool, make_api_request
+from .pagination import collect_edges
 from .accounts import get_ad_accounts
 from .server import mcp_server
 
 
 @mcp_server.tool()
 @meta_api_tool
-async def get_adsets(account_id: str, access_token: Optional[str] = None, limit: int = 10, campaign_id: str = "") -> str:
+async def get_adsets(account_id: str, access_token: Optional[str] = None, limit: int = 10, campaign_id: str = "",
+                     max_items: int = 0) -> str:
     """
     Get ad sets for a Meta Ads account with optional filtering by campaign.
     
@@ -18,6 +20,8 @@ async def get_adsets(account_id: str, access_token: Optional[str] = None, limit:
         access_token: Meta API access token (optional - will use cached token if not provided)
         limit: Maximum number of ad sets to return (default: 10)
         campaign_id: Optional campaign ID to filter by
+        max_items: If > 0, follow pagination cursors and return up to this many items in one response
+                   (limit then acts as the page size). Default 0 returns a single page.
     """
     # Require explicit account_id
     if not account_id:
@@ -40,7 +44,11 @@ async def get_adsets(account_id: str, access_token: Optional[str] = None, limit:
         # Note: Removed the attempt to add campaign_id to params for the account endpoint case, 
         # as it was ineffective and the logic now uses the correct endpoint for campaign filtering.
 
-    data = await make_api_request(endpoint, access_token, params)
+    if max_items:
+        # Walk paging cursors instead of returning only the first page
+        data = await collect_edges(endpoint, access_token, params, max_items=max_items)
+    else:
+        data = await make_api_request(endpoint, access_token, params)
     
     return json.dumps(data, indent=2)
 
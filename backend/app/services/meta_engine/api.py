@@ -9,12 +9,20 @@ import os
 from . import auth
 from .auth import needs_authentication, auth_manager, start_callback_server, shutdown_callback_server
 from .utils import logger
+from .http_client import get_http_client
+from .batching import GraphBatcher, BATCH_ENABLED
+from .rate_limiter import rate_limiter, THROTTLE_ERROR_CODES
+from .response_cache import response_cache, invalidates_cache
 
 # Constants
 META_GRAPH_API_VERSION = "v22.0"
 META_GRAPH_API_BASE = f"https://graph.facebook.com/{META_GRAPH_API_VERSION}"
 USER_AGENT = "meta-ads-mcp/1.0"
 
+# Graph API error codes that mean the token itself is unusable
+# (throttling codes such as 4/17/613 live in rate_limiter.THROTTLE_ERROR_CODES)
+AUTH_ERROR_CODES = [190, 102, 200, 10]
+
 # Log key environment and configuration at startup
 logger.info("Core API module initialized")
 logger.info(f"Graph API Version: {META_GRAPH_API_VERSION}")
@@ -32,7 +40,7 @@ class GraphAPIError(Exception):
         logger.debug(f"Error details: {error_data}")
         
         # Check if this is an auth error
-        if "code" in error_data and error_data["code"] in [190, 102, 4]:
+        if "code" in error_data and error_data["code"] in [190, 102]:
             # Common auth error codes
             logger.warning(f"Auth error detected (code: {error_data['code']}). Invalidating token.")
             auth_manager.invalidate_token()
@@ -66,7 +74,69 @@ async def make_api_request(
                 "action_required": "Please authenticate first"
             }
         }
-        
+
+    if method == "GET":
+        # Identical in-flight GETs share one upstream call; results are cached briefly
+        return await response_cache.fetch(
+            access_token, endpoint, params,
+            lambda: _dispatch_request(endpoint, access_token, params, method),
+        )
+
+    result = await _dispatch_request(endpoint, access_token, params, method)
+    if invalidates_cache(method, endpoint):
+        response_cache.invalidate(f"{method} {endpoint}")
+    return result
+
+
+async def _dispatch_request(
+    endpoint: str,
+    access_token: str,
+    params: Optional[Dict[str, Any]] = None,
+    method: str = "GET"
+) -> Dict[str, Any]:
+    """Schedule a request against the rate limiter and send it (batched for GETs)."""
+    # Hold the call back if Meta reports the app/account quota nearly exhausted
+    await rate_limiter.acquire(endpoint)
+
+    # Coalesce concurrent GETs into Graph API batch calls
+    if method == "GET" and BATCH_ENABLED:
+        batch_params = {}
+        for key, value in (params or {}).items():
+            if key == "access_token":
+                continue
+            if isinstance(value, (dict, list)):
+                batch_params[key] = json.dumps(value)
+            elif isinstance(value, bool):
+                batch_params[key] = "true" if value else "false"
+            else:
+                batch_params[key] = value
+        result = await _graph_batcher.submit(endpoint, access_token, batch_params)
+        _check_batch_item_error(result, endpoint)
+        return result
+
+    return await _send_request(endpoint, access_token, params, method)
+
+
+def _check_batch_item_error(result: Dict[str, Any], endpoint: str) -> None:
+    """Apply the same throttling / token invalidation rules to batched sub-request errors."""
+    error_obj = result.get("error", {}).get("details", {}) if isinstance(result, dict) else {}
+    error_obj = error_obj.get("error", {}) if isinstance(error_obj, dict) else {}
+    if not isinstance(error_obj, dict):
+        return
+    if error_obj.get("code") in THROTTLE_ERROR_CODES:
+        rate_limiter.record_throttle(error_obj["code"], endpoint)
+    elif error_obj.get("code") in AUTH_ERROR_CODES:
+        logger.warning(f"Detected Facebook API auth error in batch item: {error_obj.get('code')}")
+        auth_manager.invalidate_token()
+
+
+async def _send_request(
+    endpoint: str,
+    access_token: str,
+    params: Optional[Dict[str, Any]] = None,
+    method: str = "GET"
+) -> Dict[str, Any]:
+    """Send a single, unbatched request to the Meta Graph API."""
     url = f"{META_GRAPH_API_BASE}/{endpoint}"
     
     headers = {
@@ -85,102 +155,111 @@ async def make_api_request(
     app_id = auth_manager.app_id
     logger.debug(f"Current app_id from auth_manager: {app_id}")
     
-    async with httpx.AsyncClient() as client:
-        try:
-            if method == "GET":
-                # For GET, JSON-encode dict/list params (e.g., targeting_spec) to proper strings
-                encoded_params = {}
-                for key, value in request_params.items():
-                    if isinstance(value, (dict, list)):
-                        encoded_params[key] = json.dumps(value)
-                    else:
-                        encoded_params[key] = value
-                response = await client.get(url, params=encoded_params, headers=headers, timeout=30.0)
-            elif method == "POST":
-                # For Meta API, POST requests need data, not JSON
-                if 'targeting' in request_params and isinstance(request_params['targeting'], dict):
-                    # Convert targeting dict to string for the API
-                    request_params['targeting'] = json.dumps(request_params['targeting'])
-                
-                # Convert lists and dicts to JSON strings    
-                for key, value in request_params.items():
-                    if isinstance(value, (list, dict)):
-                        request_params[key] = json.dumps(value)
-                
-                logger.debug(f"POST params (prepared): {masked_params}")
-                response = await client.post(url, data=request_params, headers=headers, timeout=30.0)
-            elif method == "DELETE":
-                response = await client.delete(url, params=request_params, headers=headers, timeout=30.0)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+    client = get_http_client()
+    try:
+        if method == "GET":
+            # For GET, JSON-encode dict/list params (e.g., targeting_spec) to proper strings
+            encoded_params = {}
+            for key, value in request_params.items():
+                if isinstance(value, (dict, list)):
+                    encoded_params[key] = json.dumps(value)
+                else:
+                    encoded_params[key] = value
+            response = await client.get(url, params=encoded_params, headers=headers, timeout=30.0)
+        elif method == "POST":
+            # For Meta API, POST requests need data, not JSON
+            if 'targeting' in request_params and isinstance(request_params['targeting'], dict):
+                # Convert targeting dict to string for the API
+                request_params['targeting'] = json.dumps(request_params['targeting'])
             
-            response.raise_for_status()
-            logger.debug(f"API Response status: {response.status_code}")
+            # Convert lists and dicts to JSON strings    
+            for key, value in request_params.items():
+                if isinstance(value, (list, dict)):
+                    request_params[key] = json.dumps(value)
             
-            # Ensure the response is JSON and return it as a dictionary
-            try:
-                return response.json()
-            except json.JSONDecodeError:
-                # If not JSON, return text content in a structured format
-                return {
-                    "text_response": response.text,
-                    "status_code": response.status_code
-                }
+            logger.debug(f"POST params (prepared): {masked_params}")
+            response = await client.post(url, data=request_params, headers=headers, timeout=30.0)
+        elif method == "DELETE":
+            response = await client.delete(url, params=request_params, headers=headers, timeout=30.0)
+        else:
+            raise ValueError(f"Unsupported HTTP method: {method}")
         
-        except httpx.HTTPStatusError as e:
-            error_info = {}
-            try:
-                error_info = e.response.json()
-            except:
-                error_info = {"status_code": e.response.status_code, "text": e.response.text}
-            
-            logger.error(f"HTTP Error: {e.response.status_code} - {error_info}")
-            
-            # Check for authentication errors
-            if e.response.status_code == 401 or e.response.status_code == 403:
-                logger.warning("Detected authentication error (401/403)")
-                auth_manager.invalidate_token()
-            elif "error" in error_info:
-                error_obj = error_info.get("error", {})
-                # Check for specific FB API errors related to auth
-                if isinstance(error_obj, dict) and error_obj.get("code") in [190, 102, 4, 200, 10]:
-                    logger.warning(f"Detected Facebook API auth error: {error_obj.get('code')}")
-                    # Log more details about app ID related errors
-                    if error_obj.get("code") == 200 and "Provide valid app ID" in error_obj.get("message", ""):
-                        logger.error("Meta API authentication configuration issue")
-                        logger.error(f"Current app_id: {app_id}")
-                        # Provide a clearer error message without the confusing "Provide valid app ID" message
-                        return {
-                            "error": {
-                                "message": "Meta API authentication configuration issue. Please check your app credentials.",
-                                "original_error": error_obj.get("message"),
-                                "code": error_obj.get("code")
-                            }
-                        }
-                    auth_manager.invalidate_token()
-            
-            # Include full details for technical users
-            full_response = {
-                "headers": dict(e.response.headers),
-                "status_code": e.response.status_code,
-                "url": str(e.response.url),
-                "reason": getattr(e.response, "reason_phrase", "Unknown reason"),
-                "request_method": e.request.method,
-                "request_url": str(e.request.url)
-            }
-            
-            # Return a properly structured error object
+        rate_limiter.record_headers(response.headers, endpoint)
+        response.raise_for_status()
+        logger.debug(f"API Response status: {response.status_code}")
+        
+        # Ensure the response is JSON and return it as a dictionary
+        try:
+            return response.json()
+        except json.JSONDecodeError:
+            # If not JSON, return text content in a structured format
             return {
-                "error": {
-                    "message": f"HTTP Error: {e.response.status_code}",
-                    "details": error_info,
-                    "full_response": full_response
-                }
+                "text_response": response.text,
+                "status_code": response.status_code
             }
+    
+    except httpx.HTTPStatusError as e:
+        error_info = {}
+        try:
+            error_info = e.response.json()
+        except:
+            error_info = {"status_code": e.response.status_code, "text": e.response.text}
         
-        except Exception as e:
-            logger.error(f"Request Error: {str(e)}")
-            return {"error": {"message": str(e)}}
+        logger.error(f"HTTP Error: {e.response.status_code} - {error_info}")
+        
+        error_obj = error_info.get("error", {}) if isinstance(error_info, dict) else {}
+        error_code = error_obj.get("code") if isinstance(error_obj, dict) else None
+
+        # Throttling is not an auth failure: back off instead of dropping the token
+        if error_code in THROTTLE_ERROR_CODES:
+            rate_limiter.record_throttle(error_code, endpoint)
+        # Check for authentication errors
+        elif e.response.status_code == 401 or e.response.status_code == 403:
+            logger.warning("Detected authentication error (401/403)")
+            auth_manager.invalidate_token()
+        elif "error" in error_info:
+            # Check for specific FB API errors related to auth
+            if isinstance(error_obj, dict) and error_obj.get("code") in AUTH_ERROR_CODES:
+                logger.warning(f"Detected Facebook API auth error: {error_obj.get('code')}")
+                # Log more details about app ID related errors
+                if error_obj.get("code") == 200 and "Provide valid app ID" in error_obj.get("message", ""):
+                    logger.error("Meta API authentication configuration issue")
+                    logger.error(f"Current app_id: {app_id}")
+                    # Provide a clearer error message without the confusing "Provide valid app ID" message
+                    return {
+                        "error": {
+                            "message": "Meta API authentication configuration issue. Please check your app credentials.",
+                            "original_error": error_obj.get("message"),
+                            "code": error_obj.get("code")
+                        }
+                    }
+                auth_manager.invalidate_token()
+        
+        # Include full details for technical users
+        full_response = {
+            "headers": dict(e.response.headers),
+            "status_code": e.response.status_code,
+            "url": str(e.response.url),
+            "reason": getattr(e.response, "reason_phrase", "Unknown reason"),
+            "request_method": e.request.method,
+            "request_url": str(e.request.url)
+        }
+        
+        # Return a properly structured error object
+        return {
+            "error": {
+                "message": f"HTTP Error: {e.response.status_code}",
+                "details": error_info,
+                "full_response": full_response
+            }
+        }
+    
+    except Exception as e:
+        logger.error(f"Request Error: {str(e)}")
+        return {"error": {"message": str(e)}}
+
+
+_graph_batcher = GraphBatcher(_send_request, on_headers=rate_limiter.record_headers)
 
 
 # Generic wrapper for all Meta API tools
@@ -0,0 +1,163 @@
+"""Graph API batch request coalescing for Meta Ads API."""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+import asyncio
+import json
+import os
+from .utils import logger
+
+# Batching configuration
+BATCH_ENABLED = os.environ.get("META_BATCH_ENABLED", "1") == "1"
+BATCH_WINDOW_SEC = float(os.environ.get("META_BATCH_WINDOW_MS", "5")) / 1000.0
+# Hard Graph API limit is 50 sub-requests per batch call
+BATCH_MAX_SIZE = min(int(os.environ.get("META_BATCH_MAX_SIZE", "50")), 50)
+
+# (endpoint, access_token, params, method) -> response dict
+Sender = Callable[[str, str, Optional[Dict[str, Any]], str], Awaitable[Dict[str, Any]]]
+# (lower-cased response headers, endpoint) of every batch item
+HeadersHook = Callable[[Dict[str, str], str], None]
+
+
+class _PendingRequest:
+    __slots__ = ("relative_url", "endpoint", "params", "future")
+
+    def __init__(self, endpoint: str, params: Dict[str, Any], future: asyncio.Future):
+        self.endpoint = endpoint
+        self.params = params
+        self.future = future
+        query = urlencode(params, doseq=True)
+        self.relative_url = f"{endpoint}?{query}" if query else endpoint
+
+
+class GraphBatcher:
+    """
+    Coalesces concurrent GET requests into Graph API `batch=[...]` calls.
+
+    Requests submitted within BATCH_WINDOW_SEC of each other (and sharing the
+    same access token and event loop) are sent as a single POST. Each caller
+    receives its own response dict, in the same shape `make_api_request`
+    returns for individual calls. When `on_headers` is given it receives each
+    item's headers with the item's own endpoint (usage headers are per item).
+    """
+
+    def __init__(
+        self,
+        sender: Sender,
+        window_sec: float = BATCH_WINDOW_SEC,
+        max_size: int = BATCH_MAX_SIZE,
+        on_headers: Optional[HeadersHook] = None,
+    ):
+        self._sender = sender
+        self._on_headers = on_headers
+        self._window_sec = window_sec
+        self._max_size = max_size
+        self._queues: Dict[Tuple[int, str], List[_PendingRequest]] = {}
+        self._timers: Dict[Tuple[int, str], asyncio.TimerHandle] = {}
+        # Strong references so in-flight dispatch tasks are not garbage collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, endpoint: str, access_token: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a GET request for the next batch and wait for its response.
+
+        Args:
+            endpoint: API endpoint path (without base URL)
+            access_token: Meta API access token (batches never mix tokens)
+            params: Query parameters, already string-encoded, without access_token
+
+        Returns:
+            API response as a dictionary
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), access_token)
+        future = loop.create_future()
+        queue = self._queues.setdefault(key, [])
+        queue.append(_PendingRequest(endpoint, params, future))
+
+        if len(queue) >= self._max_size:
+            self._flush(key, access_token)
+        elif key not in self._timers:
+            self._timers[key] = loop.call_later(self._window_sec, self._flush, key, access_token)
+
+        return await future
+
+    def _flush(self, key: Tuple[int, str], access_token: str) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        pending = self._queues.pop(key, [])
+        if pending:
+            task = asyncio.ensure_future(self._dispatch(pending, access_token))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, pending: List[_PendingRequest], access_token: str) -> None:
+        try:
+            # A lone request gains nothing from the batch envelope
+            if len(pending) == 1:
+                item = pending[0]
+                result = await self._sender(item.endpoint, access_token, dict(item.params), "GET")
+                _resolve(item.future, result)
+                return
+
+            logger.debug(f"Dispatching Graph API batch with {len(pending)} requests")
+            batch = [{"method": "GET", "relative_url": item.relative_url} for item in pending]
+            response = await self._sender(
+                "",
+                access_token,
+                {"batch": json.dumps(batch), "include_headers": "true" if self._on_headers else "false"},
+                "POST",
+            )
+
+            if not isinstance(response, list):
+                # The batch call itself failed (auth, throttling, network):
+                # every sub-request shares that outcome
+                logger.error(f"Graph API batch call failed: {response}")
+                for item in pending:
+                    _resolve(item.future, response)
+                return
+
+            for index, item in enumerate(pending):
+                entry = response[index] if index < len(response) else None
+                if entry is None:
+                    # Graph returns null for sub-requests it did not complete in time
+                    logger.debug(f"Batch item timed out, retrying individually: {item.endpoint}")
+                    result = await self._sender(item.endpoint, access_token, dict(item.params), "GET")
+                else:
+                    if self._on_headers and entry.get("headers"):
+                        self._on_headers(
+                            {h.get("name", "").lower(): h.get("value") for h in entry["headers"] if isinstance(h, dict)},
+                            item.endpoint,
+                        )
+                    result = _parse_batch_entry(entry)
+                _resolve(item.future, result)
+        except Exception as e:
+            logger.error(f"Graph API batch dispatch error: {str(e)}")
+            for item in pending:
+                _resolve(item.future, {"error": {"message": str(e)}})
+
+
+def _parse_batch_entry(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one batch response entry into a make_api_request-style dict."""
+    code = entry.get("code", 0)
+    body_text = entry.get("body") or ""
+    try:
+        body = json.loads(body_text) if body_text else {}
+    except json.JSONDecodeError:
+        body = {"text_response": body_text, "status_code": code}
+
+    if 200 <= code < 300:
+        return body
+
+    return {
+        "error": {
+            "message": f"HTTP Error: {code}",
+            "details": body,
+        }
+    }
+
+
+def _resolve(future: asyncio.Future, result: Dict[str, Any]) -> None:
+    if not future.done():
+        future.set_result(result)
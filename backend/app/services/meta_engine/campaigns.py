@@ -3,6 +3,7 @@
 import json
 from typing import List, Optional, Dict, Any, Union
 from .api import meta_api_tool, make_api_request
+from .pagination import collect_edges
 from .accounts import get_ad_accounts
 from .server import mcp_server
 
@@ -15,7 +16,8 @@ async def get_campaigns(
     limit: int = 10, 
     status_filter: str = "", 
     objective_filter: Union[str, List[str]] = "", 
-    after: str = ""
+    after: str = "",
+    max_items: int = 0
 ) -> str:
     """
     Get campaigns for a Meta Ads account with optional filtering.
@@ -39,6 +41,8 @@ async def get_campaigns(
                          Examples: 'OUTCOME_LEADS' or ['OUTCOME_LEADS', 'OUTCOME_SALES'].
                          Leave empty for all objectives.
         after: Pagination cursor to get the next set of results
+        max_items: If > 0, follow pagination cursors and return up to this many items in one response
+                   (limit then acts as the page size). Default 0 returns a single page.
     """
     # Require explicit account_id
     if not account_id:
@@ -79,7 +83,11 @@ async def get_campaigns(
     if after:
         params["after"] = after
     
-    data = await make_api_request(endpoint, access_token, params)
+    if max_items:
+        # Walk paging cursors instead of returning only the first page
+        data = await collect_edges(endpoint, access_token, params, max_items=max_items)
+    else:
+        data = await make_api_request(endpoint, access_token, params)
     
     return json.dumps(data, indent=2)
 
@@ -8,6 +8,7 @@ from .server import mcp_server
 from .api import meta_api_tool
 from . import auth
 from .http_auth_integration import FastMCPAuthIntegration
+from .http_client import get_http_client, PIPEBOARD_CLIENT
 
 
 # Only register the duplication functions if the environment variable is set
@@ -243,144 +244,144 @@ async def _forward_duplication_request(resource_type: str, resource_id: str, acc
         clean_options = {k: v for k, v in options.items() if v is not None}
         
         # Make the request to the cloud service
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                endpoint,
-                headers=headers,
-                json=clean_options
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return json.dumps(result, indent=2)
-            elif response.status_code == 400:
-                # Validation failed
-                try:
-                    error_data = response.json()
-                    return json.dumps({
-                        "success": False,
-                        "error": "validation_failed",
-                        "errors": error_data.get("errors", [response.text]),
-                        "warnings": error_data.get("warnings", [])
-                    }, indent=2)
-                except:
-                    return json.dumps({
-                        "success": False,
-                        "error": "validation_failed",
-                        "errors": [response.text],
-                        "warnings": []
-                    }, indent=2)
-            elif response.status_code == 401:
+        client = get_http_client(PIPEBOARD_CLIENT)
+        response = await client.post(
+            endpoint,
+            headers=headers,
+            json=clean_options
+        )
+        
+        if response.status_code == 200:
+            result = response.json()
+            return json.dumps(result, indent=2)
+        elif response.status_code == 400:
+            # Validation failed
+            try:
+                error_data = response.json()
                 return json.dumps({
                     "success": False,
-                    "error": "authentication_error",
-                    "message": "Invalid or expired API token"
+                    "error": "validation_failed",
+                    "errors": error_data.get("errors", [response.text]),
+                    "warnings": error_data.get("warnings", [])
                 }, indent=2)
-            elif response.status_code == 402:
-                try:
-                    error_data = response.json()
-                    return json.dumps({
-                        "success": False,
-                        "error": "subscription_required",
-                        "message": error_data.get("message", "This feature is not available in your current plan"),
-                        "upgrade_url": error_data.get("upgrade_url", "https://pipeboard.co/upgrade"),
-                        "suggestion": error_data.get("suggestion", "Please upgrade your account to access this feature")
-                    }, indent=2)
-                except:
+            except:
+                return json.dumps({
+                    "success": False,
+                    "error": "validation_failed",
+                    "errors": [response.text],
+                    "warnings": []
+                }, indent=2)
+        elif response.status_code == 401:
+            return json.dumps({
+                "success": False,
+                "error": "authentication_error",
+                "message": "Invalid or expired API token"
+            }, indent=2)
+        elif response.status_code == 402:
+            try:
+                error_data = response.json()
+                return json.dumps({
+                    "success": False,
+                    "error": "subscription_required",
+                    "message": error_data.get("message", "This feature is not available in your current plan"),
+                    "upgrade_url": error_data.get("upgrade_url", "https://pipeboard.co/upgrade"),
+                    "suggestion": error_data.get("suggestion", "Please upgrade your account to access this feature")
+                }, indent=2)
+            except:
+                return json.dumps({
+                    "success": False,
+                    "error": "subscription_required",
+                    "message": "This feature is not available in your current plan",
+                    "upgrade_url": "https://pipeboard.co/upgrade",
+                    "suggestion": "Please upgrade your account to access this feature"
+                }, indent=2)
+        elif response.status_code == 403:
+            try:
+                error_data = response.json()
+                # Check if this is a premium feature error
+                if error_data.get("error") == "premium_feature":
                     return json.dumps({
                         "success": False,
-                        "error": "subscription_required",
-                        "message": "This feature is not available in your current plan",
-                        "upgrade_url": "https://pipeboard.co/upgrade",
-                        "suggestion": "Please upgrade your account to access this feature"
+                        "error": "premium_feature_required",
+                        "message": error_data.get("message", "This is a premium feature that requires subscription"),
+                        "details": error_data.get("details", {
+                            "upgrade_url": "https://pipeboard.co/upgrade",
+                            "suggestion": "Please upgrade your account to access this feature"
+                        })
                     }, indent=2)
-            elif response.status_code == 403:
-                try:
-                    error_data = response.json()
-                    # Check if this is a premium feature error
-                    if error_data.get("error") == "premium_feature":
-                        return json.dumps({
-                            "success": False,
-                            "error": "premium_feature_required",
-                            "message": error_data.get("message", "This is a premium feature that requires subscription"),
-                            "details": error_data.get("details", {
-                                "upgrade_url": "https://pipeboard.co/upgrade",
-                                "suggestion": "Please upgrade your account to access this feature"
-                            })
-                        }, indent=2)
-                    else:
-                        # Default to facebook connection required
-                        return json.dumps({
-                            "success": False,
-                            "error": "facebook_connection_required",
-                            "message": error_data.get("message", "You need to connect your Facebook account first"),
-                            "details": error_data.get("details", {
-                                "login_flow_url": "/connections",
-                                "auth_flow_url": "/api/meta/auth"
-                            })
-                        }, indent=2)
-                except:
+                else:
+                    # Default to facebook connection required
                     return json.dumps({
                         "success": False,
                         "error": "facebook_connection_required",
-                        "message": "You need to connect your Facebook account first",
-                        "details": {
+                        "message": error_data.get("message", "You need to connect your Facebook account first"),
+                        "details": error_data.get("details", {
                             "login_flow_url": "/connections",
                             "auth_flow_url": "/api/meta/auth"
-                        }
+                        })
                     }, indent=2)
-            elif response.status_code == 404:
+            except:
                 return json.dumps({
                     "success": False,
-                    "error": "resource_not_found",
-                    "message": f"{resource_type.title()} not found or access denied",
-                    "suggestion": f"Verify the {resource_type} ID and your Facebook account permissions"
-                }, indent=2)
-            elif response.status_code == 429:
-                return json.dumps({
-                    "error": "rate_limit_exceeded", 
-                    "message": "Meta API rate limit exceeded",
+                    "error": "facebook_connection_required",
+                    "message": "You need to connect your Facebook account first",
                     "details": {
-                        "suggestion": "Please wait before retrying",
-                        "retry_after": response.headers.get("Retry-After", "60")
+                        "login_flow_url": "/connections",
+                        "auth_flow_url": "/api/meta/auth"
                     }
                 }, indent=2)
-            elif response.status_code == 502:
-                try:
-                    error_data = response.json()
-                    return json.dumps({
-                        "success": False,
-                        "error": "meta_api_error",
-                        "message": error_data.get("message", "Facebook API error"),
-                        "recoverable": True,
-                        "suggestion": "Please wait 5 minutes before retrying"
-                    }, indent=2)
-                except:
-                    return json.dumps({
-                        "success": False,
-                        "error": "meta_api_error",
-                        "message": "Facebook API error",
-                        "recoverable": True,
-                        "suggestion": "Please wait 5 minutes before retrying"
-                    }, indent=2)
-            else:
-                error_detail = response.text
-                try:
-                    error_json = response.json()
-                    error_detail = error_json.get("message", error_detail)
-                except:
-                    pass
-                
+        elif response.status_code == 404:
+            return json.dumps({
+                "success": False,
+                "error": "resource_not_found",
+                "message": f"{resource_type.title()} not found or access denied",
+                "suggestion": f"Verify the {resource_type} ID and your Facebook account permissions"
+            }, indent=2)
+        elif response.status_code == 429:
+            return json.dumps({
+                "error": "rate_limit_exceeded", 
+                "message": "Meta API rate limit exceeded",
+                "details": {
+                    "suggestion": "Please wait before retrying",
+                    "retry_after": response.headers.get("Retry-After", "60")
+                }
+            }, indent=2)
+        elif response.status_code == 502:
+            try:
+                error_data = response.json()
                 return json.dumps({
-                    "error": "duplication_failed",
-                    "message": f"Failed to duplicate {resource_type}",
-                    "details": {
-                        "status_code": response.status_code,
-                        "error_detail": error_detail,
-                        "resource_type": resource_type,
-                        "resource_id": resource_id
-                    }
+                    "success": False,
+                    "error": "meta_api_error",
+                    "message": error_data.get("message", "Facebook API error"),
+                    "recoverable": True,
+                    "suggestion": "Please wait 5 minutes before retrying"
+                }, indent=2)
+            except:
+                return json.dumps({
+                    "success": False,
+                    "error": "meta_api_error",
+                    "message": "Facebook API error",
+                    "recoverable": True,
+                    "suggestion": "Please wait 5 minutes before retrying"
                 }, indent=2)
+        else:
+            error_detail = response.text
+            try:
+                error_json = response.json()
+                error_detail = error_json.get("message", error_detail)
+            except:
+                pass
+            
+            return json.dumps({
+                "error": "duplication_failed",
+                "message": f"Failed to duplicate {resource_type}",
+                "details": {
+                    "status_code": response.status_code,
+                    "error_detail": error_detail,
+                    "resource_type": resource_type,
+                    "resource_id": resource_id
+                }
+            }, indent=2)
     
     except httpx.TimeoutException:
         return json.dumps({
@@ -0,0 +1,104 @@
+"""Shared, pooled HTTP clients for Meta Graph API and CDN traffic."""
+
+from typing import Dict, Optional, Tuple
+import asyncio
+import functools
+import logging
+import os
+import httpx
+
+# Same logger as utils.logger; imported by name to avoid a circular import
+logger = logging.getLogger("meta-ads-mcp")
+
+# Pool configuration (per named client, i.e. per upstream host family)
+HTTP_MAX_CONNECTIONS = int(os.environ.get("META_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.environ.get("META_HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("META_HTTP_KEEPALIVE_EXPIRY_SEC", "30"))
+HTTP_TIMEOUT = float(os.environ.get("META_HTTP_TIMEOUT_SEC", "30"))
+HTTP2_ENABLED = os.environ.get("META_HTTP2", "1") == "1"
+
+GRAPH_CLIENT = "graph"
+CDN_CLIENT = "cdn"
+PIPEBOARD_CLIENT = "pipeboard"
+
+# Clients are bound to the event loop that created them. Celery tasks run each
+# job in a fresh loop via asyncio.run(), so the registry is keyed by loop too.
+_clients: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+@functools.lru_cache(maxsize=1)
+def _http2_available() -> bool:
+    """Check whether the optional `h2` package needed for HTTP/2 is installed."""
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("META_HTTP2 is enabled but the 'h2' package is missing; falling back to HTTP/1.1")
+        return False
+
+
+def _build_client(name: str) -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+    logger.info(f"Creating pooled HTTP client '{name}' (max_connections={HTTP_MAX_CONNECTIONS})")
+    return httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=limits,
+        timeout=HTTP_TIMEOUT,
+        # CDN image URLs redirect; Graph API calls never should
+        follow_redirects=(name == CDN_CLIENT),
+    )
+
+
+def get_http_client(name: str = GRAPH_CLIENT) -> httpx.AsyncClient:
+    """
+    Return the process-wide pooled client for the current event loop.
+
+    Callers must NOT close the returned client or use it as a context manager;
+    its lifecycle is managed by `close_http_clients()`.
+
+    Args:
+        name: Client pool name ("graph" for graph.facebook.com, "cdn" for image downloads,
+              "pipeboard" for the Pipeboard cloud service)
+
+    Returns:
+        A keep-alive httpx.AsyncClient shared by all callers on this loop
+    """
+    loop = asyncio.get_running_loop()
+    key = (name, id(loop))
+    entry = _clients.get(key)
+    if entry is not None:
+        owner_loop, client = entry
+        if owner_loop is loop and not client.is_closed:
+            return client
+
+    # Drop clients whose loops are gone (e.g. finished Celery asyncio.run calls)
+    for stale_key, (stale_loop, _) in list(_clients.items()):
+        if stale_loop.is_closed():
+            _clients.pop(stale_key, None)
+
+    client = _build_client(name)
+    _clients[key] = (loop, client)
+    return client
+
+
+async def close_http_clients(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    """
+    Close pooled clients bound to the given (default: current) event loop.
+
+    Hooked into the FastAPI lifespan so keep-alive connections are released on shutdown.
+    """
+    loop = loop or asyncio.get_running_loop()
+    for key, (owner_loop, client) in list(_clients.items()):
+        if owner_loop is not loop:
+            continue
+        _clients.pop(key, None)
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing pooled HTTP client '{key[0]}': {e}")
@@ -0,0 +1,420 @@
+"""Content-addressed cache for creative images (memory LRU + bounded disk tier)."""
+
+from typing import Any, Callable, Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from PIL import Image as PILImage
+from .http_client import get_http_client, CDN_CLIENT
+
+# Same logger as utils.logger; imported by name to avoid a circular import
+logger = logging.getLogger("meta-ads-mcp")
+
+MEMORY_MAX_BYTES = int(os.environ.get("META_IMAGE_CACHE_MEMORY_MB", "64")) * 1024 * 1024
+CACHE_DIR = os.environ.get("META_IMAGE_CACHE_DIR", os.path.join("data", "image_cache"))
+DISK_MAX_BYTES = int(os.environ.get("META_IMAGE_CACHE_DISK_MB", "1024")) * 1024 * 1024
+# Eviction frees the disk tier down to this fraction of its cap, so it does not run on every write
+DISK_LOW_WATER = 0.9
+# URL entries younger than this are served without asking the CDN
+FRESH_SEC = float(os.environ.get("META_IMAGE_CACHE_FRESH_SEC", "3600"))
+THUMBNAIL_SIZE = int(os.environ.get("META_IMAGE_THUMBNAIL_SIZE", "256"))
+MAX_RESOURCES = int(os.environ.get("META_IMAGE_MAX_RESOURCES", "500"))
+
+_DOWNLOAD_HEADERS = {"User-Agent": "curl/8.4.0", "Accept": "*/*"}
+
+# Pillow releases the GIL while decoding/resizing
+_image_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("META_IMAGE_WORKERS", "2")), thread_name_prefix="image-cache")
+# Disk tier reads/writes and eviction passes, kept off the event loop
+_io_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("META_IMAGE_IO_WORKERS", "4")), thread_name_prefix="image-cache-io")
+
+
+@dataclass
+class CachedImage:
+    sha256: str
+    data: bytes
+    content_type: str = "image/jpeg"
+
+
+def to_jpeg(data: bytes) -> bytes:
+    """RGB JPEG re-encoding used for LLM-facing images."""
+    img = PILImage.open(io.BytesIO(data))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG")
+    return out.getvalue()
+
+
+def to_thumbnail(data: bytes, size: int = THUMBNAIL_SIZE) -> bytes:
+    img = PILImage.open(io.BytesIO(data))
+    img.thumbnail((size, size))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=85)
+    return out.getvalue()
+
+
+class ImageCache:
+    """
+    Creative images stored once per content hash.
+
+    Blobs (originals and derived JPEG/thumbnails) live in a byte-bounded
+    in-memory LRU backed by files under CACHE_DIR, which is capped too: once
+    it outgrows DISK_MAX_BYTES the least recently accessed files of blobs/
+    and keys/ are deleted (reads refresh a file's access time). The async API
+    does its file I/O and eviction passes in a thread pool. Lookup keys --
+    Meta image hashes or URLs -- point at blobs through small alias records
+    that keep the CDN validators, so stale URL entries are revalidated with
+    If-None-Match / If-Modified-Since instead of downloaded again. A Meta
+    image hash identifies content, so hash lookups never need revalidation.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_memory_bytes: int = MEMORY_MAX_BYTES, max_disk_bytes: int = DISK_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # Estimate of the disk tier size (None until first scanned); re-measured whenever eviction runs
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+        self._evicting = False
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "memory_hits": 0, "disk_hits": 0, "downloads": 0, "revalidated": 0, "derived": 0,
+            "evictions": 0, "disk_evictions": 0,
+        }
+
+    # --- Blob storage -------------------------------------------------------
+
+    def _path(self, kind: str, name: str) -> str:
+        return os.path.join(self.cache_dir, kind, name[:2], name)
+
+    def _write_file(self, path: str, payload: bytes) -> None:
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Image cache disk write failed ({path}): {e}")
+            return
+        self._account_disk(len(payload))
+
+    def _touch(self, path: str) -> None:
+        # Explicit, since relatime/noatime mounts do not update atime on read
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _disk_files(self) -> List[tuple]:
+        """(atime, size, path) of every file of the disk tier."""
+        files = []
+        for kind in ("blobs", "keys"):
+            try:
+                shards = list(os.scandir(os.path.join(self.cache_dir, kind)))
+            except OSError:
+                continue
+            for shard in shards:
+                try:
+                    entries = list(os.scandir(shard.path)) if shard.is_dir() else []
+                except OSError:
+                    continue
+                for entry in entries:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    files.append((st.st_atime, st.st_size, entry.path))
+        return files
+
+    def _account_disk(self, added: int) -> None:
+        """Adds a write to the disk usage; above the cap, queues one eviction pass in the I/O pool."""
+        with self._disk_lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes += added
+                if self._disk_bytes <= self.max_disk_bytes or self._evicting:
+                    return
+            elif self._evicting:
+                return
+            self._evicting = True
+        _io_pool.submit(self._evict)
+
+    def _evict(self) -> None:
+        """Measures the disk tier and deletes the least recently accessed files above the cap."""
+        try:
+            # Other processes share the directory, so measure it instead of trusting the estimate
+            files = sorted(self._disk_files())
+            total = sum(size for _, size, _ in files)
+            if total > self.max_disk_bytes:
+                target = self.max_disk_bytes * DISK_LOW_WATER
+                for _, size, path in files:
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+                    total -= size
+                    self._stats["disk_evictions"] += 1
+            with self._disk_lock:
+                self._disk_bytes = total
+        except Exception as e:
+            logger.warning(f"Image cache eviction failed: {e}")
+        finally:
+            self._evicting = False
+
+    def _remember(self, blob_id: str, data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if blob_id in self._blobs:
+                self._blobs.move_to_end(blob_id)
+                return
+            self._blobs[blob_id] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes and self._blobs:
+                _, evicted = self._blobs.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self._stats["evictions"] += 1
+
+    def put_blob(self, data: bytes) -> str:
+        sha = hashlib.sha256(data).hexdigest()
+        path = self._path("blobs", sha)
+        if os.path.exists(path):
+            self._touch(path)
+        else:
+            self._write_file(path, data)
+        self._remember(sha, data)
+        return sha
+
+    def _memory_get(self, blob_id: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._blobs.get(blob_id)
+            if data is not None:
+                self._blobs.move_to_end(blob_id)
+                self._stats["memory_hits"] += 1
+            return data
+
+    def get_blob(self, blob_id: str) -> Optional[bytes]:
+        data = self._memory_get(blob_id)
+        if data is not None:
+            return data
+        return self._read_blob(blob_id)
+
+    async def get_blob_async(self, blob_id: str) -> Optional[bytes]:
+        """get_blob with the disk read done in the I/O pool."""
+        data = self._memory_get(blob_id)
+        if data is not None:
+            return data
+        return await self._io(self._read_blob, blob_id)
+
+    async def _io(self, fn: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(_io_pool, fn, *args)
+
+    def _read_blob(self, blob_id: str) -> Optional[bytes]:
+        path = self._path("blobs", blob_id)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._touch(path)
+        self._stats["disk_hits"] += 1
+        self._remember(blob_id, data)
+        return data
+
+    # --- Aliases (image_hash / URL -> blob) ---------------------------------
+
+    def _alias_path(self, key: str) -> str:
+        return self._path("keys", hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def _get_alias(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._alias_path(key)
+        try:
+            with open(path, "r") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return record
+
+    def _set_alias(self, key: str, record: Dict[str, Any]) -> None:
+        self._write_file(self._alias_path(key), json.dumps(record).encode("utf-8"))
+
+    # --- Public API ---------------------------------------------------------
+
+    async def get_image(self, url: Optional[str], image_hash: Optional[str] = None) -> Optional[CachedImage]:
+        """
+        Returns the image for a Meta image hash and/or URL, downloading it only
+        when neither key is cached (or the URL entry changed on the CDN).
+        Concurrent requests for the same key share one download.
+        """
+        if image_hash:
+            alias = await self._io(self._get_alias, f"hash:{image_hash}")
+            data = await self.get_blob_async(alias["sha256"]) if alias else None
+            if data is not None:
+                return CachedImage(alias["sha256"], data, alias.get("content_type") or "image/jpeg")
+        if not url:
+            return None
+
+        key = f"url:{url}"
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._get_by_url(url, key)
+            if result is not None and image_hash:
+                await self._io(self._set_alias, f"hash:{image_hash}", {"sha256": result.sha256, "content_type": result.content_type})
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            # Nobody else may be awaiting; avoid "exception was never retrieved"
+            if future.done() and not future.cancelled() and future.exception() is not None:
+                future.exception()
+
+    async def _get_by_url(self, url: str, key: str) -> Optional[CachedImage]:
+        alias = await self._io(self._get_alias, key)
+        data = await self.get_blob_async(alias["sha256"]) if alias else None
+        if data is not None and time.time() - alias.get("fetched_at", 0) < FRESH_SEC:
+            return CachedImage(alias["sha256"], data, alias.get("content_type") or "image/jpeg")
+
+        headers = dict(_DOWNLOAD_HEADERS)
+        if data is not None:
+            if alias.get("etag"):
+                headers["If-None-Match"] = alias["etag"]
+            if alias.get("last_modified"):
+                headers["If-Modified-Since"] = alias["last_modified"]
+
+        response = None
+        try:
+            response = await get_http_client(CDN_CLIENT).get(url, headers=headers, timeout=30.0)
+        except Exception as e:
+            logger.debug(f"Image download failed for {url}: {e}")
+
+        if response is not None and response.status_code == 304 and data is not None:
+            self._stats["revalidated"] += 1
+            await self._io(self._set_alias, key, {**alias, "fetched_at": time.time()})
+            return CachedImage(alias["sha256"], data, alias.get("content_type") or "image/jpeg")
+
+        if response is not None and response.status_code == 200:
+            body = response.content
+            validators = {
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "content_type": response.headers.get("content-type", "image/jpeg").split(";")[0],
+            }
+        else:
+            # Meta CDN sometimes refuses plain requests; use the slower fallbacks
+            from .utils import try_multiple_download_methods
+
+            body = await try_multiple_download_methods(url, skip_direct=True)
+            validators = {"etag": None, "last_modified": None, "content_type": "image/jpeg"}
+            if not body:
+                # Serve the stale copy rather than nothing (e.g. expired CDN signature)
+                if data is not None:
+                    return CachedImage(alias["sha256"], data, alias.get("content_type") or "image/jpeg")
+                return None
+
+        self._stats["downloads"] += 1
+        sha = await self._io(self.put_blob, body)
+        await self._io(self._set_alias, key, {"sha256": sha, "url": url, "fetched_at": time.time(), **validators})
+        return CachedImage(sha, body, validators["content_type"] or "image/jpeg")
+
+    async def derive(self, sha256: str, variant: str, transform: Callable[[bytes], bytes]) -> Optional[bytes]:
+        """
+        A derived rendition (e.g. "jpeg", "thumb_256") of a cached blob, built
+        once in the image thread pool and cached like any other blob.
+        """
+        blob_id = f"{sha256}_{variant}"
+        data = await self.get_blob_async(blob_id)
+        if data is not None:
+            return data
+        original = await self.get_blob_async(sha256)
+        if original is None:
+            return None
+        data = await asyncio.get_running_loop().run_in_executor(_image_pool, transform, original)
+        self._stats["derived"] += 1
+        await self._io(self._write_file, self._path("blobs", blob_id), data)
+        self._remember(blob_id, data)
+        return data
+
+    async def get_jpeg(self, sha256: str) -> Optional[bytes]:
+        return await self.derive(sha256, "jpeg", to_jpeg)
+
+    async def get_thumbnail(self, sha256: str, size: int = THUMBNAIL_SIZE) -> Optional[bytes]:
+        return await self.derive(sha256, f"thumb_{size}", lambda data: to_thumbnail(data, size))
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, used = len(self._blobs), self._memory_bytes
+        return {
+            "memory_entries": entries, "memory_bytes": used, "memory_max_bytes": self.max_memory_bytes,
+            "disk_bytes": self._disk_bytes, "disk_max_bytes": self.max_disk_bytes, **self._stats,
+        }
+
+
+class ImageResources:
+    """
+    Bounded registry of images exposed as meta-ads://images/{id} resources.
+    Holds only blob ids; the bytes stay in the image cache.
+    """
+
+    def __init__(self, cache: ImageCache, max_entries: int = MAX_RESOURCES):
+        self.cache = cache
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+
+    def register(self, resource_id: str, image_bytes: bytes, name: str, mime_type: str = "image/jpeg") -> str:
+        sha = self.cache.put_blob(image_bytes)
+        self._entries[resource_id] = {"sha256": sha, "name": name, "mime_type": mime_type}
+        self._entries.move_to_end(resource_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return sha
+
+    def list(self) -> List[Dict[str, str]]:
+        return [{"resource_id": rid, **info} for rid, info in self._entries.items()]
+
+    async def get(self, resource_id: str) -> Optional[Dict[str, Any]]:
+        info = self._entries.get(resource_id)
+        if info is None:
+            return None
+        data = await self.cache.get_blob_async(info["sha256"])
+        if data is None:
+            return None
+        return {**info, "data": data}
+
+    async def get_thumbnail(self, resource_id: str) -> Optional[Dict[str, Any]]:
+        """JPEG thumbnail of a registered image, generated on first request and cached."""
+        info = self._entries.get(resource_id)
+        if info is None:
+            return None
+        data = await self.cache.get_thumbnail(info["sha256"])
+        if data is None:
+            return None
+        return {**info, "mime_type": "image/jpeg", "data": data}
+
+
+image_cache = ImageCache()
+image_resources = ImageResources(image_cache)
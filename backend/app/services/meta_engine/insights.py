@@ -3,7 +3,8 @@
 import json
 from typing import Optional, Union, Dict, List
 from .api import meta_api_tool, make_api_request
-from .utils import download_image, try_multiple_download_methods, ad_creative_images, create_resource_from_image
+from .pagination import collect_edges
+from .utils import download_image, try_multiple_download_methods, create_resource_from_image
 from .server import mcp_server
 import base64
 import datetime
@@ -14,7 +15,8 @@ import datetime
 async def get_insights(object_id: str, access_token: Optional[str] = None,
                       time_range: Union[str, Dict[str, str]] = "maximum", breakdown: str = "",
                       level: str = "ad", limit: int = 25, after: str = "",
-                      action_attribution_windows: Optional[List[str]] = None) -> str:
+                      action_attribution_windows: Optional[List[str]] = None,
+                      max_items: int = 0) -> str:
     """
     Get performance insights for a campaign, ad set, ad or account.
     
@@ -54,6 +56,8 @@ async def get_insights(object_id: str, access_token: Optional[str] = None,
         after: Pagination cursor to get the next set of results. Use the 'after' cursor from previous response's paging.next field.
         action_attribution_windows: Optional list of attribution windows (e.g., ["1d_click", "7d_click", "1d_view"]).
                    When specified, actions include additional fields for each window. The 'value' field always shows 7d_click.
+        max_items: If > 0, follow pagination cursors and return up to this many rows in one response
+                   (limit then acts as the page size). Default 0 returns a single page.
     """
     if not object_id:
         return json.dumps({"error": "No object ID provided"}, indent=2)
@@ -86,7 +90,11 @@ async def get_insights(object_id: str, access_token: Optional[str] = None,
         # Meta API expects single-quote format: ['1d_click','7d_click']
         params["action_attribution_windows"] = "[" + ",".join(f"'{w}'" for w in action_attribution_windows) + "]"
 
-    data = await make_api_request(endpoint, access_token, params)
+    if max_items:
+        # Walk paging cursors instead of returning only the first page
+        data = await collect_edges(endpoint, access_token, params, max_items=max_items)
+    else:
+        data = await make_api_request(endpoint, access_token, params)
     
     return json.dumps(data, indent=2)
 
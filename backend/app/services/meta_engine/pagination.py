@@ -0,0 +1,148 @@
+"""Cursor pagination helpers for Meta Graph API edges."""
+
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+from .api import make_api_request, GraphAPIError
+from .utils import logger
+
+# Page size used when a bounded walk has no explicit "limit"
+DEFAULT_PAGE_SIZE = 100
+
+
+class EdgeIterator:
+    """
+    Async iterator over every row of a Graph API edge (e.g. act_X/ads).
+
+    Follows `paging.cursors.after` and fetches page N+1 while page N is being
+    consumed, so callers can stream rows straight into aggregation. After
+    iteration, `next_cursor` holds the cursor to resume from when the
+    `max_items` bound stopped the walk early (None if the edge was exhausted).
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        access_token: str,
+        params: Optional[Dict[str, Any]] = None,
+        max_items: Optional[int] = None,
+        page_size: Optional[int] = None,
+    ):
+        self.endpoint = endpoint
+        self.access_token = access_token
+        self.params = dict(params or {})
+        if page_size:
+            self.params["limit"] = page_size
+        self.max_items = max_items
+        self.items_yielded = 0
+        self.pages_fetched = 0
+        self.next_cursor: Optional[str] = None
+
+    def _fetch(self, after: Optional[str], budget: Optional[int]) -> "asyncio.Task":
+        params = dict(self.params)
+        if after:
+            params["after"] = after
+        if budget is not None:
+            # Never ask for more rows than the bound allows, so the walk always
+            # stops on a page boundary and `after` is a valid resume cursor
+            params["limit"] = min(int(params.get("limit") or DEFAULT_PAGE_SIZE), budget)
+        return asyncio.ensure_future(make_api_request(self.endpoint, self.access_token, params))
+
+    def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Dict[str, Any]]:
+        received = 0
+        pending = self._fetch(self.params.pop("after", None), self.max_items)
+        try:
+            while pending is not None:
+                page = await pending
+                pending = None
+                if "error" in page:
+                    raise GraphAPIError(page["error"])
+                self.pages_fetched += 1
+
+                rows = page.get("data", [])
+                if self.max_items is not None:
+                    rows = rows[:self.max_items - received]
+                received += len(rows)
+
+                paging = page.get("paging", {})
+                after = paging.get("cursors", {}).get("after") if paging.get("next") else None
+                budget = None if self.max_items is None else self.max_items - received
+
+                # Prefetch the next page before handing rows to the caller
+                if after and rows and (budget is None or budget > 0):
+                    pending = self._fetch(after, budget)
+                else:
+                    self.next_cursor = after if (after and budget == 0) else None
+
+                for row in rows:
+                    self.items_yielded += 1
+                    yield row
+        finally:
+            if pending is not None and not pending.done():
+                pending.cancel()
+
+
+def iter_edges(
+    endpoint: str,
+    access_token: str,
+    params: Optional[Dict[str, Any]] = None,
+    max_items: Optional[int] = None,
+    page_size: Optional[int] = None,
+) -> EdgeIterator:
+    """
+    Stream every row of a paginated Graph API edge.
+
+    Args:
+        endpoint: API endpoint path (without base URL), e.g. "act_123/ads"
+        access_token: Meta API access token
+        params: Query parameters for the first page (an "after" cursor resumes a walk)
+        max_items: Stop after this many rows (None for no bound)
+        page_size: Rows requested per page (overrides params["limit"])
+
+    Returns:
+        EdgeIterator usable with `async for`
+    """
+    return EdgeIterator(endpoint, access_token, params, max_items=max_items, page_size=page_size)
+
+
+async def collect_edges(
+    endpoint: str,
+    access_token: str,
+    params: Optional[Dict[str, Any]] = None,
+    max_items: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Materialize an edge walk into a Graph-style response dict.
+
+    Used by the list tools when the caller asks for more than one page. The
+    result keeps the usual {"data": [...], "paging": {...}} shape so existing
+    consumers keep working; "paging" is only present when rows remain.
+    """
+    edges = iter_edges(endpoint, access_token, params, max_items=max_items)
+    rows: List[Dict[str, Any]] = []
+    try:
+        async for row in edges:
+            rows.append(row)
+    except GraphAPIError as e:
+        if not rows:
+            return {"error": e.error_data}
+        logger.warning(f"Pagination of {endpoint} stopped early: {e.message}")
+        return {
+            "data": rows,
+            "summary": {"total_fetched": len(rows), "pages_fetched": edges.pages_fetched, "truncated": True},
+            "error": e.error_data,
+        }
+
+    result: Dict[str, Any] = {
+        "data": rows,
+        "summary": {
+            "total_fetched": len(rows),
+            "pages_fetched": edges.pages_fetched,
+            "truncated": edges.next_cursor is not None,
+        },
+    }
+    if edges.next_cursor:
+        result["paging"] = {"cursors": {"after": edges.next_cursor}}
+    return result
@@ -0,0 +1,282 @@
+"""Rate-limit aware scheduling for Meta Graph API requests."""
+
+from typing import Any, Dict, Iterator, Mapping, Optional
+from contextlib import contextmanager
+import asyncio
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from app.core.cache import get_cache
+from .utils import logger
+
+# Error codes Meta uses for throttling (app, user, page, custom and BUC limits).
+# These must NOT be treated as auth failures.
+THROTTLE_ERROR_CODES = {4, 17, 32, 613} | set(range(80000, 80015))
+
+# Utilization (percent) above which calls start being paced / are blocked
+SOFT_LIMIT_PCT = float(os.environ.get("META_RATE_SOFT_LIMIT_PCT", "75"))
+HARD_LIMIT_PCT = float(os.environ.get("META_RATE_HARD_LIMIT_PCT", "95"))
+# Background jobs yield earlier so dashboards keep headroom
+BACKGROUND_LIMIT_PCT = float(os.environ.get("META_RATE_BACKGROUND_LIMIT_PCT", "60"))
+# Meta usage is a rolling one-hour window; utilization recovers roughly linearly
+WINDOW_SEC = float(os.environ.get("META_RATE_WINDOW_SEC", "3600"))
+DEFAULT_THROTTLE_BACKOFF_SEC = float(os.environ.get("META_RATE_THROTTLE_BACKOFF_SEC", "60"))
+MAX_WAIT_SEC = float(os.environ.get("META_RATE_MAX_WAIT_SEC", "300"))
+# Interactive calls held back by the limiter raise a shared flag (Redis when
+# available) for this long, refreshed while they wait, so background calls in
+# every process - API workers and Celery alike - yield to them
+PREEMPT_SIGNAL_SEC = float(os.environ.get("META_RATE_PREEMPT_SIGNAL_SEC", "2"))
+# How long a process trusts its last read of the shared flag
+PREEMPT_CHECK_SEC = 0.25
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+_request_priority: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "meta_request_priority", default=PRIORITY_INTERACTIVE
+)
+
+_ACCOUNT_RE = re.compile(r"^(act_\d+)")
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Mark Graph API calls made inside this block (e.g. Celery jobs) as preemptible."""
+    token = _request_priority.set(PRIORITY_BACKGROUND)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def account_from_endpoint(endpoint: str) -> Optional[str]:
+    """Extract the ad account id (act_XXX) an endpoint is scoped to, if any."""
+    match = _ACCOUNT_RE.match(endpoint or "")
+    return match.group(1) if match else None
+
+
+class UsageBucket:
+    """
+    Token bucket for one quota scope, refilled from Meta usage headers.
+
+    Capacity is expressed in percentage points of the quota: the bucket holds
+    `100 - utilization` tokens and refills at 100 tokens per WINDOW_SEC. Every
+    header observation resets the level to what Meta reports.
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self.utilization = 0.0
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.details: Dict[str, Any] = {}
+
+    def current_utilization(self, now: Optional[float] = None) -> float:
+        now = now or time.monotonic()
+        decay = (now - self.updated_at) / WINDOW_SEC * 100.0
+        return max(0.0, self.utilization - decay)
+
+    def observe(self, utilization: float, regain_sec: float = 0.0, details: Optional[Dict[str, Any]] = None) -> None:
+        now = time.monotonic()
+        self.utilization = max(0.0, float(utilization))
+        self.updated_at = now
+        if regain_sec > 0:
+            self.blocked_until = max(self.blocked_until, now + regain_sec)
+        if details is not None:
+            self.details = details
+
+    def throttle(self, backoff_sec: float) -> None:
+        now = time.monotonic()
+        self.utilization = max(self.utilization, 100.0)
+        self.updated_at = now
+        self.blocked_until = max(self.blocked_until, now + backoff_sec)
+
+    def wait_time(self, limit_pct: float) -> float:
+        """Seconds to wait before a call at the given utilization limit may proceed."""
+        now = time.monotonic()
+        if self.blocked_until > now:
+            return self.blocked_until - now
+        excess = self.current_utilization(now) - limit_pct
+        if excess <= 0:
+            return 0.0
+        return excess / 100.0 * WINDOW_SEC
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "utilization_pct": round(self.current_utilization(now), 2),
+            "blocked_for_sec": round(max(0.0, self.blocked_until - now), 1),
+            "details": self.details,
+        }
+
+
+class RateLimitScheduler:
+    """
+    Delays Graph API calls before Meta's quotas are exhausted.
+
+    Usage is tracked per app, per ad account and per business use case from the
+    X-App-Usage, X-Ad-Account-Usage and X-Business-Use-Case-Usage headers.
+    Interactive calls (the default) preempt background calls: background calls
+    hold back at a lower utilization and whenever interactive calls are waiting
+    in any process. Both the async client (`acquire`) and the requests-based
+    services (`acquire_sync`) go through the same buckets.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[str, UsageBucket] = {}
+        self._interactive_waiting = 0
+        self._lock = threading.Lock()
+        self._stats = {"delayed_calls": 0, "total_delay_sec": 0.0, "throttle_errors": 0}
+        self._signal = get_cache("meta_rate_limiter", default_ttl=PREEMPT_SIGNAL_SEC, max_entries=16)
+        self._signal_published_at = 0.0
+        self._signal_checked_at = 0.0
+        self._signal_seen = False
+
+    def _bucket(self, scope: str) -> UsageBucket:
+        bucket = self._buckets.get(scope)
+        if bucket is None:
+            bucket = self._buckets[scope] = UsageBucket(scope)
+        return bucket
+
+    def _scopes_for(self, account_id: Optional[str]) -> list:
+        scopes = [self._bucket("app")]
+        if account_id:
+            scopes.append(self._bucket(f"account:{account_id}"))
+        # BUC scopes are keyed by business id, which only the headers reveal,
+        # so every known one applies
+        scopes.extend(b for key, b in self._buckets.items() if key.startswith("buc:"))
+        return scopes
+
+    async def acquire(self, endpoint: str) -> None:
+        """Wait until the quota scopes for this endpoint have headroom."""
+        for step in self._wait_steps(endpoint):
+            await asyncio.sleep(step)
+
+    def acquire_sync(self, endpoint: str) -> None:
+        """Blocking counterpart of `acquire` for the requests-based services."""
+        for step in self._wait_steps(endpoint):
+            time.sleep(step)
+
+    def _wait_steps(self, endpoint: str) -> Iterator[float]:
+        """Sleeps (in seconds) a call to this endpoint must take before it is sent."""
+        priority = _request_priority.get()
+        interactive = priority == PRIORITY_INTERACTIVE
+        limit_pct = HARD_LIMIT_PCT if interactive else BACKGROUND_LIMIT_PCT
+        scopes = self._scopes_for(account_from_endpoint(endpoint))
+
+        waited = 0.0
+        if interactive:
+            with self._lock:
+                self._interactive_waiting += 1
+        try:
+            while waited < MAX_WAIT_SEC:
+                delay = max((b.wait_time(limit_pct) for b in scopes), default=0.0)
+                if not interactive and self._interactive_pending():
+                    delay = max(delay, 0.25)
+                if delay <= 0:
+                    break
+                if interactive:
+                    self._publish_interactive_wait()
+                # Sleep in short slices so new headers / preemption are picked up
+                step = min(delay, 5.0, MAX_WAIT_SEC - waited)
+                if waited == 0.0:
+                    logger.info(f"Rate limiter delaying {priority} call to {endpoint} (~{delay:.1f}s)")
+                yield step
+                waited += step
+        finally:
+            if interactive:
+                with self._lock:
+                    self._interactive_waiting -= 1
+
+        if waited:
+            with self._lock:
+                self._stats["delayed_calls"] += 1
+                self._stats["total_delay_sec"] += waited
+            return
+
+        # Soft pacing: spread calls out as utilization approaches the limit
+        utilization = max((b.current_utilization() for b in scopes), default=0.0)
+        if utilization > SOFT_LIMIT_PCT:
+            pace = (utilization - SOFT_LIMIT_PCT) / max(1.0, 100.0 - SOFT_LIMIT_PCT)
+            yield pace if interactive else pace * 4
+
+    def _publish_interactive_wait(self) -> None:
+        now = time.monotonic()
+        if now - self._signal_published_at >= PREEMPT_SIGNAL_SEC / 2:
+            self._signal_published_at = now
+            self._signal.set("interactive_waiting", 1)
+
+    def _interactive_pending(self) -> bool:
+        """Whether an interactive call is being held back in this or another process."""
+        if self._interactive_waiting > 0:
+            return True
+        now = time.monotonic()
+        if now - self._signal_checked_at >= PREEMPT_CHECK_SEC:
+            self._signal_checked_at = now
+            self._signal_seen = self._signal.get("interactive_waiting") is not None
+        return self._signal_seen
+
+    def record_headers(self, headers: Mapping[str, str], endpoint: str) -> None:
+        """Update buckets from the usage headers of a Graph API response."""
+        app_usage = _parse_header(headers.get("x-app-usage"))
+        if isinstance(app_usage, dict):
+            self._bucket("app").observe(_max_pct(app_usage), details=app_usage)
+
+        account_usage = _parse_header(headers.get("x-ad-account-usage"))
+        account_id = account_from_endpoint(endpoint)
+        if isinstance(account_usage, dict) and account_id:
+            regain = float(account_usage.get("reset_time_duration") or 0)
+            self._bucket(f"account:{account_id}").observe(
+                account_usage.get("acc_id_util_pct", 0), regain_sec=regain, details=account_usage
+            )
+
+        buc_usage = _parse_header(headers.get("x-business-use-case-usage"))
+        if isinstance(buc_usage, dict):
+            for business_id, entries in buc_usage.items():
+                for entry in entries if isinstance(entries, list) else []:
+                    regain_min = float(entry.get("estimated_time_to_regain_access") or 0)
+                    self._bucket(f"buc:{business_id}:{entry.get('type', 'unknown')}").observe(
+                        _max_pct(entry), regain_sec=regain_min * 60, details=entry
+                    )
+
+    def record_throttle(self, error_code: int, endpoint: str) -> None:
+        """Block the affected scope after a throttling error."""
+        self._stats["throttle_errors"] += 1
+        account_id = account_from_endpoint(endpoint)
+        if error_code in (613, 17) or error_code >= 80000:
+            scope = f"account:{account_id}" if account_id else "app"
+        else:
+            scope = "app"
+        bucket = self._bucket(scope)
+        # Headers recorded for the same response may already carry a longer regain time
+        bucket.throttle(DEFAULT_THROTTLE_BACKOFF_SEC)
+        logger.warning(f"Meta throttling (code {error_code}) on {scope}; backing off")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Current utilization per quota scope plus scheduler counters."""
+        return {
+            "scopes": {scope: bucket.snapshot() for scope, bucket in self._buckets.items()},
+            "interactive_waiting": self._interactive_waiting,
+            "interactive_waiting_elsewhere": self._signal_seen,
+            **{k: (round(v, 1) if isinstance(v, float) else v) for k, v in self._stats.items()},
+        }
+
+
+def _parse_header(value: Optional[str]) -> Any:
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _max_pct(usage: Dict[str, Any]) -> float:
+    values = [usage.get(k) for k in ("call_count", "total_cputime", "total_time")]
+    return float(max((v for v in values if isinstance(v, (int, float))), default=0))
+
+
+rate_limiter = RateLimitScheduler()
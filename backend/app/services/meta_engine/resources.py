@@ -2,7 +2,10 @@
 
 from typing import Dict, Any
 import base64
-from .utils import ad_creative_images
+from .image_cache import image_resources
+
+# meta-ads://images/{id}/thumbnail serves a small JPEG rendition of the image
+THUMBNAIL_SUFFIX = "/thumbnail"
 
 
 async def list_resources() -> Dict[str, Any]:
@@ -15,12 +18,17 @@ async def list_resources() -> Dict[str, Any]:
     resources = []
     
     # Add all ad creative images as resources
-    for resource_id, image_info in ad_creative_images.items():
+    for image_info in image_resources.list():
         resources.append({
-            "uri": f"meta-ads://images/{resource_id}",
+            "uri": f"meta-ads://images/{image_info['resource_id']}",
             "mimeType": image_info["mime_type"],
             "name": image_info["name"]
         })
+        resources.append({
+            "uri": f"meta-ads://images/{image_info['resource_id']}{THUMBNAIL_SUFFIX}",
+            "mimeType": "image/jpeg",
+            "name": f"{image_info['name']} (thumbnail)"
+        })
     
     return {"resources": resources}
 
@@ -30,13 +38,17 @@ async def get_resource(resource_id: str) -> Dict[str, Any]:
     Get a specific resource by URI
     
     Args:
-        resource_id: Unique identifier for the resource
+        resource_id: Unique identifier for the resource, with a "/thumbnail"
+            suffix for the image's thumbnail
         
     Returns:
         Dictionary with resource data
     """
-    if resource_id in ad_creative_images:
-        image_info = ad_creative_images[resource_id]
+    if resource_id.endswith(THUMBNAIL_SUFFIX):
+        image_info = await image_resources.get_thumbnail(resource_id[:-len(THUMBNAIL_SUFFIX)])
+    else:
+        image_info = await image_resources.get(resource_id)
+    if image_info is not None:
         return {
             "data": base64.b64encode(image_info["data"]).decode("utf-8"),
             "mimeType": image_info["mime_type"]
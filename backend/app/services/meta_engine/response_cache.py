@@ -0,0 +1,237 @@
+"""Single-flight coalescing and short-TTL response cache for Graph API GETs."""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import parse_qsl, urlsplit
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from .utils import logger
+
+CACHE_ENABLED = os.environ.get("META_CACHE_ENABLED", "1") == "1"
+DEFAULT_TTL_SEC = float(os.environ.get("META_CACHE_DEFAULT_TTL_SEC", "30"))
+MAX_ENTRIES = int(os.environ.get("META_CACHE_MAX_ENTRIES", "2000"))
+
+# Per-endpoint TTLs (seconds), first match wins. Matched against the endpoint
+# path without base URL / API version, e.g. "act_123/insights".
+TTL_RULES = [
+    (re.compile(r"^me/(accounts|adaccounts)$"), 300.0),
+    (re.compile(r"/insights$"), 120.0),
+    (re.compile(r"/(posts|media|comments)$"), 60.0),
+    (re.compile(r"/(campaigns|adsets|ads)$"), 30.0),
+]
+
+# Reads that poll for state changes must always reach Meta
+_NO_CACHE_FIELDS = ("async_status",)
+_VERSION_RE = re.compile(r"^v\d+\.\d+/")
+
+CacheKey = Tuple[str, str, Tuple[Tuple[str, str], ...]]
+
+
+def token_fingerprint(access_token: Optional[str]) -> str:
+    """Stable, non-reversible identifier for a token (tokens are never stored as keys)."""
+    if not access_token:
+        return "anonymous"
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+
+def split_graph_url(url_or_endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """
+    Reduce a full Graph URL (or bare endpoint) to (endpoint, params).
+
+    Query parameters embedded in the URL (e.g. `paging.next` links) are merged
+    into params so both spellings of the same request share a cache key.
+    """
+    parts = urlsplit(url_or_endpoint)
+    endpoint = _VERSION_RE.sub("", parts.path.lstrip("/"))
+    merged = dict(parse_qsl(parts.query))
+    merged.update(params or {})
+    return endpoint, merged
+
+
+def _encode(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, sort_keys=True)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def cache_key(access_token: Optional[str], endpoint: str, params: Optional[Dict[str, Any]]) -> CacheKey:
+    normalized = tuple(sorted(
+        (key, _encode(value)) for key, value in (params or {}).items() if key != "access_token"
+    ))
+    return token_fingerprint(access_token), endpoint.strip("/"), normalized
+
+
+def ttl_for(endpoint: str, params: Optional[Dict[str, Any]] = None) -> float:
+    fields = str((params or {}).get("fields", ""))
+    if any(name in fields for name in _NO_CACHE_FIELDS):
+        return 0.0
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(endpoint):
+            return ttl
+    return DEFAULT_TTL_SEC
+
+
+def invalidates_cache(method: str, endpoint: str) -> bool:
+    """Whether a non-GET call may change data that cached reads depend on."""
+    if method.upper() == "GET":
+        return False
+    # POST act_X/insights only creates an async report run
+    return not endpoint.rstrip("/").endswith("/insights")
+
+
+class ResponseCache:
+    """
+    Shares identical in-flight GETs and briefly caches their responses.
+
+    Concurrent callers asking for the same (token, endpoint, params) while a
+    request is in flight wait for that request instead of issuing their own.
+    Successful responses are then served from memory for a per-endpoint TTL.
+    Works for both the async Graph client and the synchronous services; every
+    caller receives its own copy of the response.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._async_inflight: Dict[Tuple[int, CacheKey], asyncio.Task] = {}
+        self._sync_inflight: Dict[CacheKey, Future] = {}
+        # Bumped on every invalidation so responses fetched before a write are not stored
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    def _lookup(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return copy.deepcopy(value)
+
+    def _store(self, key: CacheKey, value: Any, ttl: float, generation: int) -> None:
+        if ttl <= 0 or not isinstance(value, dict) or "error" in value:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    async def fetch(
+        self,
+        access_token: Optional[str],
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        fetcher: Callable[[], Awaitable[Dict[str, Any]]],
+    ) -> Dict[str, Any]:
+        """Return a cached or in-flight response, or run `fetcher` once for all waiters."""
+        if not CACHE_ENABLED:
+            return await fetcher()
+
+        key = cache_key(access_token, endpoint, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        flight_key = (id(asyncio.get_running_loop()), key)
+        task = self._async_inflight.get(flight_key)
+        if task is None:
+            self._stats["misses"] += 1
+            task = asyncio.ensure_future(self._run_async(flight_key, endpoint, params, fetcher))
+            self._async_inflight[flight_key] = task
+        else:
+            self._stats["coalesced"] += 1
+
+        # Shielded so one cancelled caller does not cancel the shared request
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result)
+
+    async def _run_async(self, flight_key, endpoint, params, fetcher) -> Dict[str, Any]:
+        generation = self._generation
+        try:
+            result = await fetcher()
+            self._store(flight_key[1], result, ttl_for(endpoint, params), generation)
+            return result
+        finally:
+            self._async_inflight.pop(flight_key, None)
+
+    def fetch_sync(
+        self,
+        access_token: Optional[str],
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        fetcher: Callable[[], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Blocking counterpart of `fetch` for the requests-based services."""
+        if not CACHE_ENABLED:
+            return fetcher()
+
+        key = cache_key(access_token, endpoint, params)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._sync_inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._sync_inflight[key] = Future()
+                self._stats["misses"] += 1
+                generation = self._generation
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fetcher()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._store(key, result, ttl_for(endpoint, params), generation)
+            future.set_result(result)
+            return copy.deepcopy(result)
+        finally:
+            with self._lock:
+                self._sync_inflight.pop(key, None)
+
+    def invalidate(self, reason: str = "") -> None:
+        """Drop every cached response, e.g. after a campaign/ad write."""
+        with self._lock:
+            self._generation += 1
+            self._stats["invalidations"] += 1
+            dropped = len(self._entries)
+            self._entries.clear()
+        if dropped:
+            logger.debug(f"Graph response cache invalidated ({dropped} entries){': ' + reason if reason else ''}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            "enabled": CACHE_ENABLED,
+            "entries": entries,
+            "in_flight": len(self._async_inflight) + len(self._sync_inflight),
+            **self._stats,
+        }
+
+
+response_cache = ResponseCache()
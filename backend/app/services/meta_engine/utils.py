@@ -12,6 +12,7 @@ import json
 import logging
 import pathlib
 import platform
+from .http_client import get_http_client, CDN_CLIENT
 
 # Check for Meta app credentials in environment
 META_APP_ID = os.environ.get("META_APP_ID", "")
@@ -80,8 +81,7 @@ def setup_logging():
 # Create the logger instance to be imported by other modules
 logger = setup_logging()
 
-# Global store for ad creative images
-ad_creative_images = {}
+# Creative image bytes live in the bounded, content-addressed cache (see image_cache.py)
 
 
 def extract_creative_image_urls(creative: Dict[str, Any]) -> List[str]:
@@ -172,17 +172,18 @@ async def download_image(url: str) -> Optional[bytes]:
             "Accept": "*/*"
         }
         
-        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-            # Simple GET request just like curl
-            response = await client.get(url, headers=headers)
-            
-            # Check response
-            if response.status_code == 200:
-                print(f"Successfully downloaded image: {len(response.content)} bytes")
-                return response.content
-            else:
-                print(f"Failed to download image: HTTP {response.status_code}")
-                return None
+        # Pooled CDN client: keeps connections to scontent/fbcdn hosts alive
+        client = get_http_client(CDN_CLIENT)
+        # Simple GET request just like curl
+        response = await client.get(url, headers=headers, timeout=30.0)
+        
+        # Check response
+        if response.status_code == 200:
+            print(f"Successfully downloaded image: {len(response.content)} bytes")
+            return response.content
+        else:
+            print(f"Failed to download image: HTTP {response.status_code}")
+            return None
                 
     except httpx.HTTPStatusError as e:
         print(f"HTTP Error when downloading image: {e}")
@@ -195,20 +196,22 @@ async def download_image(url: str) -> Optional[bytes]:
         return None
 
 
-async def try_multiple_download_methods(url: str) -> Optional[bytes]:
+async def try_multiple_download_methods(url: str, skip_direct: bool = False) -> Optional[bytes]:
     """
     Try multiple methods to download an image, with different approaches for Meta CDN.
     
     Args:
         url: Image URL
+        skip_direct: Skip method 1 when the caller already tried a plain download
         
     Returns:
         Image data as bytes if successful, None otherwise
     """
     # Method 1: Direct download with custom headers
-    image_data = await download_image(url)
-    if image_data:
-        return image_data
+    if not skip_direct:
+        image_data = await download_image(url)
+        if image_data:
+            return image_data
     
     print("Direct download failed, trying alternative methods...")
     
@@ -220,15 +223,16 @@ async def try_multiple_download_methods(url: str) -> Optional[bytes]:
             "Cookie": "presence=EDvF3EtimeF1697900316EuserFA21B00112233445566AA0EstateFDutF0CEchF_7bCC"  # Fake cookie
         }
         
-        async with httpx.AsyncClient(follow_redirects=True) as client:
-            response = await client.get(url, headers=headers, timeout=30.0)
-            response.raise_for_status()
-            print(f"Method 2 succeeded with cookie simulation: {len(response.content)} bytes")
-            return response.content
+        client = get_http_client(CDN_CLIENT)
+        response = await client.get(url, headers=headers, timeout=30.0)
+        response.raise_for_status()
+        print(f"Method 2 succeeded with cookie simulation: {len(response.content)} bytes")
+        return response.content
     except Exception as e:
         print(f"Method 2 failed: {str(e)}")
     
     # Method 3: Try with session that keeps redirects and cookies
+    # (dedicated client on purpose: the cookie jar must not leak into the shared pool)
     try:
         async with httpx.AsyncClient(follow_redirects=True) as client:
             # First visit Facebook to get cookies
@@ -256,11 +260,9 @@ def create_resource_from_image(image_bytes: bytes, resource_id: str, name: str)
     Returns:
         Dictionary with resource information
     """
-    ad_creative_images[resource_id] = {
-        "data": image_bytes,
-        "mime_type": "image/jpeg",
-        "name": name
-    }
+    from .image_cache import image_resources
+
+    image_resources.register(resource_id, image_bytes, name)
     
     return {
         "resource_id": resource_id,
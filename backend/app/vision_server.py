@@ -0,0 +1,50 @@
+"""
+Shared vision model server.
+
+Holds a single YOLO copy for every API/Celery process on the host instead of
+one per worker. Run it with:
+
+    uvicorn app.vision_server:app --host 127.0.0.1 --port 8100 --workers 1
+
+and point the workers at it with BIA_VISION_SERVER_URL=http://127.0.0.1:8100.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import List
+
+import cv2
+import numpy as np
+from fastapi import FastAPI, File, HTTPException, UploadFile
+
+from app.services.creative_ai import CreativeIntelligenceService
+
+# use_server=False: this process is the server, it always runs the model itself
+vision = CreativeIntelligenceService(use_server=False)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the model before accepting requests
+    await asyncio.to_thread(vision.warm_up)
+    yield
+
+
+app = FastAPI(title="B-Studio Vision Server", lifespan=lifespan)
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok" if vision.model is not None else "unavailable", "model": vision.model_path}
+
+
+@app.post("/detect")
+async def detect(files: List[UploadFile] = File(...)):
+    """Object detection for a batch of encoded images, in upload order."""
+    images = []
+    for upload in files:
+        img = cv2.imdecode(np.frombuffer(await upload.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+        if img is None:
+            raise HTTPException(status_code=400, detail=f"Invalid image data: {upload.filename}")
+        images.append(img)
+    detections = await asyncio.to_thread(vision._detect_local, images)
+    return {"detections": detections}
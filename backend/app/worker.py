@@ -24,9 +24,14 @@ def publish_post_task(message: str, image_url: str = None):
 def periodic_intelligence_check():
     """
     Task that runs periodically to analyze performance 24/7.
+    Fans the managed ad accounts out to tasks.analyze_ad_accounts in
+    partitions of BIA_AGENT_ACCOUNTS_PER_TASK, so the cycle runs on every
+    available worker instead of walking the accounts one by one.
     """
+    import uuid
+    from celery import group
     from app.core.database import SessionLocal
-    from app.services.intelligence import intelligence_service
+    from app.services.intelligence import intelligence_service, AGENT_ACCOUNTS_PER_TASK
     from app.models.agent import AgentSettings
 
     db = SessionLocal()
@@ -39,19 +44,152 @@ def periodic_intelligence_check():
             db.commit()
 
         mode = config.mode if config else "manual"
-        
-        if mode == "manual":
-            logger.info("Intelligence check skipped (Manual Mode).")
-            return
-        
-        logger.info(f"Starting periodic strategic analysis (Mode: {mode})")
-        try:
-            asyncio.run(intelligence_service.analyze_performance(mode))
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            try:
-                loop.run_until_complete(intelligence_service.analyze_performance(mode))
-            finally:
-                loop.close()
     finally:
         db.close()
+
+    if mode == "manual":
+        logger.info("Intelligence check skipped (Manual Mode).")
+        return
+
+    accounts = intelligence_service.managed_accounts()
+    if not accounts:
+        logger.warning("Intelligence check skipped: no ad accounts to analyze.")
+        return
+
+    cycle_id = uuid.uuid4().hex
+    size = max(1, AGENT_ACCOUNTS_PER_TASK)
+    partitions = [accounts[i:i + size] for i in range(0, len(accounts), size)]
+    # Partitions not picked up before the next cycle are dropped rather than piling up
+    group(analyze_ad_accounts.s(partition, mode, cycle_id) for partition in partitions).apply_async(expires=3600)
+
+    logger.info(f"Starting periodic strategic analysis (Mode: {mode}): {len(accounts)} ad accounts in {len(partitions)} tasks, cycle {cycle_id}")
+    return {"cycle_id": cycle_id, "accounts": len(accounts), "tasks": len(partitions)}
+
+@celery_app.task(name="tasks.sync_insights_warehouse")
+def sync_insights_warehouse():
+    """
+    Incrementally syncs daily Meta insights into the local warehouse.
+    Only days Meta may still restate (plus new days) are fetched on each run.
+    """
+    from app.core.database import SessionLocal
+    from app.services.insights_warehouse import insights_warehouse_service
+    from app.services.meta_engine.rate_limiter import background_priority
+
+    db = SessionLocal()
+    try:
+        # Background job: yield Meta API quota to interactive dashboard calls
+        with background_priority():
+            results = insights_warehouse_service.sync_all(db)
+        for result in results:
+            if "error" in result:
+                logger.error(f"Insights warehouse sync error: {result['error']}")
+        return [{k: str(v) for k, v in result.items()} for result in results]
+    finally:
+        db.close()
+
+@celery_app.task(name="tasks.build_heatmap")
+def build_heatmap(city_id: str, resolution: int = 8, strategy: str = "blue_ocean", competitors: list = None):
+    """
+    Rebuilds a city opportunity heatmap. Cells whose inputs did not change are
+    skipped, so re-running after a census or competitor update is cheap.
+    """
+    from app.core.database import SessionLocal
+    from app.services.ai_engine import census_client
+    from app.services.heatmap import heatmap_service
+
+    if asyncio.run(census_client.load_city_index(city_id)) is None:
+        return {"error": f"No census data for city {city_id}."}
+
+    db = SessionLocal()
+    try:
+        return heatmap_service.build_city(db, city_id, resolution, strategy, competitors)
+    finally:
+        db.close()
+
+@celery_app.task(name="tasks.analyze_creatives")
+def analyze_creatives(image_urls: list):
+    """
+    Batch vision analysis of ad creatives (concurrent downloads, batched YOLO on CPU).
+    Images already analyzed (same content hash) are served from the database.
+    """
+    from app.services.creative_ai import creative_intelligence_service
+
+    return asyncio.run(creative_intelligence_service.analyze_creatives(image_urls))
+
+@celery_app.task(
+    name="tasks.index_creatives",
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    max_retries=5,
+)
+def index_creatives(ad_account_id: str = None):
+    """
+    Embeds an account's ad creatives into the semantic search index.
+    Progress is checkpointed per page, so retries resume where the last run stopped
+    and unchanged creatives are never re-embedded.
+    """
+    from app.core.database import SessionLocal
+    from app.services.creative_search import creative_search_service
+    from app.services.meta_engine.rate_limiter import background_priority
+
+    db = SessionLocal()
+    try:
+        # Background job: yield Meta API quota to interactive dashboard calls
+        with background_priority():
+            return creative_search_service.index_account(db, ad_account_id)
+    finally:
+        db.close()
+
+@celery_app.task(name="tasks.refresh_client_tokens")
+def refresh_client_tokens():
+    """
+    Renews agency clients' long-lived Meta tokens that expire within
+    BIA_TOKEN_REFRESH_BEFORE_DAYS, so clients never have to redo OAuth.
+    """
+    from oauth_manager import oauth_manager, token_manager
+
+    result = asyncio.run(token_manager.refresh_expiring_tokens(oauth_manager))
+    token_manager.flush_last_used()
+    if result["failed"]:
+        logger.warning(f"Token refresh failed for clients: {result['failed']}")
+    return result
+
+@celery_app.task(name="tasks.ingest_demographics")
+def ingest_demographics():
+    """
+    Stores today's lifetime demographic snapshot of the configured Page
+    (FACEBOOK_PAGE_ID) and its Instagram account, so day-over-day growth is
+    tracked even on days the dashboard is not opened.
+    """
+    import os
+    from app.core.database import SessionLocal
+    from app.services.demographics import demographics_store
+
+    access_token = os.getenv("FACEBOOK_ACCESS_TOKEN")
+    page_id = os.getenv("FACEBOOK_PAGE_ID")
+    if not access_token or not page_id:
+        return {"error": "FACEBOOK_ACCESS_TOKEN and FACEBOOK_PAGE_ID must be configured."}
+
+    db = SessionLocal()
+    try:
+        return asyncio.run(demographics_store.ingest_accounts(db, access_token, page_id))
+    finally:
+        db.close()
+
+@celery_app.task(name="tasks.analyze_ad_accounts")
+def analyze_ad_accounts(ad_account_ids: list, mode: str, cycle_id: str = None):
+    """
+    One partition of the periodic strategic analysis: its accounts are
+    analyzed concurrently (bounded fetches and LLM calls) and each run's
+    duration is recorded in agent_account_runs.
+    """
+    from app.services.intelligence import intelligence_service
+    from app.services.meta_engine.rate_limiter import background_priority
+
+    # Background job: yield Meta API quota to interactive dashboard calls
+    with background_priority():
+        runs = asyncio.run(intelligence_service.analyze_accounts(ad_account_ids, mode, cycle_id))
+    return [
+        {"ad_account_id": run["ad_account_id"], "status": run["status"], "duration_seconds": run["duration_seconds"]}
+        for run in runs
+    ]
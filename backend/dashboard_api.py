@@ -5,15 +5,18 @@ B-Studio Dashboard API - Client Campaign Management
 API para gerenciar campanhas dos clientes via dashboard.
 """
 
-from fastapi import APIRouter, HTTPException, Query, Body
+from fastapi import APIRouter, HTTPException, Query, Body, Depends
 from typing import Optional, Dict, List
 from datetime import datetime
+from sqlalchemy.orm import Session
 import json
 
+from app.core.database import get_db
+from app.models import dashboard as dashboard_models  # noqa: F401  (registers dashboard tables)
+from app.services.dashboard_store import campaign_store
+
 router = APIRouter()
 
-# Banco de dados temporário (em produção, use PostgreSQL)
-campaigns_db = {}
 clients_db = {}
 
 
@@ -73,7 +76,7 @@ class Campaign:
 # ============================================================================
 
 @router.get("/dashboard")
-async def get_dashboard(client_id: str = Query(...)):
+def get_dashboard(client_id: str = Query(...), db: Session = Depends(get_db)):
     """
     Obtém dashboard completo do cliente.
     
@@ -90,18 +93,12 @@ async def get_dashboard(client_id: str = Query(...)):
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    # Obter campanhas do cliente
-    client_campaigns = [c for c in campaigns_db.values() if c['client_id'] == client_id]
-    
-    # Calcular métricas consolidadas
-    total_spend = sum(c.get('metrics', {}).get('spend', 0) for c in client_campaigns)
-    total_impressions = sum(c.get('metrics', {}).get('impressions', 0) for c in client_campaigns)
-    total_clicks = sum(c.get('metrics', {}).get('clicks', 0) for c in client_campaigns)
-    total_conversions = sum(c.get('metrics', {}).get('conversions', 0) for c in client_campaigns)
-    
-    # Campanhas por status
-    active_campaigns = len([c for c in client_campaigns if c['status'] == 'ACTIVE'])
-    paused_campaigns = len([c for c in client_campaigns if c['status'] == 'PAUSED'])
+    # Totais mantidos a cada escrita (sem varrer as campanhas do cliente)
+    stats = campaign_store.stats(db, client_id)
+    total_spend = stats['total_spend']
+    total_impressions = stats['total_impressions']
+    total_clicks = stats['total_clicks']
+    total_conversions = stats['total_conversions']
     
     return {
         'client': {
@@ -110,9 +107,9 @@ async def get_dashboard(client_id: str = Query(...)):
             'email': token.get('user_email'),
         },
         'summary': {
-            'total_campaigns': len(client_campaigns),
-            'active_campaigns': active_campaigns,
-            'paused_campaigns': paused_campaigns,
+            'total_campaigns': stats['total_campaigns'],
+            'active_campaigns': stats['active_campaigns'],
+            'paused_campaigns': stats['paused_campaigns'],
             'total_spend': total_spend,
             'total_impressions': total_impressions,
             'total_clicks': total_clicks,
@@ -121,16 +118,17 @@ async def get_dashboard(client_id: str = Query(...)):
             'avg_cpc': (total_spend / total_clicks) if total_clicks > 0 else 0,
         },
         'ad_accounts': token.get('ad_accounts', []),
-        'recent_campaigns': sorted(client_campaigns, key=lambda x: x['created_at'], reverse=True)[:5],
+        'recent_campaigns': campaign_store.recent(db, client_id, limit=5),
     }
 
 
 @router.get("/dashboard/campaigns")
-async def get_campaigns(
+def get_campaigns(
     client_id: str = Query(...),
     status: Optional[str] = Query(None),
     limit: int = Query(50),
     offset: int = Query(0),
+    db: Session = Depends(get_db),
 ):
     """
     Lista campanhas do cliente com filtros.
@@ -141,15 +139,8 @@ async def get_campaigns(
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    # Filtrar campanhas
-    client_campaigns = [c for c in campaigns_db.values() if c['client_id'] == client_id]
-    
-    if status:
-        client_campaigns = [c for c in client_campaigns if c['status'] == status]
-    
-    # Paginação
-    total = len(client_campaigns)
-    campaigns = client_campaigns[offset:offset + limit]
+    # Filtro e paginação no banco (índice client_id + status)
+    campaigns, total = campaign_store.list(db, client_id, status=status, limit=limit, offset=offset)
     
     return {
         'campaigns': campaigns,
@@ -160,7 +151,7 @@ async def get_campaigns(
 
 
 @router.get("/dashboard/campaigns/{campaign_id}")
-async def get_campaign(campaign_id: str, client_id: str = Query(...)):
+def get_campaign(campaign_id: str, client_id: str = Query(...), db: Session = Depends(get_db)):
     """
     Obtém detalhes de uma campanha específica.
     """
@@ -170,11 +161,10 @@ async def get_campaign(campaign_id: str, client_id: str = Query(...)):
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    if campaign_id not in campaigns_db:
+    campaign = campaign_store.get(db, campaign_id)
+    if campaign is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_db[campaign_id]
-    
     if campaign['client_id'] != client_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
@@ -182,9 +172,10 @@ async def get_campaign(campaign_id: str, client_id: str = Query(...)):
 
 
 @router.post("/dashboard/campaigns")
-async def create_campaign(
+def create_campaign(
     client_id: str = Query(...),
     campaign_data: Dict = Body(...),
+    db: Session = Depends(get_db),
 ):
     """
     Cria nova campanha.
@@ -216,20 +207,21 @@ async def create_campaign(
         'creative': campaign_data.get('creative', {}),
     })
     
-    campaigns_db[campaign.id] = campaign.to_dict()
+    created = campaign_store.create(db, vars(campaign))
     
     return {
         'status': 'success',
         'message': 'Campaign created successfully',
-        'campaign': campaign.to_dict(),
+        'campaign': created,
     }
 
 
 @router.put("/dashboard/campaigns/{campaign_id}")
-async def update_campaign(
+def update_campaign(
     campaign_id: str,
     client_id: str = Query(...),
     campaign_data: Dict = Body(...),
+    db: Session = Depends(get_db),
 ):
     """
     Atualiza campanha existente.
@@ -240,22 +232,17 @@ async def update_campaign(
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    if campaign_id not in campaigns_db:
+    campaign = campaign_store.get(db, campaign_id)
+    if campaign is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_db[campaign_id]
-    
     if campaign['client_id'] != client_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
     # Atualizar campos
     updatable_fields = ['name', 'status', 'budget_total', 'budget_daily', 'targeting', 'creative']
-    for field in updatable_fields:
-        if field in campaign_data:
-            campaign[field] = campaign_data[field]
-    
-    campaign['updated_at'] = datetime.now()
-    campaigns_db[campaign_id] = campaign
+    changes = {field: campaign_data[field] for field in updatable_fields if field in campaign_data}
+    campaign = campaign_store.update(db, campaign_id, {**changes, 'updated_at': datetime.now()})
     
     return {
         'status': 'success',
@@ -265,7 +252,7 @@ async def update_campaign(
 
 
 @router.delete("/dashboard/campaigns/{campaign_id}")
-async def delete_campaign(campaign_id: str, client_id: str = Query(...)):
+def delete_campaign(campaign_id: str, client_id: str = Query(...), db: Session = Depends(get_db)):
     """
     Exclui campanha.
     """
@@ -275,15 +262,14 @@ async def delete_campaign(campaign_id: str, client_id: str = Query(...)):
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    if campaign_id not in campaigns_db:
+    campaign = campaign_store.get(db, campaign_id)
+    if campaign is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_db[campaign_id]
-    
     if campaign['client_id'] != client_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    del campaigns_db[campaign_id]
+    campaign_store.delete(db, campaign_id)
     
     return {
         'status': 'success',
@@ -292,7 +278,7 @@ async def delete_campaign(campaign_id: str, client_id: str = Query(...)):
 
 
 @router.post("/dashboard/campaigns/{campaign_id}/activate")
-async def activate_campaign(campaign_id: str, client_id: str = Query(...)):
+def activate_campaign(campaign_id: str, client_id: str = Query(...), db: Session = Depends(get_db)):
     """
     Ativa campanha (muda status para ACTIVE).
     """
@@ -302,17 +288,14 @@ async def activate_campaign(campaign_id: str, client_id: str = Query(...)):
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    if campaign_id not in campaigns_db:
+    campaign = campaign_store.get(db, campaign_id)
+    if campaign is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_db[campaign_id]
-    
     if campaign['client_id'] != client_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    campaign['status'] = 'ACTIVE'
-    campaign['updated_at'] = datetime.now()
-    campaigns_db[campaign_id] = campaign
+    campaign = campaign_store.update(db, campaign_id, {'status': 'ACTIVE', 'updated_at': datetime.now()})
     
     return {
         'status': 'success',
@@ -322,7 +305,7 @@ async def activate_campaign(campaign_id: str, client_id: str = Query(...)):
 
 
 @router.post("/dashboard/campaigns/{campaign_id}/pause")
-async def pause_campaign(campaign_id: str, client_id: str = Query(...)):
+def pause_campaign(campaign_id: str, client_id: str = Query(...), db: Session = Depends(get_db)):
     """
     Pausa campanha (muda status para PAUSED).
     """
@@ -332,17 +315,14 @@ async def pause_campaign(campaign_id: str, client_id: str = Query(...)):
     if not token:
         raise HTTPException(status_code=401, detail="Client not authorized")
     
-    if campaign_id not in campaigns_db:
+    campaign = campaign_store.get(db, campaign_id)
+    if campaign is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    campaign = campaigns_db[campaign_id]
-    
     if campaign['client_id'] != client_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    campaign['status'] = 'PAUSED'
-    campaign['updated_at'] = datetime.now()
-    campaigns_db[campaign_id] = campaign
+    campaign = campaign_store.update(db, campaign_id, {'status': 'PAUSED', 'updated_at': datetime.now()})
     
     return {
         'status': 'success',
@@ -352,11 +332,12 @@ async def pause_campaign(campaign_id: str, client_id: str = Query(...)):
 
 
 @router.get("/dashboard/metrics")
-async def get_metrics(
+def get_metrics(
     client_id: str = Query(...),
     campaign_id: Optional[str] = Query(None),
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
+    db: Session = Depends(get_db),
 ):
     """
     Obtém métricas detalhadas.
@@ -369,22 +350,21 @@ async def get_metrics(
     
     # Se tiver campaign_id, retorna métricas da campanha
     if campaign_id:
-        if campaign_id not in campaigns_db:
+        campaign = campaign_store.get(db, campaign_id)
+        if campaign is None:
             raise HTTPException(status_code=404, detail="Campaign not found")
         
-        campaign = campaigns_db[campaign_id]
         return {
             'campaign_id': campaign_id,
             'metrics': campaign.get('metrics', {}),
         }
     
     # Senão, retorna métricas consolidadas
-    client_campaigns = [c for c in campaigns_db.values() if c['client_id'] == client_id]
-    
-    total_spend = sum(c.get('metrics', {}).get('spend', 0) for c in client_campaigns)
-    total_impressions = sum(c.get('metrics', {}).get('impressions', 0) for c in client_campaigns)
-    total_clicks = sum(c.get('metrics', {}).get('clicks', 0) for c in client_campaigns)
-    total_conversions = sum(c.get('metrics', {}).get('conversions', 0) for c in client_campaigns)
+    stats = campaign_store.stats(db, client_id)
+    total_spend = stats['total_spend']
+    total_impressions = stats['total_impressions']
+    total_clicks = stats['total_clicks']
+    total_conversions = stats['total_conversions']
     
     return {
         'total_spend': total_spend,
@@ -394,5 +374,5 @@ async def get_metrics(
         'avg_ctr': (total_clicks / total_impressions * 100) if total_impressions > 0 else 0,
         'avg_cpc': (total_spend / total_clicks) if total_clicks > 0 else 0,
         'avg_cpm': (total_spend / total_impressions * 1000) if total_impressions > 0 else 0,
-        'campaigns_count': len(client_campaigns),
+        'campaigns_count': stats['total_campaigns'],
     }
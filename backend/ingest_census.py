@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Importa os downloads oficiais do Censo 2022 (IBGE) para o store local de setores censitários.
+
+Uso:
+    python ingest_census.py --aggregates Agregados_por_setores_basico_BR.csv
+    python ingest_census.py --aggregates Agregados_por_setores_renda_responsavel_BR.csv \\
+        --income-column V06004 --no-population
+    python ingest_census.py --geometry SP_setores_CD2022.geojson --city 3550308
+
+Depois da importação, os índices espaciais das cidades afetadas são reconstruídos,
+então o census_client passa a responder sem acessar a rede.
+"""
+
+import argparse
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from app.services.ai_engine.census_client import census_client  # noqa: E402
+
+GREEN = "\033[92m"
+YELLOW = "\033[93m"
+RED = "\033[91m"
+RESET = "\033[0m"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Importa setores censitários do Censo 2022 (IBGE)")
+    parser.add_argument("--aggregates", action="append", default=[], help="CSV de agregados por setor (pode repetir)")
+    parser.add_argument("--geometry", action="append", default=[], help="Malha de setores (.geojson ou .shp com pyshp)")
+    parser.add_argument("--city", action="append", default=[], help="Importar só estes municípios (código IBGE de 7 dígitos)")
+    parser.add_argument("--code-column", default="CD_SETOR")
+    parser.add_argument("--city-column", default="CD_MUN")
+    parser.add_argument("--population-column", default="v0001")
+    parser.add_argument("--households-column", default="v0007")
+    parser.add_argument("--income-column", default="", help="Coluna de renda média (ex.: V06004)")
+    parser.add_argument("--no-population", action="store_true", help="Não sobrescrever população/domicílios")
+    parser.add_argument("--delimiter", default=";")
+    parser.add_argument("--encoding", default="utf-8-sig", help="Os CSVs antigos do IBGE usam latin-1")
+    parser.add_argument("--skip-index", action="store_true", help="Não reconstruir os índices espaciais")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.aggregates and not args.geometry:
+        print(f"{RED}Informe ao menos --aggregates ou --geometry{RESET}")
+        return 1
+
+    store = census_client.store
+    cities = args.city or None
+    columns = {
+        "code": args.code_column,
+        "city_id": args.city_column,
+        "population": "" if args.no_population else args.population_column,
+        "households": "" if args.no_population else args.households_column,
+        "avg_income": args.income_column,
+    }
+
+    print(f"📦 Store: {store.path}")
+    for path in args.geometry:
+        started = time.time()
+        count = store.ingest_geometry(path, args.code_column, args.city_column, city_ids=cities)
+        print(f"{GREEN}✓ {count} geometrias de {path} ({time.time() - started:.1f}s){RESET}")
+
+    for path in args.aggregates:
+        started = time.time()
+        count = store.ingest_aggregates(path, columns, city_ids=cities, delimiter=args.delimiter, encoding=args.encoding)
+        print(f"{GREEN}✓ {count} setores de {path} ({time.time() - started:.1f}s){RESET}")
+
+    if args.skip_index:
+        return 0
+
+    for city_id in cities or store.city_ids():
+        count = census_client.rebuild_city(city_id)
+        if count:
+            print(f"{GREEN}✓ Índice de {city_id}: {count} setores{RESET}")
+        else:
+            print(f"{YELLOW}⚠ {city_id}: nenhum setor com geometria{RESET}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
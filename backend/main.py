@@ -3,20 +3,36 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from app.routers import posts, ads, auth, intelligence, social, system, dashboard, insights
 from app.core.database import engine, Base
 
 # Import OAuth and Dashboard routers
 from oauth_manager import router as oauth_router
 from dashboard_api import router as dashboard_router
+from app.services.meta_engine.http_client import close_http_clients
+from app.core.lazy import WARMUP_ON_START, warm_up
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # AI models load on first use; BIA_WARMUP_ON_START preloads some in the background
+    if WARMUP_ON_START:
+        asyncio.get_running_loop().run_in_executor(None, warm_up, WARMUP_ON_START)
+    yield
+    # Release pooled keep-alive connections to Meta on shutdown
+    await close_http_clients()
+
+
 app = FastAPI(
     title="B-Studio API",
     description="Backend for Scheduling & Ads Management (The Execution Arm of Bia)",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS Configuration
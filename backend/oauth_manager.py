@@ -16,14 +16,30 @@ Fluxo:
 
 import os
 import json
+import time
+import uuid
+import atexit
+import base64
+import hashlib
+import logging
+import threading
 import httpx
 import secrets
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from dotenv import load_dotenv
+from sqlalchemy import bindparam, update
 
 load_dotenv()
 
+from app.core.cache import get_cache
+from app.core.database import SessionLocal
+from app.models.client_token import ClientToken
+
+logger = logging.getLogger(__name__)
+
 # Configurações do App
 APP_ID = os.getenv("META_APP_ID", "883116774139196")
 APP_SECRET = os.getenv("META_APP_SECRET", "")
@@ -43,6 +59,15 @@ OAUTH_SCOPE = [
 # Estado CSRF (proteção)
 oauth_states = {}
 
+# Cache local de tokens: versão compartilhada conferida a cada TOKEN_RECHECK_SEC,
+# recarga forçada após TOKEN_CACHE_MAX_AGE_SEC mesmo sem Redis
+TOKEN_RECHECK_SEC = float(os.getenv("BIA_TOKEN_RECHECK_SEC", "5"))
+TOKEN_CACHE_MAX_AGE_SEC = float(os.getenv("BIA_TOKEN_CACHE_MAX_AGE_SEC", "300"))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("BIA_TOKEN_CACHE_MAX_ENTRIES", "1024"))
+LAST_USED_FLUSH_SEC = float(os.getenv("BIA_TOKEN_LAST_USED_FLUSH_SEC", "60"))
+# Tokens de longa duração (60 dias) são renovados quando faltam menos dias que isso
+TOKEN_REFRESH_BEFORE_DAYS = int(os.getenv("BIA_TOKEN_REFRESH_BEFORE_DAYS", "7"))
+
 
 class OAuthManager:
     """Gerenciador de OAuth para Meta Ads."""
@@ -155,50 +180,259 @@ class OAuthManager:
             return resp.json()
 
 
+class TokenCipher:
+    """
+    Criptografia dos tokens em repouso (Fernet).
+
+    BIA_TOKEN_ENCRYPTION_KEY aceita várias chaves separadas por vírgula: a
+    primeira criptografa, todas descriptografam (rotação de chave).
+    """
+
+    def __init__(self, keys: Optional[str] = None):
+        self._keys = keys
+        self._fernet = None
+
+    def _get_fernet(self):
+        if self._fernet is None:
+            try:
+                from cryptography.fernet import Fernet, MultiFernet
+            except ImportError:
+                raise RuntimeError("cryptography is required to store client tokens (pip install cryptography)")
+
+            keys = [key.strip() for key in (self._keys or os.getenv("BIA_TOKEN_ENCRYPTION_KEY", "")).split(",") if key.strip()]
+            if not keys:
+                if not APP_SECRET:
+                    raise RuntimeError("Set BIA_TOKEN_ENCRYPTION_KEY (Fernet.generate_key()) to store client tokens")
+                # Sem chave dedicada, derivamos do App Secret (trocar o secret invalida os tokens salvos)
+                logger.warning("BIA_TOKEN_ENCRYPTION_KEY is not set; deriving the token key from META_APP_SECRET.")
+                keys = [base64.urlsafe_b64encode(hashlib.sha256(APP_SECRET.encode()).digest()).decode()]
+            self._fernet = MultiFernet([Fernet(key) for key in keys])
+        return self._fernet
+
+    def encrypt(self, value: str) -> str:
+        return self._get_fernet().encrypt(value.encode()).decode()
+
+    def decrypt(self, value: str) -> str:
+        return self._get_fernet().decrypt(value.encode()).decode()
+
+
 class ClientTokenManager:
-    """Gerenciador de tokens dos clientes (banco de dados)."""
-    
+    """
+    Gerenciador de tokens dos clientes (banco de dados).
+
+    Os tokens ficam na tabela client_tokens, criptografados, e num cache local
+    por processo. Cada gravação publica uma nova versão do cliente no cache
+    compartilhado (Redis); os outros workers conferem essa versão no máximo a
+    cada TOKEN_RECHECK_SEC e recarregam o token quando ela muda. `last_used` é
+    acumulado em memória e gravado em lote a cada LAST_USED_FLUSH_SEC.
+    """
+
     def __init__(self):
-        # Em produção, use um banco de dados real (PostgreSQL, MySQL, etc.)
-        self.client_tokens: Dict[str, Dict] = {}
-    
+        self.cipher = TokenCipher()
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._versions = get_cache("client_token_version", default_ttl=30 * 24 * 3600)
+        self._lock = threading.Lock()
+        self._pending_last_used: Dict[str, datetime] = {}
+        self._last_flush = time.monotonic()
+        self._flusher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="token-last-used")
+        atexit.register(self.flush_last_used)
+
     def save_token(self, client_id: str, token_data: Dict):
         """Salva token do cliente."""
-        self.client_tokens[client_id] = {
-            'access_token': token_data.get('access_token'),
-            'token_type': token_data.get('token_type', 'bearer'),
-            'expires_in': token_data.get('expires_in'),
-            'user_id': token_data.get('user_id'),
-            'user_name': token_data.get('user_name'),
-            'user_email': token_data.get('user_email'),
-            'ad_accounts': token_data.get('ad_accounts', []),
-            'created_at': datetime.now(),
-            'last_used': datetime.now(),
-        }
+        now = datetime.now()
+        expires_in = token_data.get('expires_in')
+        db = SessionLocal()
+        try:
+            row = db.get(ClientToken, client_id)
+            if row is None:
+                row = ClientToken(client_id=client_id, created_at=now)
+                db.add(row)
+            row.access_token_encrypted = self.cipher.encrypt(token_data.get('access_token'))
+            row.token_type = token_data.get('token_type', 'bearer')
+            row.expires_in = expires_in
+            row.expires_at = now + timedelta(seconds=int(expires_in)) if expires_in else None
+            row.user_id = token_data.get('user_id')
+            row.user_name = token_data.get('user_name')
+            row.user_email = token_data.get('user_email')
+            row.ad_accounts = token_data.get('ad_accounts', [])
+            row.last_used = now
+            db.commit()
+            token = self._to_dict(row)
+        finally:
+            db.close()
+
+        self._publish(client_id, token)
     
     def get_token(self, client_id: str) -> Optional[Dict]:
         """Obtém token do cliente."""
-        return self.client_tokens.get(client_id)
+        now = time.monotonic()
+        entry = self._cache.get(client_id)
+        if entry is not None and now - entry['checked_at'] >= TOKEN_RECHECK_SEC:
+            version = self._versions.get(client_id)
+            if version == entry['version'] and now - entry['loaded_at'] < TOKEN_CACHE_MAX_AGE_SEC:
+                entry['checked_at'] = now
+            else:
+                entry = None
+
+        if entry is None:
+            # Versão lida antes do banco: uma gravação concorrente força nova leitura depois
+            version = self._versions.get(client_id)
+            entry = {'token': self._load(client_id), 'version': version, 'loaded_at': now, 'checked_at': now}
+            self._remember(client_id, entry)
+        else:
+            with self._lock:
+                if client_id in self._cache:
+                    self._cache.move_to_end(client_id)
+
+        token = entry['token']
+        if token is not None:
+            self._touch(client_id, token)
+        return token
     
     def delete_token(self, client_id: str):
         """Remove token do cliente (revoke)."""
-        if client_id in self.client_tokens:
-            del self.client_tokens[client_id]
+        db = SessionLocal()
+        try:
+            db.query(ClientToken).filter(ClientToken.client_id == client_id).delete()
+            db.commit()
+        finally:
+            db.close()
+        with self._lock:
+            self._pending_last_used.pop(client_id, None)
+        self._publish(client_id, None)
     
     def list_clients(self) -> List[Dict]:
         """Lista todos os clientes autorizados."""
+        db = SessionLocal()
+        try:
+            rows = db.query(ClientToken).order_by(ClientToken.created_at.asc()).all()
+        finally:
+            db.close()
+        pending = dict(self._pending_last_used)
         return [
             {
-                'client_id': client_id,
-                'user_name': data['user_name'],
-                'user_email': data['user_email'],
-                'ad_accounts_count': len(data['ad_accounts']),
-                'created_at': data['created_at'].isoformat(),
-                'last_used': data['last_used'].isoformat(),
+                'client_id': row.client_id,
+                'user_name': row.user_name,
+                'user_email': row.user_email,
+                'ad_accounts_count': len(row.ad_accounts or []),
+                'created_at': row.created_at.isoformat(),
+                'last_used': (pending.get(row.client_id) or row.last_used or row.created_at).isoformat(),
             }
-            for client_id, data in self.client_tokens.items()
+            for row in rows
         ]
 
+    def flush_last_used(self):
+        """Grava os `last_used` acumulados numa única operação em lote."""
+        with self._lock:
+            pending, self._pending_last_used = self._pending_last_used, {}
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        db = SessionLocal()
+        try:
+            # executemany; clients revoked meanwhile simply match no row
+            db.execute(
+                update(ClientToken.__table__)
+                .where(ClientToken.client_id == bindparam('target_id'))
+                .values(last_used=bindparam('target_last_used')),
+                [{'target_id': client_id, 'target_last_used': last_used} for client_id, last_used in pending.items()],
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not save last_used for {len(pending)} clients: {e}")
+        finally:
+            db.close()
+
+    async def refresh_expiring_tokens(self, oauth: "OAuthManager", within_days: int = TOKEN_REFRESH_BEFORE_DAYS) -> Dict:
+        """
+        Renova (fb_exchange_token) os tokens de longa duração que expiram nos
+        próximos `within_days` dias, antes que o cliente precise refazer o OAuth.
+        """
+        limit = datetime.now() + timedelta(days=within_days)
+        db = SessionLocal()
+        try:
+            rows = db.query(ClientToken).filter(ClientToken.expires_at.isnot(None), ClientToken.expires_at <= limit).all()
+            targets = [(row.client_id, row.access_token_encrypted) for row in rows]
+        finally:
+            db.close()
+
+        refreshed, failed = [], []
+        for client_id, encrypted in targets:
+            try:
+                result = await oauth.get_long_lived_token(self.cipher.decrypt(encrypted))
+                self._store_refreshed(client_id, result)
+                refreshed.append(client_id)
+            except Exception as e:
+                logger.warning(f"Token refresh failed for client {client_id}: {e}")
+                failed.append(client_id)
+        return {'refreshed': refreshed, 'failed': failed}
+
+    def _store_refreshed(self, client_id: str, result: Dict):
+        now = datetime.now()
+        db = SessionLocal()
+        try:
+            row = db.get(ClientToken, client_id)
+            if row is None:
+                return
+            expires_in = result.get('expires_in', 5184000)
+            row.access_token_encrypted = self.cipher.encrypt(result['access_token'])
+            row.expires_in = expires_in
+            row.expires_at = now + timedelta(seconds=int(expires_in))
+            row.refreshed_at = now
+            db.commit()
+            token = self._to_dict(row)
+        finally:
+            db.close()
+        self._publish(client_id, token)
+
+    def _load(self, client_id: str) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            row = db.get(ClientToken, client_id)
+            return self._to_dict(row) if row is not None else None
+        finally:
+            db.close()
+
+    def _to_dict(self, row: ClientToken) -> Dict:
+        return {
+            'access_token': self.cipher.decrypt(row.access_token_encrypted),
+            'token_type': row.token_type,
+            'expires_in': row.expires_in,
+            'expires_at': row.expires_at,
+            'user_id': row.user_id,
+            'user_name': row.user_name,
+            'user_email': row.user_email,
+            'ad_accounts': row.ad_accounts or [],
+            'created_at': row.created_at,
+            'last_used': row.last_used,
+        }
+
+    def _publish(self, client_id: str, token: Optional[Dict]):
+        """Atualiza o cache local e avisa os outros workers (nova versão do cliente)."""
+        version = uuid.uuid4().hex
+        self._versions.set(client_id, version)
+        now = time.monotonic()
+        self._remember(client_id, {'token': token, 'version': version, 'loaded_at': now, 'checked_at': now})
+
+    def _remember(self, client_id: str, entry: Dict):
+        with self._lock:
+            self._cache[client_id] = entry
+            self._cache.move_to_end(client_id)
+            while len(self._cache) > TOKEN_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+    def _touch(self, client_id: str, token: Dict):
+        now = datetime.now()
+        token['last_used'] = now
+        with self._lock:
+            self._pending_last_used[client_id] = now
+            due = time.monotonic() - self._last_flush >= LAST_USED_FLUSH_SEC
+            if due:
+                self._last_flush = time.monotonic()
+        if due:
+            self._flusher.submit(self.flush_last_used)
+
 
 # Instâncias globais
 oauth_manager = OAuthManager()
@@ -326,7 +560,7 @@ async def auth_status(client_id: str = Query(...)):
             'user_name': token['user_name'],
             'user_email': token['user_email'],
             'ad_accounts_count': len(token['ad_accounts']),
-            'expires_at': (token['created_at'] + timedelta(seconds=token['expires_in'])).isoformat(),
+            'expires_at': token['expires_at'].isoformat() if token['expires_at'] else None,
         }
     else:
         return {
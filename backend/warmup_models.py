@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Aquece os modelos de IA (YOLO, Chroma/embeddings, LLMs) sob demanda.
+
+Uso:
+    python warmup_models.py                      # aquece a API em execução (POST /api/system/warmup)
+    python warmup_models.py --services vision    # só alguns serviços
+    python warmup_models.py --local              # carrega neste processo (baixa pesos, testa Ollama)
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GREEN = "\033[92m"
+RED = "\033[91m"
+RESET = "\033[0m"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquece os serviços de IA do B-Studio")
+    parser.add_argument("--services", default="", help="Lista separada por vírgula (vision,creative_search,strategist,interactions)")
+    parser.add_argument("--api-url", default=os.getenv("BIA_API_URL", "http://localhost:8000"))
+    parser.add_argument("--local", action="store_true", help="Carregar os modelos neste processo em vez da API")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.services.split(",") if name.strip()] or None
+    if args.local:
+        from app.core.lazy import warm_up
+        results = warm_up(names)
+    else:
+        params = {"services": ",".join(names)} if names else {}
+        resp = requests.post(f"{args.api_url}/api/system/warmup", params=params, timeout=600)
+        resp.raise_for_status()
+        results = resp.json()
+
+    failed = False
+    for name, result in results.items():
+        color = GREEN if result.get("status") == "ready" else RED
+        failed = failed or result.get("status") != "ready"
+        print(f"{color}{name}: {json.dumps(result, ensure_ascii=False)}{RESET}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())